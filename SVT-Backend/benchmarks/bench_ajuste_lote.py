@@ -0,0 +1,89 @@
+"""
+Benchmark de ajustes de inventario: una línea por llamada vs lote en una transacción
+
+Uso (desde SVT-Backend):
+    python -m benchmarks.bench_ajuste_lote --lineas 500
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import models
+from database import SessionLocal, engine
+from schemas import AjusteInventarioCreate, AjusteInventarioLote, MotivoMovimientoEnum
+from services import inventory_service
+from benchmarks.common import sembrar_catalogo, guardar_resultados
+
+
+def generar_lineas(db, cantidad: int, semilla: int = 42):
+    """Lecturas de escáner sintéticas sobre el catálogo de benchmark"""
+    aleatorio = random.Random(semilla)
+    claves = [
+        (s.producto_id, s.bodega_id)
+        for s in db.query(models.StockBodega.producto_id, models.StockBodega.bodega_id)
+        .join(models.Producto)
+        .filter(models.Producto.sku.like("BENCH-%"))
+        .limit(2000)
+    ]
+    return [
+        AjusteInventarioCreate(
+            producto_id=producto_id,
+            bodega_id=bodega_id,
+            cantidad=aleatorio.randint(1, 5),
+            motivo=MotivoMovimientoEnum.COMPRA,
+            observaciones="benchmark",
+        )
+        for producto_id, bodega_id in aleatorio.choices(claves, k=cantidad)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lineas", type=int, default=500)
+    parser.add_argument("--productos", type=int, default=2000)
+    parser.add_argument("--salida", default=None, help="Ruta del JSON de resultados")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    usuario_id = 1
+
+    with SessionLocal() as db:
+        sembrar_catalogo(db, productos=args.productos)
+        lineas = generar_lineas(db, args.lineas)
+
+    # Ruta actual: una llamada a ajustar_inventario (y un commit) por línea.
+    # Se silencian sus print de depuración para medir solo el trabajo de BD.
+    with SessionLocal() as db, contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        for linea in lineas:
+            inventory_service.ajustar_inventario(db, linea, usuario_id)
+        individual = time.perf_counter() - inicio
+
+    with SessionLocal() as db:
+        inicio = time.perf_counter()
+        resumen = inventory_service.ajustar_inventario_lote(
+            db, AjusteInventarioLote(items=lineas), usuario_id
+        )
+        lote = time.perf_counter() - inicio
+
+    resultados = {
+        "lineas": args.lineas,
+        "individual_s": round(individual, 4),
+        "individual_lineas_por_s": round(args.lineas / individual, 1),
+        "lote_s": round(lote, 4),
+        "lote_lineas_por_s": round(args.lineas / lote, 1),
+        "lote_aplicados": resumen["aplicados"],
+        "aceleracion": round(individual / lote, 2),
+    }
+    for clave, valor in resultados.items():
+        print(f"{clave:<26} {valor}")
+
+    if args.salida:
+        guardar_resultados(args.salida, "ajuste_lote", resultados)
+
+
+if __name__ == "__main__":
+    main()
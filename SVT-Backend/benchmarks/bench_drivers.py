@@ -0,0 +1,164 @@
+"""
+Benchmark de drivers de PostgreSQL: psycopg2 vs psycopg 3 en las rutas más usadas
+
+Ejecuta los mismos servicios con un engine por driver (database.crear_engine)
+sobre la base de DATABASE_URL, una sesión nueva por llamada que se cierra como
+en una petición (database.terminar_lectura):
+
+- productos_listado:  GET /productos (limit 100)
+- producto_detalle:   GET /productos/{id}
+- stock_bodega:       GET /inventario/stock/bodega/{id}
+- movimientos:        GET /inventario/movimientos (limit 100)
+- kardex:             GET /inventario/kardex/{id}
+- inventario_fisico:  POST /inventario/inventario-fisico con --conteo líneas
+                      (con psycopg 3 los UPDATE de stock van en modo pipeline)
+
+Con psycopg 3 informa además cuántas sentencias quedaron preparadas en el
+servidor (DB_PREPARE_THRESHOLD).
+
+Uso (desde SVT-Backend, con DATABASE_URL apuntando a PostgreSQL):
+    python -m benchmarks.bench_drivers --productos 2000 --conteo 200 --salida drivers.json
+"""
+
+import argparse
+import contextlib
+import io
+import random
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import DATABASE_URL, crear_engine, engine, terminar_lectura
+from schemas import InventarioFisicoCreate, InventarioFisicoItem
+from services import inventory_service, partition_service, producto_service
+from utils.security import pwd_context
+from benchmarks.common import (
+    PASSWORD_BENCH,
+    USUARIO_BENCH,
+    guardar_resultados,
+    medir,
+    sembrar_catalogo,
+)
+
+DRIVERS = ("psycopg2", "psycopg")
+
+
+def usuario_bench(db) -> int:
+    """ID del usuario de benchmark (lo crea si no existe)"""
+    usuario = db.query(models.User).filter(models.User.email == USUARIO_BENCH).first()
+    if not usuario:
+        usuario = models.User(
+            email=USUARIO_BENCH,
+            hashed_password=pwd_context.hash(PASSWORD_BENCH),
+            rol=models.UserRole.ADMIN,
+            nombre="Bench",
+        )
+        db.add(usuario)
+        db.commit()
+    return usuario.id
+
+
+def operaciones(
+    producto_ids: list, bodega_id: int, pares: list, usuario_id: int, semilla: int = 42
+):
+    """Funciones a medir: cada una recibe una sesión"""
+    aleatorio = random.Random(semilla)
+    ronda = {"n": 0}
+
+    def inventario_fisico(db):
+        # Alterna las cantidades contadas para que cada línea genere un ajuste
+        ronda["n"] += 1
+        items = [
+            InventarioFisicoItem(
+                producto_id=producto_id, bodega_id=bodega, cantidad_contada=10 + ronda["n"] % 2
+            )
+            for producto_id, bodega in pares
+        ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            inventory_service.inventario_fisico(
+                db, InventarioFisicoCreate(items=items, observaciones="benchmark"), usuario_id
+            )
+
+    return {
+        "productos_listado": lambda db: producto_service.get_productos(db, limit=100),
+        "producto_detalle": lambda db: producto_service.get_producto(
+            db, aleatorio.choice(producto_ids)
+        ),
+        "stock_bodega": lambda db: inventory_service.get_stock_bodega(db, bodega_id),
+        "movimientos": lambda db: inventory_service.get_movimientos(db, limit=100),
+        "kardex": lambda db: inventory_service.get_kardex(db, aleatorio.choice(producto_ids)),
+        "inventario_fisico": inventario_fisico,
+    }
+
+
+def sentencias_preparadas(motor) -> int:
+    """Sentencias preparadas en la conexión del pool (la última devuelta)"""
+    with motor.connect() as conexion:
+        return conexion.execute(text("SELECT count(*) FROM pg_prepared_statements")).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--productos", type=int, default=2000)
+    parser.add_argument("--conteo", type=int, default=200, help="Líneas por inventario físico")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--salida", default=None, help="Ruta del JSON de resultados")
+    args = parser.parse_args()
+
+    url = make_url(DATABASE_URL)
+    if url.get_backend_name() != "postgresql":
+        raise SystemExit("❌ DATABASE_URL debe apuntar a PostgreSQL")
+    url_base = url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+    models.Base.metadata.create_all(bind=engine)
+    partition_service.ensure_partitions(engine)
+    with sessionmaker(bind=engine)() as db:
+        sembrar_catalogo(db, productos=args.productos)
+        usuario_id = usuario_bench(db)
+        pares = [
+            (s.producto_id, s.bodega_id)
+            for s in db.query(models.StockBodega.producto_id, models.StockBodega.bodega_id)
+            .join(models.Producto)
+            .filter(models.Producto.sku.like("BENCH-%"))
+            .order_by(models.StockBodega.id)
+            .limit(args.conteo)
+        ]
+    producto_ids = sorted({producto_id for producto_id, _ in pares})
+    bodega_id = pares[0][1]
+
+    resultados = {}
+    for driver in DRIVERS:
+        motor = crear_engine(url_base, driver=driver)
+        Sesion = sessionmaker(bind=motor, autoflush=False, expire_on_commit=False)
+        for nombre, funcion in operaciones(producto_ids, bodega_id, pares, usuario_id).items():
+            repeticiones = 5 if nombre == "inventario_fisico" else args.repeticiones
+
+            def llamada():
+                with Sesion() as db:
+                    funcion(db)
+                    terminar_lectura(db)
+
+            estadisticas = medir(llamada, repeticiones)
+            resultados[f"{nombre}_{driver}"] = estadisticas
+            print(
+                f"{nombre:<18} {driver:<9} p50={estadisticas['p50_ms']:>9.2f} ms "
+                f"p95={estadisticas['p95_ms']:>9.2f} ms"
+            )
+        if driver == "psycopg":
+            resultados["sentencias_preparadas"] = sentencias_preparadas(motor)
+            print(f"sentencias preparadas en el servidor: {resultados['sentencias_preparadas']}")
+        motor.dispose()
+
+    for nombre in operaciones(producto_ids, bodega_id, pares, usuario_id):
+        antes, despues = (resultados[f"{nombre}_{driver}"]["p50_ms"] for driver in DRIVERS)
+        resultados[f"{nombre}_aceleracion"] = round(antes / despues, 2) if despues else None
+        print(f"{nombre:<18} psycopg2/psycopg p50: {resultados[f'{nombre}_aceleracion']}x")
+
+    if args.salida:
+        guardar_resultados(args.salida, "drivers", resultados)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark de GET /productos: joinedload (antes) vs proyección de columnas (después)
+
+Uso (desde SVT-Backend):
+    python -m benchmarks.bench_productos_listado --productos 5000 --bodegas 5
+"""
+
+import argparse
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import joinedload, noload
+
+import models
+import schemas
+from database import SessionLocal, engine
+from services import producto_service
+from benchmarks.common import medir, sembrar_catalogo, guardar_resultados
+
+_adaptador = TypeAdapter(List[schemas.ProductoListResponse])
+
+
+def listado_joinedload(db, limit: int):
+    """Ruta anterior: grafo ORM completo con joinedload"""
+    productos = (
+        db.query(models.Producto)
+        .options(
+            joinedload(models.Producto.proveedor),
+            joinedload(models.Producto.stocks_bodega).joinedload(models.StockBodega.bodega),
+            noload(models.Producto.categoria_rel),
+        )
+        .order_by(models.Producto.nombre)
+        .limit(limit)
+        .all()
+    )
+    return _adaptador.validate_python(productos, from_attributes=True)
+
+
+def listado_proyeccion(db, limit: int):
+    """Ruta nueva: proyección de columnas + stock por IN"""
+    return _adaptador.validate_python(producto_service.get_productos(db, limit=limit))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--productos", type=int, default=5000)
+    parser.add_argument("--bodegas", type=int, default=5)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--salida", default=None, help="Ruta del JSON de resultados")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+
+    resultados = {}
+    with SessionLocal() as db:
+        sembrar_catalogo(db, productos=args.productos, bodegas=args.bodegas)
+
+        for limit in (100, 1000):
+            for nombre, funcion in (
+                ("joinedload", listado_joinedload),
+                ("proyeccion", listado_proyeccion),
+            ):
+                def ejecutar():
+                    db.expunge_all()
+                    funcion(db, limit)
+
+                resultados[f"{nombre}_limit_{limit}"] = medir(ejecutar, args.repeticiones)
+                print(f"limit={limit:<5} {nombre:<11} {resultados[f'{nombre}_limit_{limit}']}")
+
+    if args.salida:
+        guardar_resultados(args.salida, "productos_listado", resultados)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark de serialización de listados: ruta por defecto de FastAPI vs utils.fast_json
+
+Genera en memoria (sin base de datos) listados de 1k y 10k filas con la forma de
+GET /productos (dicts de la proyección) y de GET /inventario/movimientos (objetos
+ORM con sus relaciones cargadas) y mide, por payload:
+
+- fastapi:      serialize_response (validación + dump a Python) + JSONResponse
+- type_adapter: json_list_response (TypeAdapter de la lista + dump_json)
+- filas:        json_rows_response (dicts directo a JSON; solo productos)
+
+Comprueba además que las tres rutas producen el mismo JSON.
+
+Uso (desde SVT-Backend):
+    python -m benchmarks.bench_serializacion --filas 1000,10000 --salida serializacion.json
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+import models
+import schemas
+from utils import fast_json
+from benchmarks.common import guardar_resultados, medir
+
+
+def productos_listado(n: int, bodegas: int) -> list:
+    """Dicts con la forma que devuelve producto_service.get_productos"""
+    ahora = datetime(2025, 1, 1, 8, 30)
+    lista_bodegas = [
+        {
+            "id": b,
+            "nombre": f"Bodega {b}",
+            "codigo": f"B{b}",
+            "direccion": "Calle 1",
+            "encargado": "Encargado",
+            "telefono": "555-0100",
+            "activa": True,
+            "fecha_creacion": ahora,
+        }
+        for b in range(1, bodegas + 1)
+    ]
+    proveedor = {
+        "id": 1,
+        "nombre": "Proveedor",
+        "codigo": "PROV",
+        "contacto": "Contacto",
+        "telefono": "555-0101",
+        "email": "proveedor@svt.com",
+        "direccion": "Calle 2",
+    }
+    return [
+        {
+            "id": i,
+            "sku": f"SKU-{i:07d}",
+            "nombre": f"Producto {i:07d}",
+            "descripcion": "Producto sintético de benchmark",
+            "categoria_id": 1,
+            "categoria_nombre": "Categoría",
+            "precio_unitario": 10.0 + i % 100,
+            "proveedor_id": 1,
+            "stock_actual": bodegas * 10,
+            "stock_minimo": 5,
+            "fecha_creacion": ahora,
+            "fecha_actualizacion": ahora + timedelta(seconds=i),
+            "proveedor": proveedor,
+            "stocks_bodega": [
+                {
+                    "id": i * bodegas + bodega["id"],
+                    "bodega_id": bodega["id"],
+                    "cantidad": 10,
+                    "ubicacion": "A1",
+                    "bodega": bodega,
+                }
+                for bodega in lista_bodegas
+            ],
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def movimientos_listado(n: int) -> list:
+    """Objetos ORM transitorios con producto, usuario y bodega ya asignados"""
+    ahora = datetime(2025, 1, 1, 8, 30)
+    usuario = models.User(
+        id=1, email="bench@svt.com", nombre="Bench", apellido="SVT",
+        rol=models.UserRole.ADMIN, activo=True, fecha_creacion=ahora, fecha_actualizacion=ahora,
+    )
+    bodega = models.Bodega(id=1, nombre="Bodega 1", codigo="B1", activa=True, fecha_creacion=ahora)
+    productos = [
+        models.Producto(
+            id=p, sku=f"SKU-{p:07d}", nombre=f"Producto {p:07d}", descripcion="Producto",
+            categoria_id=1, precio_unitario=10.0, proveedor_id=1, stock_actual=100,
+            stock_minimo=5, fecha_creacion=ahora, fecha_actualizacion=ahora,
+        )
+        for p in range(1, 101)
+    ]
+    return [
+        models.MovimientoInventario(
+            id=i,
+            producto_id=productos[i % 100].id,
+            producto=productos[i % 100],
+            tipo_movimiento=models.TipoMovimiento.ENTRADA,
+            cantidad=5,
+            motivo=models.MotivoMovimiento.COMPRA,
+            observaciones="Movimiento de benchmark",
+            usuario_id=1,
+            usuario=usuario,
+            bodega_destino_id=1,
+            bodega_destino=bodega,
+            bodega_origen=None,
+            stock_anterior=95,
+            stock_posterior=100,
+            fecha_movimiento=ahora + timedelta(minutes=i),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", default="1000,10000", help="Tamaños separados por comas")
+    parser.add_argument("--bodegas", type=int, default=3, help="Stock por bodega de cada producto")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--salida", default=None, help="Ruta del JSON de resultados")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    print(f"orjson: {'sí' if fast_json.orjson is not None else 'no (json.dumps)'}")
+
+    resultados = {"orjson": fast_json.orjson is not None}
+    for n in (int(valor) for valor in args.filas.split(",")):
+        for nombre, esquema, datos in (
+            ("productos", schemas.ProductoListResponse, productos_listado(n, args.bodegas)),
+            ("movimientos", schemas.MovimientoInventarioResponse, movimientos_listado(n)),
+        ):
+            campo = create_model_field(name="response", type_=List[esquema], mode="serialization")
+            rutas = {
+                "fastapi": lambda: JSONResponse(
+                    loop.run_until_complete(serialize_response(field=campo, response_content=datos))
+                ).body,
+                "type_adapter": lambda: fast_json.json_list_response(esquema, datos).body,
+            }
+            if nombre == "productos":
+                rutas["filas"] = lambda: fast_json.json_rows_response(datos).body
+
+            referencia = json.loads(rutas["fastapi"]())
+            for ruta, funcion in rutas.items():
+                cuerpo = funcion()
+                if json.loads(cuerpo) != referencia:
+                    raise SystemExit(f"❌ {nombre}/{ruta}: el JSON difiere de la ruta de FastAPI")
+                estadisticas = medir(funcion, args.repeticiones, calentamiento=1)
+                estadisticas["kb"] = round(len(cuerpo) / 1024, 1)
+                resultados[f"{nombre}_{n}_{ruta}"] = estadisticas
+                print(
+                    f"{nombre:<12} filas={n:<6} {ruta:<13} p50={estadisticas['p50_ms']:>9.2f} ms "
+                    f"p95={estadisticas['p95_ms']:>9.2f} ms  {estadisticas['kb']} KB"
+                )
+
+    loop.close()
+    if args.salida:
+        guardar_resultados(args.salida, "serializacion", resultados)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Utilidades compartidas por los scripts de benchmark del backend SVT
+"""
+
+import json
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+# Usuario que crea benchmarks.seed y usa benchmarks.load_test
+USUARIO_BENCH = "bench@svt.com"
+PASSWORD_BENCH = "bench123"
+
+
+def medir(funcion, repeticiones: int = 20, calentamiento: int = 2):
+    """Ejecutar una función varias veces y devolver estadísticas en milisegundos"""
+    for _ in range(calentamiento):
+        funcion()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    tiempos.sort()
+    return {
+        "repeticiones": repeticiones,
+        "media_ms": round(statistics.mean(tiempos), 3),
+        "p50_ms": round(percentil(tiempos, 50), 3),
+        "p95_ms": round(percentil(tiempos, 95), 3),
+        "min_ms": round(tiempos[0], 3),
+    }
+
+
+def percentil(valores_ordenados, p: float):
+    """Percentil por interpolación lineal sobre una lista ya ordenada"""
+    if not valores_ordenados:
+        return 0.0
+    k = (len(valores_ordenados) - 1) * p / 100
+    inferior = int(k)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    return valores_ordenados[inferior] + (
+        valores_ordenados[superior] - valores_ordenados[inferior]
+    ) * (k - inferior)
+
+
+def sembrar_catalogo(db, productos: int = 1000, bodegas: int = 5, prefijo: str = "BENCH"):
+    """Crear un catálogo sintético pequeño (proveedor, categoría, bodegas y stock)
+
+    Pensado para benchmarks de servicios; para volúmenes grandes usar benchmarks.seed.
+    """
+    import models
+
+    existentes = (
+        db.query(models.Producto).filter(models.Producto.sku.like(f"{prefijo}-%")).count()
+    )
+    if existentes >= productos:
+        return existentes
+
+    # Completar un catálogo existente reutiliza proveedor, categoría y bodegas
+    proveedor = db.query(models.Proveedor).filter_by(codigo=f"{prefijo}-PROV").first()
+    if proveedor is None:
+        proveedor = models.Proveedor(
+            nombre=f"{prefijo} Proveedor", codigo=f"{prefijo}-PROV", contacto="Bench"
+        )
+        db.add(proveedor)
+    categoria = db.query(models.Categoria).filter_by(codigo=f"{prefijo}-CAT").first()
+    if categoria is None:
+        categoria = models.Categoria(nombre=f"{prefijo} Categoria", codigo=f"{prefijo}-CAT")
+        db.add(categoria)
+
+    por_codigo = {
+        bodega.codigo: bodega
+        for bodega in db.query(models.Bodega).filter(models.Bodega.codigo.like(f"{prefijo}-B%"))
+    }
+    lista_bodegas = []
+    for i in range(bodegas):
+        bodega = por_codigo.get(f"{prefijo}-B{i}")
+        if bodega is None:
+            bodega = models.Bodega(nombre=f"{prefijo} Bodega {i}", codigo=f"{prefijo}-B{i}")
+            db.add(bodega)
+        lista_bodegas.append(bodega)
+    db.flush()
+
+    ahora = datetime.now(timezone.utc)
+    for i in range(existentes, productos):
+        producto = models.Producto(
+            sku=f"{prefijo}-{i:07d}",
+            nombre=f"Producto {i:07d}",
+            descripcion="Producto sintético de benchmark",
+            categoria_id=categoria.id,
+            categoria_nombre=categoria.nombre,
+            precio_unitario=10.0 + i % 100,
+            proveedor_id=proveedor.id,
+            stock_actual=bodegas * 10,
+            stock_minimo=5,
+            fecha_creacion=ahora,
+            fecha_actualizacion=ahora,
+        )
+        producto.stocks_bodega = [
+            models.StockBodega(bodega_id=bodega.id, cantidad=10, ubicacion="A1")
+            for bodega in lista_bodegas
+        ]
+        db.add(producto)
+        if i % 1000 == 0:
+            db.flush()
+
+    db.commit()
+    return productos
+
+
+def commit_actual():
+    """Commit de git del árbol actual (para comparar corridas entre commits)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def guardar_resultados(ruta: str, nombre: str, resultados: dict):
+    """Guardar los resultados de un benchmark como JSON"""
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(
+            {
+                "benchmark": nombre,
+                "commit": commit_actual(),
+                "fecha": datetime.now(timezone.utc).isoformat(),
+                "resultados": resultados,
+            },
+            archivo,
+            indent=2,
+            ensure_ascii=False,
+        )
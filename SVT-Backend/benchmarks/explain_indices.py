@@ -0,0 +1,166 @@
+"""
+Comprobación de planes: verifica con EXPLAIN que las consultas calientes usan sus índices
+
+Ejecuta las consultas reales de los servicios sobre la base sembrada con
+benchmarks.seed, captura el SQL que emiten y revisa el plan de cada una. Falla
+(código de salida 1) si alguna no usa ninguno de los índices esperados, para
+detectar regresiones al cambiar consultas o índices.
+
+Uso (desde SVT-Backend, tras benchmarks.seed y python -m migrations upgrade):
+    python -m benchmarks.explain_indices --producto 123 --bodega 4
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import event, text
+
+import models
+from database import SessionLocal, engine
+from services import inventory_service, product_queries
+from benchmarks.common import guardar_resultados
+
+# (nombre, tabla consultada, función sobre (db, args), índices aceptados)
+CASOS = [
+    (
+        "alertas_stock_bajo",
+        "productos",
+        lambda db, args: db.query(models.Producto)
+        .filter(models.Producto.stock_actual <= models.Producto.stock_minimo)
+        .all(),
+        {"idx_producto_stock_bajo"},
+    ),
+    (
+        "chatbot_stock_bajo",
+        "productos",
+        lambda db, args: product_queries.STOCK_BAJO.filas(db),
+        {"idx_producto_stock_bajo"},
+    ),
+    (
+        "stock_bodega",
+        "stock_bodega",
+        lambda db, args: inventory_service.get_stock_bodega(db, args.bodega),
+        {"idx_stock_bodega_disponible"},
+    ),
+    (
+        "kardex_bodega",
+        "movimientos_inventario",
+        lambda db, args: inventory_service.get_kardex(db, args.producto, bodega_id=args.bodega),
+        {
+            "idx_movimiento_producto_origen_fecha",
+            "idx_movimiento_producto_destino_fecha",
+            "idx_movimiento_producto_fecha",
+        },
+    ),
+    (
+        "movimientos_bodega",
+        "movimientos_inventario",
+        lambda db, args: inventory_service.get_movimientos(db, bodega_id=args.bodega),
+        {"idx_movimiento_origen_fecha", "idx_movimiento_destino_fecha", "idx_movimiento_fecha_id"},
+    ),
+    (
+        "movimientos_recientes",
+        "movimientos_inventario",
+        lambda db, args: inventory_service.get_movimientos(db),
+        {"idx_movimiento_fecha_id"},
+    ),
+]
+
+
+def capturar_sql(db, funcion, tabla: str):
+    """Ejecutar la función y devolver la primera sentencia SELECT sobre la tabla"""
+    capturadas = []
+
+    def registrar(conn, cursor, sentencia, parametros, context, executemany):
+        if sentencia.lstrip().upper().startswith("SELECT") and f"FROM {tabla}" in sentencia:
+            capturadas.append((sentencia, parametros))
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        funcion()
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+    db.rollback()
+    return capturadas[0] if capturadas else (None, None)
+
+
+def _nodos(plan):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from _nodos(hijo)
+
+
+def indices_del_plan(db, sentencia: str, parametros):
+    """Índices usados por el plan (los de particiones se reducen al índice padre)"""
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sentencia, parametros)
+        plan = cursor.fetchone()[0][0]["Plan"]
+    finally:
+        cursor.close()
+
+    nodos = list(_nodos(plan))
+    indices = set()
+    for nombre in {n["Index Name"] for n in nodos if "Index Name" in n}:
+        raiz = db.execute(
+            text("SELECT pg_partition_root(CAST(:nombre AS regclass))::text"),
+            {"nombre": nombre},
+        ).scalar()
+        indices.add(raiz or nombre)
+    secuenciales = sorted({n["Relation Name"] for n in nodos if n["Node Type"] == "Seq Scan"})
+    return indices, secuenciales, plan["Total Cost"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--producto", type=int, default=1)
+    parser.add_argument("--bodega", type=int, default=1)
+    parser.add_argument("--casos", default=None, help="Lista separada por comas")
+    parser.add_argument("--salida", default=None, help="Ruta del JSON de resultados")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("❌ La comprobación de planes requiere PostgreSQL")
+
+    seleccion = set(args.casos.split(",")) if args.casos else None
+    resultados = {}
+    fallos = 0
+    with SessionLocal() as db:
+        for nombre, tabla, funcion, esperados in CASOS:
+            if seleccion and nombre not in seleccion:
+                continue
+            try:
+                sentencia, parametros = capturar_sql(db, lambda: funcion(db, args), tabla)
+            except Exception as e:
+                db.rollback()
+                print(f"❌ {nombre:<24} error al ejecutar la consulta: {e}")
+                fallos += 1
+                continue
+            if sentencia is None:
+                print(f"❌ {nombre:<24} no se capturó ninguna consulta sobre {tabla}")
+                fallos += 1
+                continue
+
+            indices, secuenciales, costo = indices_del_plan(db, sentencia, parametros)
+            correcto = bool(indices & esperados)
+            fallos += not correcto
+            resultados[nombre] = {
+                "correcto": correcto,
+                "indices": sorted(indices),
+                "seq_scan": secuenciales,
+                "costo": costo,
+            }
+            print(
+                f"{'✅' if correcto else '❌'} {nombre:<24} "
+                f"índices={','.join(sorted(indices)) or '-'} "
+                f"seq_scan={','.join(secuenciales) or '-'} costo={costo}"
+            )
+            db.rollback()
+
+    if args.salida:
+        guardar_resultados(args.salida, "explain_indices", resultados)
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
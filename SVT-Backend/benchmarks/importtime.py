@@ -0,0 +1,123 @@
+"""
+Costo de arranque por módulo: resumen de `python -X importtime -c "import main"`
+
+Importa la aplicación en un proceso nuevo (varias veces, se queda con la
+mediana) y agrupa el tiempo propio de cada import por paquete raíz (fastapi,
+sqlalchemy, google, grpc, ...) y por módulo de la aplicación (routers.*,
+services.*, utils.*). Indica además si el import cargó el SDK de Gemini.
+
+Uso (desde SVT-Backend):
+    python -m benchmarks.importtime --salida base.json
+    CHATBOT_ENABLED=false python -m benchmarks.importtime --comparar base.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from benchmarks.common import guardar_resultados
+
+PAQUETES_APP = ("main", "database", "models", "schemas", "routers", "services", "utils", "migrations")
+# Módulos que solo deberían cargarse al usar el chatbot
+PAQUETES_IA = ("google.generativeai", "grpc")
+
+
+def medir_import(modulo: str) -> list:
+    """Ejecutar el import en un proceso nuevo y devolver (nivel, propio_us, acumulado_us, nombre)"""
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"Error importando {modulo}:\n{proceso.stderr[-2000:]}")
+
+    filas = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        nivel = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        filas.append((nivel, int(propio), int(acumulado), nombre.strip()))
+    return filas
+
+
+def resumir(filas: list) -> dict:
+    """Total, tiempo propio por paquete raíz y acumulado por módulo de la aplicación"""
+    por_paquete = defaultdict(int)
+    app = {}
+    for nivel, propio, acumulado, nombre in filas:
+        por_paquete[nombre.split(".")[0]] += propio
+        if nombre.split(".")[0] in PAQUETES_APP:
+            app[nombre] = acumulado
+    return {
+        "total_ms": sum(f[2] for f in filas if f[0] == 0) / 1000,
+        "modulos": len(filas),
+        "por_paquete_ms": {k: v / 1000 for k, v in por_paquete.items()},
+        "app_ms": {k: v / 1000 for k, v in app.items()},
+        "sdk_ia_cargado": any(
+            f[3] == paquete or f[3].startswith(paquete + ".") for f in filas for paquete in PAQUETES_IA
+        ),
+    }
+
+
+def _mediana(corridas: list, clave: str) -> dict:
+    nombres = set().union(*(c[clave] for c in corridas))
+    return {
+        nombre: round(statistics.median(c[clave].get(nombre, 0.0) for c in corridas), 2)
+        for nombre in nombres
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modulo", default="main", help="Módulo a importar")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--salida", default=None, help="Ruta del JSON de resultados")
+    parser.add_argument("--comparar", default=None, help="JSON de una corrida anterior")
+    args = parser.parse_args()
+
+    corridas = [resumir(medir_import(args.modulo)) for _ in range(args.repeticiones)]
+    resultados = {
+        "modulo": args.modulo,
+        "chatbot_enabled": os.getenv("CHATBOT_ENABLED", "true"),
+        "total_ms": round(statistics.median(c["total_ms"] for c in corridas), 2),
+        "modulos": corridas[-1]["modulos"],
+        "sdk_ia_cargado": corridas[-1]["sdk_ia_cargado"],
+        "por_paquete_ms": _mediana(corridas, "por_paquete_ms"),
+        "app_ms": _mediana(corridas, "app_ms"),
+    }
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            base = json.load(archivo)["resultados"]
+
+    def fila(nombre, valor, anterior):
+        variacion = f"  ({valor - anterior:+.1f} ms)" if anterior is not None else ""
+        return f"  {nombre:<40} {valor:>9.1f} ms{variacion}"
+
+    print(f"import {args.modulo}: {resultados['total_ms']:.1f} ms, {resultados['modulos']} módulos "
+          f"(mediana de {args.repeticiones})")
+    if base:
+        print(f"  anterior: {base['total_ms']:.1f} ms ({resultados['total_ms'] - base['total_ms']:+.1f} ms)")
+    print(f"SDK de IA cargado al importar: {'sí' if resultados['sdk_ia_cargado'] else 'no'}")
+
+    for titulo, clave in (("Tiempo propio por paquete", "por_paquete_ms"), ("Módulos de la aplicación (acumulado)", "app_ms")):
+        print(f"\n{titulo}:")
+        ordenados = sorted(resultados[clave].items(), key=lambda item: -item[1])[: args.top]
+        for nombre, valor in ordenados:
+            print(fila(nombre, valor, base[clave].get(nombre) if base else None))
+
+    if args.salida:
+        guardar_resultados(args.salida, "importtime", resultados)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Prueba de carga concurrente sobre los endpoints más usados del backend
+
+Lanza N clientes asíncronos contra un servidor en marcha durante un tiempo
+fijo, mezclando escenarios por peso, y reporta p50/p95/p99 y throughput por
+escenario. Los resultados se guardan como JSON (con el commit actual) para
+comparar corridas entre commits.
+
+Uso (desde SVT-Backend, con el servidor sembrado por benchmarks.seed):
+    python -m benchmarks.load_test --url http://localhost:8000 --concurrencia 32 --duracion 60
+    python -m benchmarks.load_test --comparar base.json --salida actual.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+from benchmarks.common import PASSWORD_BENCH, USUARIO_BENCH, guardar_resultados, percentil
+
+
+def _productos(aleatorio, args):
+    skip = aleatorio.randint(0, max(args.productos - 100, 0))
+    return "GET", "/productos/", {"params": {"skip": skip, "limit": 100}}
+
+
+def _alertas(aleatorio, args):
+    return "GET", "/inventario/stock/alertas", {}
+
+
+def _kardex(aleatorio, args):
+    return "GET", f"/inventario/kardex/{aleatorio.randint(1, args.productos)}", {}
+
+
+def _movimientos(aleatorio, args):
+    params = {"producto_id": aleatorio.randint(1, args.productos), "limit": 100}
+    return "GET", "/inventario/movimientos", {"params": params}
+
+
+def _transferencia(aleatorio, args):
+    origen, destino = aleatorio.sample(range(1, args.bodegas + 1), 2)
+    cuerpo = {
+        "producto_id": aleatorio.randint(1, args.productos),
+        "bodega_origen_id": origen,
+        "bodega_destino_id": destino,
+        "cantidad": 1,
+        "observaciones": "load-test",
+    }
+    return "POST", "/inventario/transferencia", {"json": cuerpo}
+
+
+ESCENARIOS = {
+    "productos": (_productos, 4),
+    "alertas": (_alertas, 1),
+    "kardex": (_kardex, 2),
+    "movimientos": (_movimientos, 2),
+    "transferencia": (_transferencia, 1),
+}
+
+
+async def _login(cliente: httpx.AsyncClient, usuario: str, password: str) -> str:
+    respuesta = await cliente.post(
+        "/auth/login", data={"username": usuario, "password": password}
+    )
+    respuesta.raise_for_status()
+    return respuesta.json()["access_token"]
+
+
+async def _trabajador(cliente, escenarios, pesos, args, fin, calentamiento, registros, semilla):
+    aleatorio = random.Random(semilla)
+    while True:
+        ahora = time.perf_counter()
+        if ahora >= fin:
+            return
+        nombre = aleatorio.choices(escenarios, weights=pesos)[0]
+        metodo, ruta, extra = ESCENARIOS[nombre][0](aleatorio, args)
+        inicio = time.perf_counter()
+        try:
+            respuesta = await cliente.request(metodo, ruta, **extra)
+            codigo = respuesta.status_code
+        except httpx.HTTPError:
+            codigo = 0
+        duracion = (time.perf_counter() - inicio) * 1000
+        if inicio >= calentamiento:
+            registros[nombre].append((duracion, codigo))
+
+
+def _resumir(registros, segundos):
+    resumen = {}
+    for nombre, muestras in registros.items():
+        tiempos = sorted(d for d, _ in muestras)
+        codigos = {}
+        for _, codigo in muestras:
+            codigos[str(codigo)] = codigos.get(str(codigo), 0) + 1
+        errores = sum(n for c, n in codigos.items() if c == "0" or c.startswith("5"))
+        resumen[nombre] = {
+            "peticiones": len(tiempos),
+            "errores": errores,
+            "codigos": codigos,
+            "throughput_rps": round(len(tiempos) / segundos, 2) if segundos else 0.0,
+            "p50_ms": round(percentil(tiempos, 50), 2),
+            "p95_ms": round(percentil(tiempos, 95), 2),
+            "p99_ms": round(percentil(tiempos, 99), 2),
+            "max_ms": round(tiempos[-1], 2) if tiempos else 0.0,
+        }
+    return resumen
+
+
+async def ejecutar(args):
+    escenarios = [e.strip() for e in args.escenarios.split(",") if e.strip()]
+    desconocidos = set(escenarios) - set(ESCENARIOS)
+    if desconocidos:
+        raise SystemExit(f"Escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+    pesos = [ESCENARIOS[e][1] for e in escenarios]
+
+    limites = httpx.Limits(
+        max_connections=args.concurrencia, max_keepalive_connections=args.concurrencia
+    )
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limites) as cliente:
+        token = await _login(cliente, args.usuario, args.password)
+        cliente.headers["Authorization"] = f"Bearer {token}"
+
+        registros = {nombre: [] for nombre in escenarios}
+        inicio = time.perf_counter()
+        calentamiento = inicio + args.calentamiento
+        fin = calentamiento + args.duracion
+        print(
+            f"🚀 {args.concurrencia} clientes, {args.duracion}s (+{args.calentamiento}s de calentamiento) "
+            f"contra {args.url}"
+        )
+        await asyncio.gather(
+            *(
+                _trabajador(cliente, escenarios, pesos, args, fin, calentamiento, registros, args.semilla + i)
+                for i in range(args.concurrencia)
+            )
+        )
+
+    resumen = _resumir(registros, args.duracion)
+    total = sum(r["peticiones"] for r in resumen.values())
+    resumen["_total"] = {
+        "peticiones": total,
+        "errores": sum(r["errores"] for r in resumen.values()),
+        "throughput_rps": round(total / args.duracion, 2),
+    }
+    return resumen
+
+
+def _imprimir(resumen, base=None):
+    print(f"\n{'escenario':<15}{'req':>9}{'err':>7}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for nombre, r in resumen.items():
+        if nombre.startswith("_"):
+            continue
+        linea = (
+            f"{nombre:<15}{r['peticiones']:>9}{r['errores']:>7}{r['throughput_rps']:>10.1f}"
+            f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+        )
+        anterior = (base or {}).get(nombre)
+        if anterior and anterior.get("p95_ms"):
+            cambio = (r["p95_ms"] - anterior["p95_ms"]) / anterior["p95_ms"] * 100
+            linea += f"   p95 {cambio:+.1f}% vs base"
+        print(linea)
+    total = resumen["_total"]
+    print(f"\nTotal: {total['peticiones']} peticiones, {total['errores']} errores, {total['throughput_rps']} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--usuario", default=USUARIO_BENCH)
+    parser.add_argument("--password", default=PASSWORD_BENCH)
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--duracion", type=float, default=30, help="Segundos de medición")
+    parser.add_argument("--calentamiento", type=float, default=5, help="Segundos descartados al inicio")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--escenarios", default=",".join(ESCENARIOS))
+    parser.add_argument("--productos", type=int, default=100_000, help="Rango de IDs sembrados")
+    parser.add_argument("--bodegas", type=int, default=20, help="Rango de IDs sembrados")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", default="resultados_load_test.json")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para comparar p95")
+    args = parser.parse_args()
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            base = json.load(archivo)["resultados"]["escenarios"]
+
+    resumen = asyncio.run(ejecutar(args))
+    _imprimir(resumen, base)
+
+    configuracion = {
+        k: getattr(args, k)
+        for k in ("url", "concurrencia", "duracion", "calentamiento", "escenarios", "productos", "bodegas", "semilla")
+    }
+    guardar_resultados(args.salida, "load_test", {"configuracion": configuracion, "escenarios": resumen})
+    print(f"💾 Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Generador de datos sintéticos para PostgreSQL (benchmarks y pruebas de carga)
+
+Carga proveedores, categorías, bodegas, productos, stock por bodega y
+movimientos de inventario con COPY en flujo, sin materializar las filas en
+memoria. Los IDs son explícitos (1..N) para que el cliente de carga pueda
+elegir productos y bodegas al azar.
+
+Uso (desde SVT-Backend, con DATABASE_URL apuntando a una BD desechable):
+    python -m benchmarks.seed --productos 100000 --bodegas 20 --movimientos 50000000 --reset
+"""
+
+import argparse
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+import models
+from benchmarks.common import PASSWORD_BENCH, USUARIO_BENCH
+from database import copy_desde, engine
+from services import partition_service
+from utils.security import pwd_context
+
+_TIPOS_ENTRADA = ("AJUSTE_POSITIVO", "TRANSFERENCIA_ENTRADA", "INVENTARIO_INICIAL")
+_TIPOS_SALIDA = ("AJUSTE_NEGATIVO", "TRANSFERENCIA_SALIDA")
+_MOTIVOS = ("COMPRA", "VENTA", "AJUSTE_STOCK", "CONTEO_FISICO", "TRANSFERENCIA")
+
+
+class _FlujoCopy(io.RawIOBase):
+    """Archivo de solo lectura que produce líneas de COPY desde un generador"""
+
+    def __init__(self, filas):
+        self._filas = filas
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        while len(self._buffer) < len(destino):
+            try:
+                fila = next(self._filas)
+            except StopIteration:
+                break
+            self._buffer += (
+                "\t".join("\\N" if v is None else str(v) for v in fila) + "\n"
+            ).encode("utf-8")
+        n = min(len(destino), len(self._buffer))
+        destino[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def _copiar(cursor, tabla: str, columnas: tuple, filas):
+    inicio = time.perf_counter()
+    copy_desde(
+        cursor,
+        f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN",
+        io.BufferedReader(_FlujoCopy(iter(filas)), buffer_size=1 << 20),
+    )
+    print(f"  {tabla:<24} {cursor.rowcount:>12,} filas en {time.perf_counter() - inicio:.1f}s")
+
+
+def sembrar(args):
+    aleatorio = random.Random(args.semilla)
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+    desde = ahora - timedelta(days=args.dias)
+
+    models.Base.metadata.create_all(bind=engine)
+    partition_service.ensure_partitions(engine, desde=desde)
+    conexion = engine.raw_connection()
+    try:
+        cursor = conexion.cursor()
+        if args.reset:
+            cursor.execute(
+                "TRUNCATE movimientos_inventario, stock_bodega, productos, bodegas, "
+                "categorias, proveedores RESTART IDENTITY CASCADE"
+            )
+
+        cursor.execute("SELECT id FROM usuarios WHERE email = %s", (USUARIO_BENCH,))
+        fila = cursor.fetchone()
+        if fila:
+            usuario_id = fila[0]
+        else:
+            cursor.execute(
+                "INSERT INTO usuarios (email, hashed_password, rol, nombre, activo, "
+                "fecha_creacion, fecha_actualizacion) VALUES (%s, %s, 'ADMIN', 'Bench', true, %s, %s) "
+                "RETURNING id",
+                (USUARIO_BENCH, pwd_context.hash(PASSWORD_BENCH), ahora, ahora),
+            )
+            usuario_id = cursor.fetchone()[0]
+
+        print("🌱 Sembrando datos sintéticos...")
+        _copiar(
+            cursor,
+            "proveedores",
+            ("id", "nombre", "codigo", "contacto", "telefono", "email", "direccion"),
+            (
+                (i, f"Proveedor {i}", f"PROV-{i:05d}", "Contacto", "555-0000", f"prov{i}@svt.com", "Dirección")
+                for i in range(1, args.proveedores + 1)
+            ),
+        )
+        _copiar(
+            cursor,
+            "categorias",
+            ("id", "nombre", "codigo", "descripcion", "activa", "fecha_creacion", "fecha_actualizacion"),
+            (
+                (i, f"Categoría {i}", f"CAT-{i:04d}", None, "t", ahora, ahora)
+                for i in range(1, args.categorias + 1)
+            ),
+        )
+        _copiar(
+            cursor,
+            "bodegas",
+            ("id", "nombre", "codigo", "direccion", "encargado", "telefono", "activa", "fecha_creacion"),
+            (
+                (i, f"Bodega {i}", f"BOD-{i:03d}", "Dirección", "Encargado", "555-0000", "t", ahora)
+                for i in range(1, args.bodegas + 1)
+            ),
+        )
+
+        # Stock por bodega determinista por producto para que los totales cuadren
+        def cantidades(producto_id):
+            r = random.Random(producto_id * 7919 + args.semilla)
+            return [r.randint(0, 60) for _ in range(args.bodegas)]
+
+        def filas_productos():
+            for i in range(1, args.productos + 1):
+                categoria = aleatorio.randint(1, args.categorias)
+                yield (
+                    i,
+                    f"SKU-{i:08d}",
+                    f"Producto {i:08d}",
+                    "Producto sintético",
+                    categoria,
+                    f"Categoría {categoria}",
+                    round(aleatorio.uniform(1, 500), 2),
+                    aleatorio.randint(1, args.proveedores),
+                    sum(cantidades(i)),
+                    aleatorio.randint(0, 400),
+                    ahora,
+                    ahora,
+                )
+
+        _copiar(
+            cursor,
+            "productos",
+            (
+                "id", "sku", "nombre", "descripcion", "categoria_id", "categoria_nombre",
+                "precio_unitario", "proveedor_id", "stock_actual", "stock_minimo",
+                "fecha_creacion", "fecha_actualizacion",
+            ),
+            filas_productos(),
+        )
+
+        def filas_stock():
+            for producto_id in range(1, args.productos + 1):
+                for bodega_id, cantidad in enumerate(cantidades(producto_id), start=1):
+                    yield (producto_id, bodega_id, cantidad, "A1")
+
+        _copiar(cursor, "stock_bodega", ("producto_id", "bodega_id", "cantidad", "ubicacion"), filas_stock())
+
+        rango_segundos = int((ahora - desde).total_seconds())
+
+        def filas_movimientos():
+            for _ in range(args.movimientos):
+                producto_id = aleatorio.randint(1, args.productos)
+                bodega_id = aleatorio.randint(1, args.bodegas)
+                cantidad = aleatorio.randint(1, 20)
+                anterior = aleatorio.randint(0, 200)
+                fecha = desde + timedelta(seconds=aleatorio.randint(0, rango_segundos))
+                if aleatorio.random() < 0.55:
+                    tipo = aleatorio.choice(_TIPOS_ENTRADA)
+                    origen, destino, posterior = None, bodega_id, anterior + cantidad
+                else:
+                    tipo = aleatorio.choice(_TIPOS_SALIDA)
+                    cantidad = min(cantidad, anterior) or 1
+                    origen, destino, posterior = bodega_id, None, max(anterior - cantidad, 0)
+                yield (
+                    producto_id, tipo, cantidad, aleatorio.choice(_MOTIVOS), None, None,
+                    usuario_id, fecha, anterior, posterior, origen, destino,
+                )
+
+        _copiar(
+            cursor,
+            "movimientos_inventario",
+            (
+                "producto_id", "tipo_movimiento", "cantidad", "motivo", "observaciones",
+                "documento_referencia", "usuario_id", "fecha_movimiento", "stock_anterior",
+                "stock_posterior", "bodega_origen_id", "bodega_destino_id",
+            ),
+            filas_movimientos(),
+        )
+
+        # Las secuencias no avanzan con IDs explícitos
+        for tabla in ("proveedores", "categorias", "bodegas", "productos"):
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {tabla}))"
+            )
+        conexion.commit()
+
+        print("📊 Actualizando estadísticas del planificador...")
+        conexion.autocommit = True
+        cursor.execute("ANALYZE")
+    finally:
+        conexion.close()
+
+    print(f"✅ Datos listos. Usuario de carga: {USUARIO_BENCH} / {PASSWORD_BENCH}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--productos", type=int, default=100_000)
+    parser.add_argument("--bodegas", type=int, default=20)
+    parser.add_argument("--movimientos", type=int, default=1_000_000)
+    parser.add_argument("--proveedores", type=int, default=200)
+    parser.add_argument("--categorias", type=int, default=50)
+    parser.add_argument("--dias", type=int, default=730, help="Días de historial de movimientos")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Vaciar las tablas antes de sembrar")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        parser.error("El generador usa COPY y requiere PostgreSQL (DATABASE_URL)")
+    sembrar(args)
+
+
+if __name__ == "__main__":
+    main()
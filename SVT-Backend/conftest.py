@@ -0,0 +1,79 @@
+# conftest.py
+"""
+Configuración de pytest.
+
+Sin DATABASE_URL los tests usan un SQLite temporal. Con DATABASE_URL debe
+apuntar a una base de datos de pruebas: cada test crea las tablas y las
+elimina al terminar.
+"""
+
+import os
+import tempfile
+from typing import Optional
+
+import pytest
+
+# Antes de importar database, que crea el engine al importarse
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='svt_tests_'), 'svt.db')}"
+)
+
+import database  # noqa: E402
+import models  # noqa: E402
+from services import partition_service  # noqa: E402
+from services.reference_cache import reference_cache  # noqa: E402
+from utils.query_guard import REPEAT_THRESHOLD, QueryRecorder, lazy_loads  # noqa: E402
+from utils.resource_versions import bump_all  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Sesión sobre un esquema recién creado (se elimina al terminar el test)"""
+    with database.engine.begin() as conn:
+        models.Base.metadata.create_all(bind=conn)
+        if conn.dialect.name == "postgresql" and partition_service.is_partitioned(conn):
+            partition_service.create_partitions(conn)
+    # Las cachés del proceso no deben ver datos de tests anteriores
+    bump_all()
+    reference_cache.invalidate()
+
+    sesion = database.SessionLocal()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+        models.Base.metadata.drop_all(bind=database.engine)
+
+
+@pytest.fixture
+def catalogo(db):
+    """Usuario, proveedor, categoría y dos bodegas de referencia"""
+    usuario = models.User(email="admin@example.com", hashed_password="x", rol=models.UserRole.ADMIN)
+    proveedor = models.Proveedor(nombre="Proveedor", codigo="PROV1")
+    categoria = models.Categoria(nombre="General", codigo="GEN001")
+    bodegas = [models.Bodega(nombre=f"Bodega {i}", codigo=f"B{i}") for i in (1, 2)]
+    db.add_all([usuario, proveedor, categoria, *bodegas])
+    db.commit()
+    return {
+        "usuario": usuario,
+        "proveedor": proveedor,
+        "categoria": categoria,
+        "bodegas": bodegas,
+    }
+
+
+@pytest.fixture
+def query_budget():
+    """Fixture: `with query_budget(3): ...` falla el test si se supera el presupuesto"""
+
+    def _crear(budget: Optional[int] = None, repeat_threshold: int = REPEAT_THRESHOLD):
+        return QueryRecorder(budget=budget, repeat_threshold=repeat_threshold)
+
+    return _crear
+
+
+@pytest.fixture
+def strict_loading():
+    """Fixture: cualquier carga perezosa con SQL durante el test lanza LazyLoadNotAllowed"""
+    with lazy_loads("raise"):
+        yield
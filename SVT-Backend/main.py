@@ -1,5 +1,9 @@
 # main.py
-from fastapi import FastAPI, HTTPException
+import asyncio
+import os
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from routers import (
     auth,
@@ -7,12 +11,21 @@ from routers import (
     productos,
     proveedores,
     categorias,
-    chatbot,
     inventario,
 )
-from database import engine, wait_for_database
+from database import engine, replica_engines
+import migrations
+from services import alert_service, partition_service, snapshot_service
+from services.reference_cache import reference_cache
+from utils import coalescing, invalidation_channel, metrics, query_guard, readiness, replicas
+from utils.compression import CompressionMiddleware
 import models
 
+# En producción el esquema lo aplica el despliegue (python -m migrations upgrade)
+APP_ENV = os.getenv("APP_ENV", "development").lower()
+# Con false no se registra /chatbot ni se importa el stack de IA
+CHATBOT_ENABLED = os.getenv("CHATBOT_ENABLED", "true").lower() in ("1", "true", "yes")
+
 # Inicializar la aplicación FastAPI
 app = FastAPI(
     title="Sistema de Gestión de Inventarios SVT con IA",
@@ -27,38 +40,110 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],
 )
 
+# Latencia por ruta, consultas SQL por petición y cabecera Server-Timing
+metrics.instrument_engine(engine)
+for replica_engine in replica_engines:
+    metrics.instrument_engine(replica_engine)
+if replicas.hay_replicas():
+    # Lee-tus-escrituras: marca a los clientes que acaban de escribir
+    app.middleware("http")(replicas.middleware)
+if query_guard.LAZY_LOAD_MODE != "off":
+    # Desarrollo/tests: las relaciones deben cargarse con opciones explícitas
+    query_guard.install_lazy_load_policy()
+if query_guard.MODE != "off":
+    # Registrado antes que metrics para quedar dentro de su contexto
+    app.middleware("http")(query_guard.budget_middleware)
+app.middleware("http")(metrics.middleware)
+
+# Compresión brotli/gzip de respuestas grandes (registrada al final: envuelve a las demás)
+app.add_middleware(CompressionMiddleware)
+
 # Incluir los routers
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(productos.router, prefix="/productos", tags=["Productos"])
 app.include_router(proveedores.router, prefix="/proveedores", tags=["Proveedores"])
 app.include_router(categorias.router, prefix="/categorias", tags=["Categorías"])
-app.include_router(chatbot.router, prefix="/chatbot", tags=["Chatbot IA"])
+if CHATBOT_ENABLED:
+    from routers import chatbot
+
+    app.include_router(chatbot.router, prefix="/chatbot", tags=["Chatbot IA"])
 app.include_router(inventario.router)
 
 
+def _preparar_esquema():
+    # En desarrollo se crean las tablas y se aplican las migraciones; en
+    # producción solo se comprueba que no falte ninguna (una consulta)
+    if APP_ENV == "production":
+        faltantes = migrations.pendientes(engine)
+        if faltantes:
+            print(
+                f"⚠️  Migraciones pendientes: {', '.join(m.version for m in faltantes)}; "
+                "ejecute python -m migrations upgrade"
+            )
+    else:
+        models.Base.metadata.create_all(bind=engine)
+        migrations.upgrade(engine)
+        print("✅ Tablas de base de datos creadas/verificadas")
+
+    # Particiones mensuales de movimientos (solo PostgreSQL)
+    partition_service.ensure_partitions(engine)
+
+
+async def preparar_base_de_datos():
+    """Preparación que necesita la base de datos (se ejecuta cuando responde)"""
+    await asyncio.to_thread(_preparar_esquema)
+
+    if engine.dialect.name == "postgresql":
+        app.state.mantenimiento_particiones = asyncio.create_task(
+            partition_service.maintenance_loop(engine)
+        )
+
+    # Estado inicial del motor de alertas (solo si la tabla está vacía)
+    asyncio.create_task(asyncio.to_thread(alert_service.sincronizar_si_vacio))
+
+    # Snapshots periódicos de stock (saldos de cierre por producto y bodega)
+    app.state.mantenimiento_snapshots = asyncio.create_task(
+        snapshot_service.maintenance_loop()
+    )
+
+    # Canal opcional de invalidación entre workers (CACHE_INVALIDATION_CHANNEL)
+    invalidation_channel.start()
+
+
 @app.on_event("startup")
 async def startup_event():
     """Evento que se ejecuta al iniciar la aplicación"""
     print("🚀 Iniciando aplicación SVT...")
 
-    # Esperar a que la base de datos esté lista
-    if not wait_for_database():
-        raise HTTPException(
-            status_code=500, detail="No se pudo conectar a la base de datos"
-        )
+    # La base de datos se prepara en segundo plano con reintentos (backoff):
+    # el worker atiende de inmediato las rutas sin BD y /health/ready
+    # responde 503 hasta que termina la preparación
+    app.state.inicializacion = asyncio.create_task(
+        readiness.inicializar(preparar_base_de_datos)
+    )
+    app.state.sondeo_bd = asyncio.create_task(readiness.sondeo_periodico())
+    if replicas.hay_replicas():
+        app.state.sondeo_replicas = asyncio.create_task(replicas.sondeo_periodico())
 
-    # Crear las tablas
-    try:
-        models.Base.metadata.create_all(bind=engine)
-        print("✅ Tablas de base de datos creadas/verificadas")
-    except Exception as e:
-        print(f"❌ Error creando tablas: {e}")
-        raise HTTPException(
-            status_code=500, detail="Error configurando la base de datos"
-        )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Evento que se ejecuta al detener la aplicación"""
+    for nombre in (
+        "inicializacion",
+        "sondeo_bd",
+        "sondeo_replicas",
+        "mantenimiento_particiones",
+        "mantenimiento_snapshots",
+    ):
+        tarea = getattr(app.state, nombre, None)
+        if tarea:
+            tarea.cancel()
+    invalidation_channel.stop()
 
 
 # Ruta de prueba actualizada
@@ -86,3 +171,36 @@ def health_check():
         "database": "postgresql",
         "ai_model": "gemini-1.5-flash",
     }
+
+
+# Liveness: el proceso responde (no consulta la base de datos)
+@app.get("/health/live")
+def liveness_check():
+    return readiness.vivo()
+
+
+# Readiness: arranque completado y último sondeo de la BD correcto (en caché)
+@app.get("/health/ready")
+def readiness_check():
+    listo, reporte = readiness.listo()
+    # Las réplicas son opcionales: sin ninguna disponible se lee del primario
+    reporte["replicas"] = replicas.estado()
+    return JSONResponse(status_code=200 if listo else 503, content=reporte)
+
+
+# Métricas en formato Prometheus
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics_endpoint():
+    return PlainTextResponse(
+        metrics.render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+
+# Estadísticas de la caché de datos de referencia
+@app.get("/health/cache")
+def cache_stats():
+    return {
+        "reference_cache": reference_cache.stats(),
+        "invalidation_channel": invalidation_channel.CHANNEL,
+        "coalescing": coalescing.stats(),
+    }
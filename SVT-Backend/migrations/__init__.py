@@ -0,0 +1,12 @@
+"""
+Migraciones versionadas del esquema (ver migrations/runner.py)
+
+Uso (desde SVT-Backend):
+    python -m migrations upgrade        # aplicar las pendientes
+    python -m migrations estado         # listar aplicadas y pendientes
+    python -m migrations marcar 0004    # registrar sin ejecutar (bases existentes)
+"""
+
+from migrations.runner import estado, marcar, pendientes, upgrade
+
+__all__ = ["estado", "marcar", "pendientes", "upgrade"]
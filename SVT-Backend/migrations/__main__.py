@@ -0,0 +1,45 @@
+"""
+CLI de migraciones: python -m migrations {upgrade,estado,marcar}
+"""
+
+import argparse
+import sys
+
+from database import engine
+from migrations import runner
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m migrations", description=__doc__)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    aplicar = comandos.add_parser("upgrade", help="Aplicar las migraciones pendientes")
+    aplicar.add_argument("--hasta", default=None, help="Última versión a aplicar")
+    comandos.add_parser("estado", help="Listar migraciones aplicadas y pendientes")
+    registrar = comandos.add_parser(
+        "marcar", help="Registrar como aplicadas sin ejecutarlas (bases ya migradas)"
+    )
+    registrar.add_argument("version")
+    args = parser.parse_args()
+
+    try:
+        if args.comando == "upgrade":
+            aplicadas = runner.upgrade(engine, hasta=args.hasta)
+            print(f"🎉 {len(aplicadas)} migraciones aplicadas" if aplicadas else "✅ Esquema al día")
+        elif args.comando == "marcar":
+            marcadas = runner.marcar(engine, args.version)
+            print(f"✅ Migraciones marcadas como aplicadas: {', '.join(marcadas) or 'ninguna'}")
+        else:
+            for m in runner.estado(engine):
+                aplicada = m["fecha_aplicacion"]
+                print(
+                    f"{'✅' if aplicada else '⏳'} {m['version']} {m['nombre']:<28} "
+                    f"{aplicada.isoformat(timespec='seconds') if aplicada else 'pendiente'}"
+                    f"{'' if m['transaccional'] else '  (sin transacción)'}"
+                )
+    except Exception as e:
+        print(f"💥 Error en la migración: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# migrations/indices.py
+"""
+Construcción de índices en línea para migraciones no transaccionales.
+
+crear_indices compara los índices declarados en models.py con los de la base y
+crea los que falten con CREATE INDEX CONCURRENTLY, sin bloquear escrituras. En
+movimientos_inventario (particionada) el índice se crea ON ONLY sobre la tabla
+padre, después en cada partición de forma concurrente y por último se adjunta
+cada índice de partición al padre; las particiones nuevas lo heredan solas.
+
+En otros motores create_all ya crea los índices y las funciones son no-op.
+"""
+
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex
+
+import models
+from services import partition_service
+
+
+def _estado_indice(conn: Connection, nombre: str) -> Optional[bool]:
+    """None si no existe; True/False según el índice sea válido"""
+    return conn.execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :nombre AND pg_table_is_visible(c.oid)"
+        ),
+        {"nombre": nombre},
+    ).scalar()
+
+
+def _sql_indice(indice, dialecto, concurrente: bool = False, solo_padre: bool = False) -> str:
+    sql = str(CreateIndex(indice, if_not_exists=True).compile(dialect=dialecto))
+    if concurrente:
+        sql = sql.replace(" INDEX ", " INDEX CONCURRENTLY ", 1)
+    if solo_padre:
+        sql = sql.replace(f" ON {indice.table.name} ", f" ON ONLY {indice.table.name} ", 1)
+    return sql
+
+
+def _crear_concurrente(conn: Connection, nombre: str, sql: str):
+    # Un CREATE INDEX CONCURRENTLY interrumpido deja el índice marcado como inválido
+    if _estado_indice(conn, nombre) is False:
+        print(f"   ♻️  Recreando índice inválido {nombre}")
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{nombre}"'))
+    conn.execute(text(sql))
+
+
+def _crear_particionado(conn: Connection, indice):
+    """Índice en tabla particionada: ON ONLY + una construcción concurrente por partición"""
+    conn.execute(text(_sql_indice(indice, conn.dialect, solo_padre=True)))
+    for mes in partition_service.list_partitions(conn):
+        particion = partition_service.nombre_particion(mes)
+        nombre_hijo = f"{indice.name}_p{mes.year:04d}_{mes.month:02d}"
+        sql = _sql_indice(indice, conn.dialect, concurrente=True).replace(
+            f" {indice.name} ON {indice.table.name} ", f" {nombre_hijo} ON {particion} ", 1
+        )
+        _crear_concurrente(conn, nombre_hijo, sql)
+        # No-op si el índice de la partición ya está adjunto a este padre
+        conn.execute(text(f'ALTER INDEX "{indice.name}" ATTACH PARTITION "{nombre_hijo}"'))
+
+
+def crear_indices(conn: Connection, nombres: Optional[Iterable[str]] = None) -> List[str]:
+    """Crear en línea los índices de models.py que falten (todos o los indicados).
+
+    Requiere una conexión en AUTOCOMMIT (migración con TRANSACCIONAL = False).
+    """
+    if conn.dialect.name != "postgresql":
+        return []
+
+    seleccion = set(nombres) if nombres is not None else None
+    particionada = partition_service.is_partitioned(conn)
+    creados, tablas = [], set()
+    for tabla in models.Base.metadata.sorted_tables:
+        if not conn.execute(text("SELECT to_regclass(:tabla)"), {"tabla": tabla.name}).scalar():
+            continue
+        for indice in sorted(tabla.indexes, key=lambda i: i.name):
+            if seleccion is not None and indice.name not in seleccion:
+                continue
+            if _estado_indice(conn, indice.name):
+                continue
+            print(f"📝 Creando índice {indice.name} en {tabla.name}...")
+            if particionada and tabla.name == partition_service.TABLA:
+                _crear_particionado(conn, indice)
+            else:
+                _crear_concurrente(
+                    conn, indice.name, _sql_indice(indice, conn.dialect, concurrente=True)
+                )
+            creados.append(indice.name)
+            tablas.add(tabla.name)
+
+    # Los índices de expresión necesitan estadísticas propias
+    for tabla in sorted(tablas):
+        conn.execute(text(f"ANALYZE {tabla}"))
+    return creados
+
+
+def eliminar_indices(conn: Connection, nombres: Iterable[str]) -> List[str]:
+    """Eliminar índices sin bloquear escrituras cuando es posible"""
+    if conn.dialect.name != "postgresql":
+        return []
+
+    eliminados = []
+    for nombre in nombres:
+        particionado = conn.execute(
+            text(
+                "SELECT c.relkind = 'I' FROM pg_class c "
+                "WHERE c.relname = :nombre AND pg_table_is_visible(c.oid)"
+            ),
+            {"nombre": nombre},
+        ).scalar()
+        if particionado is None:
+            continue
+        print(f"🗑️  Eliminando índice {nombre}...")
+        # DROP INDEX CONCURRENTLY no admite índices de tablas particionadas
+        concurrente = "" if particionado else "CONCURRENTLY "
+        conn.execute(text(f'DROP INDEX {concurrente}IF EXISTS "{nombre}"'))
+        eliminados.append(nombre)
+    return eliminados
@@ -0,0 +1,205 @@
+# migrations/runner.py
+"""
+Ejecutor de migraciones versionadas.
+
+Cada migración es un módulo de migrations/versions llamado vNNNN_nombre.py con:
+    DESCRIPCION: str
+    TRANSACCIONAL: bool  (False para CREATE/DROP INDEX CONCURRENTLY)
+    def upgrade(conn): ...
+
+Las migraciones aplicadas se registran en schema_migrations. Un advisory lock
+de sesión evita que dos procesos (workers o despliegues) las apliquen a la vez.
+Las transaccionales corren dentro de una transacción junto con su registro;
+las no transaccionales corren en AUTOCOMMIT y deben ser idempotentes, ya que
+un fallo a mitad no se deshace y se reintentan completas.
+"""
+
+import importlib
+import pkgutil
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Set
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+
+from migrations import versions
+
+TABLA = "schema_migrations"
+_CLAVE_BLOQUEO = "svt_schema_migrations"
+
+# Fuera de models.Base para que create_all no la gestione
+_metadata = MetaData()
+schema_migrations = Table(
+    TABLA,
+    _metadata,
+    Column("version", String(20), primary_key=True),
+    Column("descripcion", String(200)),
+    Column("fecha_aplicacion", DateTime),
+    Column("segundos", Float),
+)
+
+
+@dataclass(frozen=True)
+class Migracion:
+    version: str
+    nombre: str
+    descripcion: str
+    transaccional: bool
+    upgrade: Callable[[Connection], None]
+
+
+def descubrir() -> List[Migracion]:
+    """Migraciones disponibles en migrations/versions, en orden de versión"""
+    migraciones = []
+    for modulo in pkgutil.iter_modules(versions.__path__):
+        if not modulo.name.startswith("v"):
+            continue
+        version, _, nombre = modulo.name[1:].partition("_")
+        if not version.isdigit():
+            continue
+        mod = importlib.import_module(f"{versions.__name__}.{modulo.name}")
+        migraciones.append(
+            Migracion(
+                version=version,
+                nombre=nombre,
+                descripcion=getattr(mod, "DESCRIPCION", nombre),
+                transaccional=getattr(mod, "TRANSACCIONAL", True),
+                upgrade=mod.upgrade,
+            )
+        )
+    migraciones.sort(key=lambda m: m.version)
+    versiones = [m.version for m in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise RuntimeError(f"Versiones de migración duplicadas: {versiones}")
+    return migraciones
+
+
+def aplicadas(conn: Connection) -> Set[str]:
+    """Versiones registradas en schema_migrations (vacío si la tabla no existe)"""
+    if not inspect(conn).has_table(TABLA):
+        return set()
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pendientes(engine: Engine) -> List[Migracion]:
+    """Migraciones aún no aplicadas (una sola consulta; apta para el arranque)"""
+    with engine.connect() as conn:
+        hechas = aplicadas(conn)
+    return [m for m in descubrir() if m.version not in hechas]
+
+
+def _registrar(conn: Connection, migracion: Migracion, segundos: float):
+    conn.execute(
+        schema_migrations.insert().values(
+            version=migracion.version,
+            descripcion=migracion.descripcion[:200],
+            fecha_aplicacion=datetime.now(timezone.utc),
+            segundos=round(segundos, 3),
+        )
+    )
+
+
+class _Bloqueo:
+    """Advisory lock de sesión en una conexión dedicada (solo PostgreSQL)"""
+
+    def __init__(self, engine: Engine):
+        self._conexion = None
+        if engine.dialect.name == "postgresql":
+            self._conexion = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+    def __enter__(self):
+        if self._conexion is not None:
+            self._conexion.execute(
+                text("SELECT pg_advisory_lock(hashtext(:clave))"), {"clave": _CLAVE_BLOQUEO}
+            )
+        return self
+
+    def __exit__(self, *exc):
+        if self._conexion is not None:
+            try:
+                self._conexion.execute(
+                    text("SELECT pg_advisory_unlock(hashtext(:clave))"),
+                    {"clave": _CLAVE_BLOQUEO},
+                )
+            finally:
+                self._conexion.close()
+
+
+def upgrade(engine: Engine, hasta: Optional[str] = None) -> List[str]:
+    """Aplicar en orden las migraciones pendientes (hasta la versión indicada)"""
+    _metadata.create_all(bind=engine, checkfirst=True)
+    aplicadas_ahora = []
+    with _Bloqueo(engine):
+        # Releer bajo el bloqueo: otro proceso pudo aplicarlas mientras esperábamos
+        with engine.connect() as conn:
+            hechas = aplicadas(conn)
+
+        for migracion in descubrir():
+            if migracion.version in hechas:
+                continue
+            if hasta is not None and migracion.version > hasta:
+                break
+
+            print(f"🔄 Migración {migracion.version} ({migracion.nombre}): {migracion.descripcion}")
+            inicio = time.perf_counter()
+            if migracion.transaccional:
+                with engine.begin() as conn:
+                    migracion.upgrade(conn)
+                    _registrar(conn, migracion, time.perf_counter() - inicio)
+            else:
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    migracion.upgrade(conn)
+                    _registrar(conn, migracion, time.perf_counter() - inicio)
+            print(f"✅ Migración {migracion.version} aplicada en {time.perf_counter() - inicio:.2f}s")
+            aplicadas_ahora.append(migracion.version)
+
+    return aplicadas_ahora
+
+
+def marcar(engine: Engine, hasta: str) -> List[str]:
+    """Registrar como aplicadas, sin ejecutarlas, las migraciones hasta una versión.
+
+    Para bases existentes cuyo esquema ya se actualizó con los scripts anteriores.
+    """
+    _metadata.create_all(bind=engine, checkfirst=True)
+    marcadas = []
+    with _Bloqueo(engine), engine.begin() as conn:
+        hechas = aplicadas(conn)
+        for migracion in descubrir():
+            if migracion.version > hasta:
+                break
+            if migracion.version not in hechas:
+                _registrar(conn, migracion, 0.0)
+                marcadas.append(migracion.version)
+    return marcadas
+
+
+def estado(engine: Engine) -> List[dict]:
+    """Listado de migraciones con su fecha de aplicación (None si está pendiente)"""
+    with engine.connect() as conn:
+        registros = {}
+        if inspect(conn).has_table(TABLA):
+            registros = {fila.version: fila for fila in conn.execute(select(schema_migrations))}
+    return [
+        {
+            "version": m.version,
+            "nombre": m.nombre,
+            "descripcion": m.descripcion,
+            "transaccional": m.transaccional,
+            "fecha_aplicacion": registros[m.version].fecha_aplicacion if m.version in registros else None,
+            "segundos": registros[m.version].segundos if m.version in registros else None,
+        }
+        for m in descubrir()
+    ]
@@ -0,0 +1,7 @@
+"""
+Migraciones del esquema: módulos vNNNN_nombre.py aplicados en orden de versión.
+
+v0001 crea las tablas de models.py en una base vacía. Los cambios posteriores
+al modelo (tablas, columnas o índices nuevos) necesitan su propia migración:
+en producción no se ejecuta create_all al arrancar.
+"""
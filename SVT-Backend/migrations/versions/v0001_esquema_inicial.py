@@ -0,0 +1,158 @@
+"""Esquema base: las tablas tal como eran antes de las migraciones versionadas
+
+Definición fijada aquí (no depende de models.py): lo que crea esta migración no
+cambia con el código que la ejecuta. movimientos_inventario nace sin particionar;
+la 0003 la particiona. Las tablas existentes no se tocan.
+"""
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+)
+
+DESCRIPCION = "Esquema base (usuarios, catálogo, stock y movimientos)"
+TRANSACCIONAL = True
+
+_metadata = MetaData()
+
+Table(
+    "usuarios",
+    _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True),
+    Column("hashed_password", String),
+    Column("rol", Enum("ADMIN", "USUARIO", "INVITADO", name="userrole")),
+    Column("nombre", String(100), nullable=True),
+    Column("apellido", String(100), nullable=True),
+    Column("activo", Boolean),
+    Column("fecha_creacion", DateTime),
+    Column("fecha_actualizacion", DateTime),
+)
+
+Table(
+    "categorias",
+    _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("nombre", String(100), unique=True, index=True),
+    Column("codigo", String(50), unique=True, index=True),
+    Column("descripcion", Text, nullable=True),
+    Column("activa", Boolean),
+    Column("fecha_creacion", DateTime),
+    Column("fecha_actualizacion", DateTime),
+)
+
+Table(
+    "proveedores",
+    _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("nombre", String(100), index=True),
+    Column("codigo", String(50), unique=True, index=True),
+    Column("contacto", String(100)),
+    Column("telefono", String(20)),
+    Column("email", String(100)),
+    Column("direccion", Text),
+)
+
+productos = Table(
+    "productos",
+    _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("sku", String(50), unique=True, index=True),
+    Column("nombre", String(100), index=True),
+    Column("descripcion", Text),
+    Column("categoria_id", Integer, ForeignKey("categorias.id"), nullable=True),
+    Column("categoria_nombre", String(50), nullable=True, index=True),
+    Column("precio_unitario", Float),
+    Column("proveedor_id", Integer, ForeignKey("proveedores.id")),
+    Column("stock_actual", Integer),
+    Column("stock_minimo", Integer),
+    Column("fecha_creacion", DateTime),
+    Column("fecha_actualizacion", DateTime),
+)
+Index("idx_producto_sku", productos.c.sku, unique=True)
+
+Table(
+    "bodegas",
+    _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("nombre", String(100), unique=True, index=True),
+    Column("codigo", String(50), unique=True, index=True),
+    Column("direccion", Text),
+    Column("encargado", String(100)),
+    Column("telefono", String(20)),
+    Column("activa", Boolean),
+    Column("fecha_creacion", DateTime),
+)
+
+Table(
+    "stock_bodega",
+    _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("producto_id", Integer, ForeignKey("productos.id")),
+    Column("bodega_id", Integer, ForeignKey("bodegas.id")),
+    Column("cantidad", Integer),
+    Column("ubicacion", String(50)),
+    Index("idx_producto_bodega", "producto_id", "bodega_id", unique=True),
+)
+
+Table(
+    "movimientos_inventario",
+    _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("producto_id", Integer, ForeignKey("productos.id")),
+    Column(
+        "tipo_movimiento",
+        Enum(
+            "ENTRADA",
+            "SALIDA",
+            "AJUSTE_POSITIVO",
+            "AJUSTE_NEGATIVO",
+            "TRANSFERENCIA_ENTRADA",
+            "TRANSFERENCIA_SALIDA",
+            "INVENTARIO_INICIAL",
+            "INVENTARIO_FISICO",
+            name="tipomovimiento",
+        ),
+    ),
+    Column("cantidad", Integer),
+    Column(
+        "motivo",
+        Enum(
+            "COMPRA",
+            "VENTA",
+            "DEVOLUCION_CLIENTE",
+            "DEVOLUCION_PROVEEDOR",
+            "AJUSTE_STOCK",
+            "CONTEO_FISICO",
+            "PRODUCTO_DANADO",
+            "PRODUCTO_VENCIDO",
+            "ERROR_SISTEMA",
+            "ROBO_PERDIDA",
+            "TRANSFERENCIA",
+            "OTRO",
+            name="motivomovimiento",
+        ),
+    ),
+    Column("observaciones", Text),
+    Column("documento_referencia", String(50)),
+    Column("usuario_id", Integer, ForeignKey("usuarios.id")),
+    Column("fecha_movimiento", DateTime),
+    Column("stock_anterior", Integer),
+    Column("stock_posterior", Integer),
+    Column("bodega_origen_id", Integer, ForeignKey("bodegas.id"), nullable=True),
+    Column("bodega_destino_id", Integer, ForeignKey("bodegas.id"), nullable=True),
+)
+
+
+def upgrade(conn):
+    _metadata.create_all(bind=conn, checkfirst=True)
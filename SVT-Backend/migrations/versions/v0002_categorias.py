@@ -0,0 +1,49 @@
+"""Columnas de categoría en productos (antes migrate_categorias.py)"""
+
+from sqlalchemy import inspect, text
+
+DESCRIPCION = "Columnas categoria_id y categoria_nombre en productos"
+TRANSACCIONAL = True
+
+
+def upgrade(conn):
+    existentes = {columna["name"] for columna in inspect(conn).get_columns("productos")}
+    if {"categoria_id", "categoria_nombre"} <= existentes:
+        return
+
+    if "categoria_id" not in existentes:
+        conn.execute(
+            text("ALTER TABLE productos ADD COLUMN categoria_id INTEGER REFERENCES categorias(id)")
+        )
+        print("✅ Columna categoria_id agregada")
+    if "categoria_nombre" not in existentes:
+        conn.execute(text("ALTER TABLE productos ADD COLUMN categoria_nombre VARCHAR(50)"))
+        print("✅ Columna categoria_nombre agregada")
+
+    if not conn.execute(text("SELECT COUNT(*) FROM productos")).scalar():
+        return
+
+    # Categorías por defecto; los productos existentes quedan en 'General'
+    conn.execute(
+        text(
+            """
+            INSERT INTO categorias (nombre, codigo, descripcion, activa, fecha_creacion, fecha_actualizacion)
+            VALUES
+                ('General', 'GEN001', 'Categoría general para productos sin clasificar', true, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP),
+                ('Electrónicos', 'ELEC001', 'Productos electrónicos y tecnología', true, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP),
+                ('Ropa', 'ROPA001', 'Ropa y accesorios', true, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP),
+                ('Hogar', 'HOGAR001', 'Artículos para el hogar', true, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP),
+                ('Deportes', 'DEP001', 'Artículos deportivos', true, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            ON CONFLICT (codigo) DO NOTHING
+            """
+        )
+    )
+    categoria_general_id = conn.execute(
+        text("SELECT id FROM categorias WHERE codigo = 'GEN001'")
+    ).scalar()
+    if categoria_general_id:
+        conn.execute(
+            text("UPDATE productos SET categoria_id = :categoria_id WHERE categoria_id IS NULL"),
+            {"categoria_id": categoria_general_id},
+        )
+        print("✅ Productos existentes asignados a categoría 'General'")
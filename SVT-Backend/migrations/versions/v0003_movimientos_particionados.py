@@ -0,0 +1,177 @@
+"""
+movimientos_inventario particionada por mes (antes migrate_movimientos_particiones.py)
+
+La tabla existente se renombra a movimientos_inventario_legacy, se crea la
+tabla particionada (RANGE por fecha_movimiento) con las particiones necesarias
+para el historial y se copian los datos. Durante la copia se bloquean las
+escrituras sobre los movimientos, por lo que en bases grandes conviene
+aplicarla en una ventana de mantenimiento. La tabla legacy se conserva para
+verificar los datos; puede eliminarse después con DROP TABLE. Si estaba vacía
+(base nueva creada por la 0001) se elimina directamente.
+
+El esquema y las particiones están fijados aquí tal como eran en esta versión:
+la migración no depende de models.py ni de services/partition_service.py.
+"""
+
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+
+DESCRIPCION = "Particionado mensual de movimientos_inventario"
+TRANSACCIONAL = True
+
+TABLA = "movimientos_inventario"
+LEGACY = f"{TABLA}_legacy"
+MESES_ADELANTE = 3
+
+COLUMNAS = [
+    "id",
+    "producto_id",
+    "tipo_movimiento",
+    "cantidad",
+    "motivo",
+    "observaciones",
+    "documento_referencia",
+    "usuario_id",
+    "fecha_movimiento",
+    "stock_anterior",
+    "stock_posterior",
+    "bodega_origen_id",
+    "bodega_destino_id",
+]
+
+DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {TABLA} (
+        id SERIAL NOT NULL,
+        producto_id INTEGER REFERENCES productos (id),
+        tipo_movimiento tipomovimiento,
+        cantidad INTEGER,
+        motivo motivomovimiento,
+        observaciones TEXT,
+        documento_referencia VARCHAR(50),
+        usuario_id INTEGER REFERENCES usuarios (id),
+        fecha_movimiento TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        stock_anterior INTEGER,
+        stock_posterior INTEGER,
+        bodega_origen_id INTEGER REFERENCES bodegas (id),
+        bodega_destino_id INTEGER REFERENCES bodegas (id),
+        PRIMARY KEY (id, fecha_movimiento)
+    ) PARTITION BY RANGE (fecha_movimiento)
+    """,
+    f"CREATE INDEX IF NOT EXISTS ix_{TABLA}_id ON {TABLA} (id)",
+    f"CREATE INDEX IF NOT EXISTS ix_{TABLA}_fecha_movimiento ON {TABLA} (fecha_movimiento)",
+    f"CREATE INDEX IF NOT EXISTS idx_movimiento_producto_fecha "
+    f"ON {TABLA} (producto_id, fecha_movimiento)",
+]
+
+
+def _sumar_meses(mes: date, meses: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _particionada(conn) -> bool:
+    return bool(
+        conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :tabla AND pg_table_is_visible(c.oid)"
+            ),
+            {"tabla": TABLA},
+        ).first()
+    )
+
+
+def _crear_particiones(conn, desde=None, hasta=None) -> int:
+    """Particiones mensuales desde `desde` hasta `hasta` o MESES_ADELANTE meses por delante"""
+    actual = datetime.now(timezone.utc).date().replace(day=1)
+    mes = date(desde.year, desde.month, 1) if desde else actual
+    ultimo = _sumar_meses(actual, MESES_ADELANTE)
+    if hasta:
+        ultimo = max(ultimo, date(hasta.year, hasta.month, 1))
+
+    creadas = 0
+    while mes <= ultimo:
+        siguiente = _sumar_meses(mes, 1)
+        # Mismo nombre que usa services/partition_service.py para el mantenimiento
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {TABLA}_p{mes.year:04d}_{mes.month:02d} "
+                f"PARTITION OF {TABLA} "
+                f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{siguiente.isoformat()}')"
+            )
+        )
+        creadas += 1
+        mes = siguiente
+    return creadas
+
+
+def upgrade(conn):
+    if conn.dialect.name != "postgresql":
+        return  # El particionado solo aplica a PostgreSQL
+
+    existe = conn.execute(text("SELECT to_regclass(:tabla)"), {"tabla": TABLA}).scalar()
+    if existe and _particionada(conn):
+        return
+
+    if existe:
+        if conn.execute(text("SELECT to_regclass(:tabla)"), {"tabla": LEGACY}).scalar():
+            raise RuntimeError(f"Ya existe {LEGACY}; elimínela o renómbrela antes de migrar")
+
+        # Permite lecturas pero no escrituras mientras se copia
+        conn.execute(text(f"LOCK TABLE {TABLA} IN EXCLUSIVE MODE"))
+
+        print(f"📝 Renombrando {TABLA} a {LEGACY}...")
+        secuencia = conn.execute(
+            text("SELECT pg_get_serial_sequence(:tabla, 'id')"), {"tabla": TABLA}
+        ).scalar()
+        conn.execute(text(f"ALTER TABLE {TABLA} RENAME TO {LEGACY}"))
+
+        # Liberar los nombres de índices y secuencia para la tabla nueva
+        indices = conn.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = :tabla"),
+            {"tabla": LEGACY},
+        ).scalars().all()
+        for indice in indices:
+            nuevo = indice.replace(TABLA, LEGACY, 1) if TABLA in indice else f"{indice}_legacy"
+            conn.execute(text(f'ALTER INDEX "{indice}" RENAME TO "{nuevo}"'))
+        if secuencia:
+            conn.execute(text(f"ALTER SEQUENCE {secuencia} RENAME TO {LEGACY}_id_seq"))
+
+    print(f"📝 Creando tabla particionada {TABLA}...")
+    for sentencia in DDL:
+        conn.execute(text(sentencia))
+
+    if not existe:
+        _crear_particiones(conn)
+        return
+
+    desde, hasta, total = conn.execute(
+        text(f"SELECT MIN(fecha_movimiento), MAX(fecha_movimiento), COUNT(*) FROM {LEGACY}")
+    ).one()
+    print(f"✅ {_crear_particiones(conn, desde, hasta)} particiones mensuales creadas")
+    if not total:
+        conn.execute(text(f"DROP TABLE {LEGACY}"))
+        return
+
+    print(f"📊 Copiando {total} movimientos...")
+    seleccion = [
+        "COALESCE(fecha_movimiento, NOW() AT TIME ZONE 'UTC')" if c == "fecha_movimiento" else c
+        for c in COLUMNAS
+    ]
+    conn.execute(
+        text(
+            f"INSERT INTO {TABLA} ({', '.join(COLUMNAS)}) "
+            f"SELECT {', '.join(seleccion)} FROM {LEGACY}"
+        )
+    )
+    conn.execute(
+        text(
+            f"SELECT setval(pg_get_serial_sequence('{TABLA}', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 1) FROM {TABLA}))"
+        )
+    )
+    conn.execute(text(f"ANALYZE {TABLA}"))
+    print(f"ℹ️  Se conserva {LEGACY}; puede eliminarse tras verificar los datos")
@@ -0,0 +1,12 @@
+"""Índices compuestos y parciales de las consultas calientes (antes migrate_indices.py)"""
+
+from migrations.indices import crear_indices, eliminar_indices
+
+DESCRIPCION = "Índices compuestos/parciales de alertas, stock por bodega y movimientos"
+TRANSACCIONAL = False  # CREATE INDEX CONCURRENTLY
+
+
+def upgrade(conn):
+    crear_indices(conn)
+    # Cubierto por idx_movimiento_fecha_id (fecha_movimiento, id)
+    eliminar_indices(conn, ["ix_movimientos_inventario_fecha_movimiento"])
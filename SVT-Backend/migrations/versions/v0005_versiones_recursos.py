@@ -0,0 +1,19 @@
+"""Versiones compartidas por recurso para ETags iguales en todos los workers"""
+
+from sqlalchemy import text
+
+DESCRIPCION = "Tabla versiones_recursos"
+TRANSACCIONAL = True
+
+
+def upgrade(conn):
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS versiones_recursos (
+                recurso VARCHAR(50) PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+    )
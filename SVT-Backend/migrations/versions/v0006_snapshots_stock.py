@@ -0,0 +1,43 @@
+"""Saldos de cierre por corte para el stock histórico y el kardex"""
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table
+
+DESCRIPCION = "Tablas snapshots_stock y snapshot_cortes"
+TRANSACCIONAL = True
+
+# Definición fijada aquí (no depende de models.py). productos y bodegas solo
+# se declaran para las claves foráneas: ya existen y no se crean
+_metadata = MetaData()
+Table("productos", _metadata, Column("id", Integer, primary_key=True))
+Table("bodegas", _metadata, Column("id", Integer, primary_key=True))
+
+snapshots_stock = Table(
+    "snapshots_stock",
+    _metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("fecha_corte", DateTime, nullable=False),
+    Column("producto_id", Integer, ForeignKey("productos.id"), nullable=False),
+    Column("bodega_id", Integer, ForeignKey("bodegas.id"), nullable=False),
+    Column("cantidad", Integer, nullable=False),
+    Index(
+        "idx_snapshot_corte_producto_bodega",
+        "fecha_corte",
+        "producto_id",
+        "bodega_id",
+        unique=True,
+    ),
+)
+
+snapshot_cortes = Table(
+    "snapshot_cortes",
+    _metadata,
+    Column("fecha_corte", DateTime, primary_key=True),
+    Column("intervalo", String(20)),
+    Column("filas", Integer),
+    Column("segundos", Float),
+    Column("fecha_generacion", DateTime),
+)
+
+
+def upgrade(conn):
+    _metadata.create_all(bind=conn, tables=[snapshots_stock, snapshot_cortes], checkfirst=True)
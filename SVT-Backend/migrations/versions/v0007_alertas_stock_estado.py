@@ -0,0 +1,30 @@
+"""Último estado de alerta de stock por producto"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+
+DESCRIPCION = "Tabla alertas_stock_estado"
+TRANSACCIONAL = True
+
+# Definición fijada aquí (no depende de models.py); productos solo se declara
+# para la clave foránea
+_metadata = MetaData()
+Table("productos", _metadata, Column("id", Integer, primary_key=True))
+
+alertas_stock_estado = Table(
+    "alertas_stock_estado",
+    _metadata,
+    Column(
+        "producto_id",
+        Integer,
+        ForeignKey("productos.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("estado", String(20), nullable=False, index=True),
+    Column("stock_actual", Integer),
+    Column("stock_minimo", Integer),
+    Column("fecha_cambio", DateTime),
+)
+
+
+def upgrade(conn):
+    _metadata.create_all(bind=conn, tables=[alertas_stock_estado], checkfirst=True)
@@ -9,7 +9,9 @@ from sqlalchemy import (
     Boolean,
     Enum,
     Index,
+    PrimaryKeyConstraint,
 )
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime, timezone
@@ -164,13 +166,23 @@ class StockBodega(Base):
 
     __table_args__ = (
         Index("idx_producto_bodega", "producto_id", "bodega_id", unique=True),
+        # Stock disponible de una bodega (get_stock_bodega)
+        Index(
+            "idx_stock_bodega_disponible",
+            "bodega_id",
+            "producto_id",
+            postgresql_where=cantidad > 0,
+        ),
     )
 
 
 class MovimientoInventario(Base):
     __tablename__ = "movimientos_inventario"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Particionada por mes en PostgreSQL (services/partition_service.py). La
+    # clave primaria del modelo es solo id; en PostgreSQL el DDL agrega la
+    # clave de partición (ver _clave_primaria_postgresql)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     producto_id = Column(Integer, ForeignKey("productos.id"))
     tipo_movimiento = Column(Enum(TipoMovimiento))
     cantidad = Column(Integer)
@@ -178,7 +190,11 @@ class MovimientoInventario(Base):
     observaciones = Column(Text)
     documento_referencia = Column(String(50))
     usuario_id = Column(Integer, ForeignKey("usuarios.id"))
-    fecha_movimiento = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    fecha_movimiento = Column(
+        DateTime,
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
     stock_anterior = Column(Integer)
     stock_posterior = Column(Integer)
     bodega_origen_id = Column(Integer, ForeignKey("bodegas.id"), nullable=True)
@@ -193,6 +209,122 @@ class MovimientoInventario(Base):
         "Bodega", foreign_keys=[bodega_destino_id], back_populates="movimientos_destino"
     )
 
+    __table_args__ = (
+        # Listado general: ORDER BY fecha_movimiento DESC, id DESC
+        Index("idx_movimiento_fecha_id", "fecha_movimiento", "id"),
+        Index("idx_movimiento_producto_fecha", "producto_id", "fecha_movimiento"),
+        # Filtro bodega_origen_id = X OR bodega_destino_id = X (BitmapOr)
+        Index(
+            "idx_movimiento_origen_fecha",
+            "bodega_origen_id",
+            "fecha_movimiento",
+            postgresql_where=bodega_origen_id.isnot(None),
+        ),
+        Index(
+            "idx_movimiento_destino_fecha",
+            "bodega_destino_id",
+            "fecha_movimiento",
+            postgresql_where=bodega_destino_id.isnot(None),
+        ),
+        # Último movimiento <= t por (producto, bodega) para consultas históricas
+        Index(
+            "idx_movimiento_producto_destino_fecha",
+            "producto_id",
+            "bodega_destino_id",
+            "fecha_movimiento",
+        ),
+        Index(
+            "idx_movimiento_producto_origen_fecha",
+            "producto_id",
+            "bodega_origen_id",
+            "fecha_movimiento",
+        ),
+        {
+            "postgresql_partition_by": "RANGE (fecha_movimiento)",
+            "sqlite_autoincrement": True,
+            "info": {"clave_particion": "fecha_movimiento"},
+        },
+    )
+
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _clave_primaria_postgresql(constraint, compiler, **kw):
+    # Una tabla particionada exige la clave de partición en su clave primaria;
+    # en otros motores (SQLite) la PK compuesta impediría el autoincremento de id
+    columna = constraint.table.info.get("clave_particion")
+    if columna and columna not in constraint.columns:
+        columnas = [*constraint.columns, constraint.table.c[columna]]
+        nombres = ", ".join(compiler.preparer.quote(c.name) for c in columnas)
+        return f"PRIMARY KEY ({nombres})"
+    return compiler.visit_primary_key_constraint(constraint, **kw)
+
+
+class SnapshotStock(Base):
+    """Saldo de cierre por producto y bodega en una fecha de corte.
+
+    Refleja los movimientos con fecha_movimiento < fecha_corte; las claves sin
+    fila en un corte completo tienen saldo cero.
+    """
+
+    __tablename__ = "snapshots_stock"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fecha_corte = Column(DateTime, nullable=False)
+    producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False)
+    bodega_id = Column(Integer, ForeignKey("bodegas.id"), nullable=False)
+    cantidad = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "idx_snapshot_corte_producto_bodega",
+            "fecha_corte",
+            "producto_id",
+            "bodega_id",
+            unique=True,
+        ),
+    )
+
+
+class SnapshotCorte(Base):
+    """Cortes de snapshot generados completamente (uno por transacción)"""
+
+    __tablename__ = "snapshot_cortes"
+
+    fecha_corte = Column(DateTime, primary_key=True)
+    intervalo = Column(String(20))
+    filas = Column(Integer)
+    segundos = Column(Float)
+    fecha_generacion = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class AlertaStockEstado(Base):
+    """Último estado de alerta de stock por producto (sin fila = NORMAL)"""
+
+    __tablename__ = "alertas_stock_estado"
+
+    producto_id = Column(
+        Integer, ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True
+    )
+    estado = Column(String(20), nullable=False, index=True)
+    stock_actual = Column(Integer)
+    stock_minimo = Column(Integer)
+    fecha_cambio = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class VersionRecurso(Base):
+    """Versión de cada recurso compartida por todos los workers (ETags)"""
+
+    __tablename__ = "versiones_recursos"
+
+    recurso = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 
 # Índices adicionales
 Index("idx_producto_sku", Producto.sku, unique=True)
+# Productos en alerta (stock_actual <= stock_minimo), ordenados por déficit
+Index(
+    "idx_producto_stock_bajo",
+    Producto.stock_actual - Producto.stock_minimo,
+    postgresql_where=Producto.stock_actual <= Producto.stock_minimo,
+)
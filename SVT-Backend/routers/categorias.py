@@ -8,6 +8,7 @@ import database
 from services import categoria_service
 from utils.security import get_current_user
 from utils.role_verification import verify_admin_or_usuario
+from utils.etag import conditional_get
 
 router = APIRouter()
 
@@ -44,7 +45,11 @@ def crear_categoria(
     return categoria_service.create_categoria(db=db, categoria=categoria)
 
 
-@router.get("/", response_model=List[schemas.CategoriaResponse])
+@router.get(
+    "/",
+    response_model=List[schemas.CategoriaResponse],
+    dependencies=[Depends(conditional_get("categorias"))],
+)
 def listar_categorias(
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user),
@@ -59,7 +64,11 @@ def listar_categorias(
     return categorias
 
 
-@router.get("/activas", response_model=List[schemas.CategoriaResponse])
+@router.get(
+    "/activas",
+    response_model=List[schemas.CategoriaResponse],
+    dependencies=[Depends(conditional_get("categorias"))],
+)
 def listar_categorias_activas(
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user),
@@ -4,8 +4,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
-from database import get_db
+from database import get_db, get_db_lectura
 from services.chatbot_service import get_ai_assistant, InventoryAIAssistant
+from services import chatbot_service, query_registry
 import uuid
 from datetime import datetime
 import os
@@ -127,33 +128,35 @@ async def get_quick_actions():
 
 
 @router.get("/analytics")
-async def get_inventory_analytics(
-    db: Session = Depends(get_db),
-    assistant: InventoryAIAssistant = Depends(get_ai_assistant),
-):
+def get_inventory_analytics(db: Session = Depends(get_db_lectura)):
     """
     📊 Obtener análisis completo del inventario SVT
     """
+    # Endpoint síncrono: las consultas corren en el threadpool, fuera del event loop
     try:
-        # Obtener diferentes tipos de análisis
-        stats = await assistant.get_inventory_stats(db)
-        low_stock = await assistant.get_low_stock_analysis(db)
-        suppliers = await assistant.get_supplier_analysis(db)
-
-        return {
-            "general_stats": stats,
-            "low_stock_analysis": low_stock,
-            "supplier_analysis": suppliers,
-            "generated_at": datetime.now(),
-            "system": "SVT Inventory Management",
-        }
-
+        return chatbot_service.analisis_inventario(db)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error generando análisis: {str(e)}"
         )
 
 
+@router.get("/query-stats")
+async def get_query_stats(query: Optional[str] = None):
+    """
+    ⏱️ Latencia y filas por consulta SQL del chatbot (ordenadas por tiempo total)
+    """
+    stats = query_registry.stats(query)
+    if query and not stats:
+        raise HTTPException(status_code=404, detail="Consulta no registrada")
+    return {
+        "consultas": dict(
+            sorted(stats.items(), key=lambda item: item[1]["segundos_total"], reverse=True)
+        ),
+        "umbral_lento_ms": query_registry.CONSULTA_LENTA_MS,
+    }
+
+
 @router.get("/conversation/{conversation_id}")
 async def get_conversation_history(conversation_id: str):
     """
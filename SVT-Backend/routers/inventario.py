@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
-from database import get_db
-from services import inventory_service
+from database import SessionLocal, get_db, get_db_lectura
+from services import alert_service, inventory_service, snapshot_service
 from schemas import (
     # Bodegas
     BodegaCreate,
@@ -12,17 +17,26 @@ from schemas import (
     # Stock
     StockBodegaResponse,
     StockConsolidado,
+    StockHistoricoResponse,
     AlertaStock,
+    AlertaEstadoResponse,
     # Movimientos
     MovimientoInventarioCreate,
     MovimientoInventarioResponse,
     AjusteInventarioCreate,
+    AjusteInventarioLote,
+    AjusteInventarioLoteResponse,
     TransferenciaInventarioCreate,
     InventarioFisicoCreate,
     # Reportes
     KardexResponse,
+    SnapshotCorteResponse,
 )
 from utils.security import get_current_user
+from utils.etag import conditional_get
+from utils.fast_json import json_list_response, json_rows_response
+from utils.fieldsets import sparse_fields
+from utils.role_verification import verify_admin
 from models import User
 
 import models
@@ -36,7 +50,11 @@ router = APIRouter(
 # ==================== ENDPOINTS DE BODEGA ====================
 
 
-@router.get("/bodegas", response_model=List[BodegaResponse])
+@router.get(
+    "/bodegas",
+    response_model=List[BodegaResponse],
+    dependencies=[Depends(conditional_get("bodegas"))],
+)
 def get_bodegas(
     skip: int = 0,
     limit: int = 100,
@@ -120,7 +138,7 @@ def get_stock_producto(
     current_user: User = Depends(get_current_user),
 ):
     """Obtener el stock consolidado de un producto"""
-    return inventory_service.get_stock_consolidado(db, producto_id)
+    return inventory_service.get_stock_consolidado_lectura(db, producto_id)
 
 
 @router.get("/stock/bodega/{bodega_id}", response_model=List[StockBodegaResponse])
@@ -130,17 +148,118 @@ def get_stock_bodega(
     current_user: User = Depends(get_current_user),
 ):
     """Obtener todo el stock de una bodega"""
-    return inventory_service.get_stock_bodega(db, bodega_id)
+    return json_list_response(
+        StockBodegaResponse, inventory_service.get_stock_bodega(db, bodega_id)
+    )
+
+
+@router.get("/stock/as-of", response_model=StockHistoricoResponse)
+def get_stock_historico(
+    fecha: datetime = Query(..., description="Instante a consultar (ISO 8601)"),
+    producto_id: Optional[int] = Query(None),
+    bodega_id: Optional[int] = Query(None),
+    skip: int = 0,
+    limit: int = Query(1000, le=10000),
+    db: Session = Depends(get_db_lectura),
+    current_user: User = Depends(get_current_user),
+):
+    """Obtener el stock por producto y bodega en una fecha pasada"""
+    return inventory_service.get_stock_historico(
+        db, fecha, producto_id, bodega_id, skip, limit
+    )
 
 
 @router.get("/stock/alertas", response_model=List[AlertaStock])
 def get_alertas_stock(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_db_lectura), current_user: User = Depends(get_current_user)
 ):
     """Obtener productos con stock bajo o sin stock"""
     return inventory_service.get_productos_stock_bajo(db)
 
 
+@router.post("/stock/recalcular", response_model=List[int])
+def recalcular_stock_total(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(verify_admin),
+):
+    """Recalcular el stock total de los productos desde las bodegas; devuelve los IDs corregidos"""
+    return inventory_service.recalcular_stock_total(db)
+
+
+@router.get("/stock/alertas/estado", response_model=List[AlertaEstadoResponse])
+def get_estado_alertas(
+    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+):
+    """Obtener las alertas activas desde la tabla de estados (sin recalcular)"""
+    return alert_service.get_alertas_activas(db)
+
+
+def _usuario_stream(request: Request, token: Optional[str] = Query(None)):
+    """Autenticación para SSE: EventSource no envía cabeceras, se acepta ?token="""
+    autorizacion = request.headers.get("Authorization", "")
+    if autorizacion.lower().startswith("bearer "):
+        token = autorizacion[7:]
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Credenciales inválidas",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # Sesión propia y corta: no retener una conexión durante todo el stream
+    db = SessionLocal()
+    try:
+        return get_current_user(token=token, db=db)
+    finally:
+        db.close()
+
+
+def _alertas_activas_json():
+    db = SessionLocal()
+    try:
+        return [
+            AlertaEstadoResponse.model_validate(alerta).model_dump(mode="json")
+            for alerta in alert_service.get_alertas_activas(db)
+        ]
+    finally:
+        db.close()
+
+
+def _evento_sse(evento: str, datos) -> str:
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+@router.get("/stock/alertas/stream")
+async def stream_alertas(
+    request: Request, current_user: User = Depends(_usuario_stream)
+):
+    """Stream SSE: evento 'estado' con las alertas activas y luego un evento 'alerta' por cada cambio"""
+    # Suscribirse antes de leer el estado inicial para no perder cambios intermedios
+    cola = alert_service.suscribir()
+    inicial = await run_in_threadpool(_alertas_activas_json)
+
+    async def eventos():
+        try:
+            yield "retry: 5000\n\n"
+            yield _evento_sse("estado", inicial)
+            while True:
+                try:
+                    cambio = await asyncio.wait_for(cola.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"  # Mantener viva la conexión a través de proxies
+                    continue
+                yield _evento_sse("alerta", cambio)
+        finally:
+            alert_service.cancelar_suscripcion(cola)
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ==================== ENDPOINTS DE MOVIMIENTOS ====================
 
 
@@ -164,6 +283,16 @@ def ajustar_inventario(
     return inventory_service.ajustar_inventario(db, ajuste, current_user.id)
 
 
+@router.post("/ajuste/lote", response_model=AjusteInventarioLoteResponse)
+def ajustar_inventario_lote(
+    lote: AjusteInventarioLote,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Aplicar un lote de ajustes (p. ej. lecturas de escáner) en una sola transacción"""
+    return inventory_service.ajustar_inventario_lote(db, lote, current_user.id)
+
+
 @router.post("/transferencia")
 def transferir_entre_bodegas(
     transferencia: TransferenciaInventarioCreate,
@@ -200,15 +329,36 @@ def get_kardex(
     fecha_inicio: Optional[datetime] = Query(None),
     fecha_fin: Optional[datetime] = Query(None),
     bodega_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db_lectura),
     current_user: User = Depends(get_current_user),
 ):
     """Obtener el kardex (historial de movimientos) de un producto"""
     return inventory_service.get_kardex(
-        db, producto_id, fecha_inicio, fecha_fin, bodega_id
+        db, producto_id, fecha_inicio, fecha_fin, bodega_id, skip=skip, limit=limit
     )
 
 
+@router.get("/snapshots", response_model=List[SnapshotCorteResponse])
+def get_snapshots(
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Obtener los cortes de snapshot de stock generados"""
+    return snapshot_service.get_cortes(db, limit)
+
+
+@router.post("/snapshots/generar", response_model=List[datetime])
+def generar_snapshots(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(verify_admin),
+):
+    """Generar los cortes de snapshot pendientes (normalmente lo hace el mantenimiento periódico)"""
+    return snapshot_service.generar_snapshots(db)
+
+
 @router.get("/movimientos", response_model=List[MovimientoInventarioResponse])
 def get_movimientos(
     skip: int = 0,
@@ -218,33 +368,15 @@ def get_movimientos(
     tipo_movimiento: Optional[str] = Query(None),
     fecha_inicio: Optional[datetime] = Query(None),
     fecha_fin: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db),
+    campos: Optional[set] = Depends(sparse_fields(MovimientoInventarioResponse)),
+    db: Session = Depends(get_db_lectura),
     current_user: User = Depends(get_current_user),
 ):
-    """Obtener movimientos de inventario con filtros"""
-    query = db.query(models.MovimientoInventario)
-
-    if producto_id:
-        query = query.filter(models.MovimientoInventario.producto_id == producto_id)
-    if bodega_id:
-        query = query.filter(
-            (models.MovimientoInventario.bodega_origen_id == bodega_id)
-            | (models.MovimientoInventario.bodega_destino_id == bodega_id)
+    """Obtener movimientos de inventario con filtros (fields= para pedir solo algunos campos)"""
+    filtros = (producto_id, bodega_id, tipo_movimiento, fecha_inicio, fecha_fin)
+    if campos:
+        return json_rows_response(
+            inventory_service.get_movimientos_campos(db, campos, skip, limit, *filtros)
         )
-    if tipo_movimiento:
-        query = query.filter(
-            models.MovimientoInventario.tipo_movimiento == tipo_movimiento
-        )
-    if fecha_inicio:
-        query = query.filter(
-            models.MovimientoInventario.fecha_movimiento >= fecha_inicio
-        )
-    if fecha_fin:
-        query = query.filter(models.MovimientoInventario.fecha_movimiento <= fecha_fin)
-
-    return (
-        query.order_by(models.MovimientoInventario.fecha_movimiento.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    movimientos = inventory_service.get_movimientos(db, skip, limit, *filtros)
+    return json_list_response(MovimientoInventarioResponse, movimientos)
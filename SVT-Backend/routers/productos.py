@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
 from typing import List, Optional
 from sqlalchemy.orm import Session
 
 import models
 import schemas
 import database
-from services import producto_service
+from services import import_service, producto_service
 from utils.security import get_current_user
 from utils.role_verification import verify_admin_or_usuario
+from utils.etag import conditional_get
+from utils.fast_json import json_rows_response
+from utils.fieldsets import sparse_fields
 
 router = APIRouter()
 
@@ -35,9 +38,36 @@ def crear_producto(
     return producto_service.create_producto(db=db, producto=producto)
 
 
-@router.get("/", response_model=List[schemas.ProductoListResponse])
-def listar_productos(
+@router.post("/importar", response_model=schemas.ImportacionProductosResponse)
+def importar_productos(
+    archivo: UploadFile = File(...),
+    formato: Optional[str] = Query(None, description="csv o ndjson (por defecto según la extensión)"),
     db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(verify_admin_or_usuario),
+):
+    """
+    Importación masiva de productos desde CSV o NDJSON.
+
+    Cada fila lleva los campos de ProductoCreate. Las filas válidas se cargan en
+    una sola transacción junto con su stock inicial; las inválidas se reportan
+    con su número de fila.
+    """
+    if formato is None:
+        nombre = (archivo.filename or "").lower()
+        formato = "ndjson" if nombre.endswith((".ndjson", ".jsonl")) else "csv"
+
+    filas = import_service.leer_filas(archivo.file, formato.lower())
+    return import_service.importar_productos(db, filas, usuario_id=current_user.id)
+
+
+@router.get(
+    "/",
+    response_model=List[schemas.ProductoListResponse],
+    dependencies=[Depends(conditional_get("productos", "proveedores", "bodegas"))],
+)
+def listar_productos(
+    response: Response,
+    db: Session = Depends(database.get_db_lectura),
     current_user: models.User = Depends(get_current_user),
     skip: int = 0,
     limit: int = 100,
@@ -45,6 +75,7 @@ def listar_productos(
     nombre: Optional[str] = None,
     categoria_id: Optional[int] = None,
     proveedor_id: Optional[int] = None,
+    campos: Optional[set] = Depends(sparse_fields(schemas.ProductoListResponse)),
 ):
     productos = producto_service.get_productos(
         db,
@@ -54,8 +85,10 @@ def listar_productos(
         nombre=nombre,
         categoria_id=categoria_id,
         proveedor_id=proveedor_id,
+        campos=campos,
     )
-    return productos
+    # get_productos ya devuelve dicts con la forma de ProductoListResponse
+    return json_rows_response(productos, response)
 
 
 @router.get("/{producto_id}", response_model=schemas.ProductoDetailResponse)
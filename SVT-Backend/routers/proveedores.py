@@ -8,6 +8,7 @@ import database
 from services import proveedor_service
 from utils.security import get_current_user
 from utils.role_verification import verify_admin_or_usuario
+from utils.etag import conditional_get
 
 router = APIRouter()
 
@@ -33,7 +34,11 @@ def crear_proveedor(
     return proveedor_service.create_proveedor(db=db, proveedor=proveedor)
 
 
-@router.get("/", response_model=List[schemas.ProveedorResponse])
+@router.get(
+    "/",
+    response_model=List[schemas.ProveedorResponse],
+    dependencies=[Depends(conditional_get("proveedores"))],
+)
 def listar_proveedores(
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(get_current_user),
@@ -8,6 +8,7 @@ import schemas
 import database
 from services.user_service import UserService
 from utils.roles import require_permission, require_admin, Permission
+from utils.coalescing import single_flight
 from utils.security import get_current_user
 
 router = APIRouter()
@@ -207,6 +208,7 @@ def delete_user(
 
 # Obtener estadísticas de usuarios (solo para administradores)
 @router.get("/stats/overview", response_model=dict)
+@single_flight()
 def get_user_stats(
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(require_admin),
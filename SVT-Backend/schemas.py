@@ -33,6 +33,9 @@ class UserUpdate(BaseModel):
 
 class UserResponse(UserBase):
     id: int
+    # El email ya se validó al guardarlo; revalidarlo con email_validator en
+    # cada fila era la mayor parte del costo de serializar los listados
+    email: str = Field(json_schema_extra={"format": "email"})
     activo: bool
     fecha_creacion: datetime
     fecha_actualizacion: datetime
@@ -43,7 +46,7 @@ class UserResponse(UserBase):
 
 class UserListResponse(BaseModel):
     id: int
-    email: EmailStr
+    email: str = Field(json_schema_extra={"format": "email"})  # Ver UserResponse
     nombre: Optional[str] = None
     apellido: Optional[str] = None
     rol: UserRoleEnum
@@ -102,6 +105,7 @@ class ProveedorCreate(ProveedorBase):
 
 class ProveedorResponse(ProveedorBase):
     id: int
+    email: Optional[str] = Field(None, json_schema_extra={"format": "email"})  # Ver UserResponse
 
     class Config:
         from_attributes = True
@@ -264,6 +268,19 @@ class ProductoDetailResponse(ProductoResponse):
         from_attributes = True
 
 
+# Importación masiva de productos
+class ImportacionError(BaseModel):
+    fila: int
+    sku: Optional[str] = None
+    error: str
+
+
+class ImportacionProductosResponse(BaseModel):
+    total_filas: int
+    importados: int
+    errores: List[ImportacionError] = []
+
+
 # ====================== ESQUEMAS DE MOVIMIENTOS ======================
 class MovimientoInventarioBase(BaseModel):
     producto_id: int
@@ -287,6 +304,28 @@ class AjusteInventarioCreate(BaseModel):
     observaciones: Optional[str] = None
 
 
+class AjusteInventarioLote(BaseModel):
+    items: List[AjusteInventarioCreate] = Field(min_length=1)
+    todo_o_nada: bool = False  # Si hay un error, no aplicar ninguna línea
+
+
+class ResultadoAjusteLinea(BaseModel):
+    linea: int
+    producto_id: int
+    bodega_id: int
+    cantidad: int
+    aplicado: bool
+    movimiento_id: Optional[int] = None
+    stock_posterior: Optional[int] = None
+    error: Optional[str] = None
+
+
+class AjusteInventarioLoteResponse(BaseModel):
+    aplicados: int
+    rechazados: int
+    resultados: List[ResultadoAjusteLinea]
+
+
 class TransferenciaInventarioCreate(BaseModel):
     producto_id: int
     bodega_origen_id: int
@@ -332,10 +371,56 @@ class StockConsolidado(BaseModel):
     estado: str  # "NORMAL", "STOCK_BAJO", "SIN_STOCK"
 
 
+class StockHistoricoItem(BaseModel):
+    producto_id: int
+    sku: Optional[str] = None
+    producto_nombre: Optional[str] = None
+    bodega_id: int
+    bodega_nombre: Optional[str] = None
+    cantidad: int
+
+
+class StockHistoricoResponse(BaseModel):
+    fecha: datetime
+    corte_snapshot: Optional[datetime] = None  # Snapshot usado como base
+    total: int
+    items: List[StockHistoricoItem]
+
+
+class KardexMovimiento(MovimientoInventarioResponse):
+    saldo: Optional[int] = None  # Saldo en bodega(s) después del movimiento
+
+
 class KardexResponse(BaseModel):
     producto: ProductoResponse
-    movimientos: List[MovimientoInventarioResponse]
+    movimientos: List[KardexMovimiento]
     stock_actual: int
+    saldo_inicial: int = 0  # Saldo antes del movimiento más antiguo devuelto
+    hay_mas: bool = False  # Quedan movimientos más antiguos (paginar con skip)
+
+
+class SnapshotCorteResponse(BaseModel):
+    fecha_corte: datetime
+    intervalo: Optional[str] = None
+    filas: int
+    segundos: float
+    fecha_generacion: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class AlertaEstadoResponse(BaseModel):
+    producto_id: int
+    sku: str
+    nombre: str
+    estado: str  # "STOCK_BAJO" o "SIN_STOCK"
+    stock_actual: int
+    stock_minimo: int
+    fecha_cambio: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
 
 
 class AlertaStock(BaseModel):
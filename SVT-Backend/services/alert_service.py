@@ -0,0 +1,241 @@
+# services/alert_service.py
+"""
+Motor de alertas de stock bajo con detección incremental.
+
+Tras cada escritura que cambia stock, el servicio correspondiente llama a
+evaluar_productos con los IDs afectados: solo se recalcula el estado de esos
+productos y se guarda en alertas_stock_estado. Los cambios de estado se
+publican a los suscriptores en proceso (SSE) y, si el canal de invalidación
+está activo, al resto de workers por NOTIFY.
+"""
+
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from utils import invalidation_channel
+from utils.resource_versions import EPOCH
+
+NORMAL = "NORMAL"
+STOCK_BAJO = "STOCK_BAJO"
+SIN_STOCK = "SIN_STOCK"
+
+CANAL = f"{invalidation_channel.CHANNEL}_alertas" if invalidation_channel.CHANNEL else None
+# pg_notify admite payloads de hasta 8000 bytes
+_EVENTOS_POR_AVISO = 20
+_TAMANO_COLA = 1000
+
+_suscriptores: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+_lock = threading.Lock()
+
+
+def calcular_estado(stock_actual: int, stock_minimo: int) -> str:
+    """Estado de alerta de un producto (misma regla que /stock/alertas)"""
+    if stock_actual <= 0:
+        return SIN_STOCK
+    if stock_actual <= stock_minimo:
+        return STOCK_BAJO
+    return NORMAL
+
+
+def _evaluar(db: Session, producto_ids: List[int]) -> List[dict]:
+    productos = (
+        db.query(
+            models.Producto.id,
+            models.Producto.sku,
+            models.Producto.nombre,
+            models.Producto.stock_actual,
+            models.Producto.stock_minimo,
+        )
+        .filter(models.Producto.id.in_(producto_ids))
+        .all()
+    )
+    estados = {
+        estado.producto_id: estado
+        for estado in db.query(models.AlertaStockEstado).filter(
+            models.AlertaStockEstado.producto_id.in_(producto_ids)
+        )
+    }
+
+    ahora = datetime.now(timezone.utc)
+    cambios = []
+    for producto in productos:
+        stock_actual = producto.stock_actual or 0
+        stock_minimo = producto.stock_minimo or 0
+        nuevo = calcular_estado(stock_actual, stock_minimo)
+        registro = estados.get(producto.id)
+        anterior = registro.estado if registro else NORMAL
+
+        if registro is None:
+            if nuevo == NORMAL:
+                continue  # Sin fila equivale a NORMAL
+            registro = models.AlertaStockEstado(producto_id=producto.id)
+            db.add(registro)
+        elif (
+            registro.estado == nuevo
+            and registro.stock_actual == stock_actual
+            and registro.stock_minimo == stock_minimo
+        ):
+            continue
+
+        registro.estado = nuevo
+        registro.stock_actual = stock_actual
+        registro.stock_minimo = stock_minimo
+        if nuevo != anterior:
+            registro.fecha_cambio = ahora
+            cambios.append(
+                {
+                    "producto_id": producto.id,
+                    "sku": producto.sku,
+                    "nombre": producto.nombre,
+                    "estado": nuevo,
+                    "estado_anterior": anterior,
+                    "stock_actual": stock_actual,
+                    "stock_minimo": stock_minimo,
+                    "fecha_cambio": ahora.isoformat(),
+                }
+            )
+    if db.new or db.dirty:
+        db.commit()
+    return cambios
+
+
+def evaluar_productos(db: Session, producto_ids: Iterable[int]) -> List[dict]:
+    """Recalcular el estado de alerta de los productos indicados y publicar cambios.
+
+    Se llama después del commit de la escritura; un fallo aquí no afecta a la
+    operación principal.
+    """
+    ids = sorted({producto_id for producto_id in producto_ids if producto_id})
+    if not ids:
+        return []
+    for intento in range(2):
+        try:
+            cambios = _evaluar(db, ids)
+            break
+        except IntegrityError:
+            # Otra petición creó la fila del mismo producto a la vez
+            db.rollback()
+            if intento:
+                return []
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  Error evaluando alertas de stock: {e}")
+            return []
+
+    if cambios:
+        publicar(cambios)
+    return cambios
+
+
+def sincronizar_estados(db: Session, tamano_lote: int = 1000) -> int:
+    """Evaluar todos los productos (carga inicial de la tabla de estados), sin publicar"""
+    total = 0
+    ultimo_id = 0
+    while True:
+        ids = [
+            fila.id
+            for fila in db.query(models.Producto.id)
+            .filter(models.Producto.id > ultimo_id)
+            .order_by(models.Producto.id)
+            .limit(tamano_lote)
+        ]
+        if not ids:
+            return total
+        total += len(_evaluar(db, ids))
+        ultimo_id = ids[-1]
+
+
+def sincronizar_si_vacio():
+    """Poblar la tabla de estados en el primer arranque (o tras vaciarla)"""
+    db = SessionLocal()
+    try:
+        if db.query(models.AlertaStockEstado.producto_id).first() is None:
+            total = sincronizar_estados(db)
+            print(f"🔔 Estados de alerta inicializados: {total} productos en alerta")
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  No se pudieron inicializar los estados de alerta: {e}")
+    finally:
+        db.close()
+
+
+def get_alertas_activas(db: Session):
+    """Obtener los productos con alerta activa según la tabla de estados"""
+    return (
+        db.query(
+            models.AlertaStockEstado.producto_id,
+            models.Producto.sku,
+            models.Producto.nombre,
+            models.AlertaStockEstado.estado,
+            models.AlertaStockEstado.stock_actual,
+            models.AlertaStockEstado.stock_minimo,
+            models.AlertaStockEstado.fecha_cambio,
+        )
+        .join(models.Producto, models.Producto.id == models.AlertaStockEstado.producto_id)
+        .filter(models.AlertaStockEstado.estado != NORMAL)
+        .order_by(models.AlertaStockEstado.producto_id)
+        .all()
+    )
+
+
+# ==================== SUSCRIPTORES (SSE) ====================
+
+
+def _entregar(cola: asyncio.Queue, evento: dict):
+    if cola.full():
+        cola.get_nowait()  # Cliente lento: se descarta el evento más antiguo
+    cola.put_nowait(evento)
+
+
+def _despachar_local(cambios: List[dict]):
+    with _lock:
+        suscriptores = list(_suscriptores)
+    for loop, cola in suscriptores:
+        for cambio in cambios:
+            try:
+                loop.call_soon_threadsafe(_entregar, cola, cambio)
+            except RuntimeError:
+                pass  # Event loop cerrado
+
+
+def publicar(cambios: List[dict]):
+    """Enviar cambios de estado a los suscriptores locales y a los demás workers"""
+    _despachar_local(cambios)
+    if CANAL:
+        for inicio in range(0, len(cambios), _EVENTOS_POR_AVISO):
+            lote = cambios[inicio : inicio + _EVENTOS_POR_AVISO]
+            invalidation_channel.publish(
+                CANAL, json.dumps({"epoch": EPOCH, "cambios": lote})
+            )
+
+
+def _recibir_aviso(payload: str):
+    mensaje = json.loads(payload)
+    if mensaje.get("epoch") != EPOCH:
+        _despachar_local(mensaje.get("cambios", []))
+
+
+def suscribir(loop: Optional[asyncio.AbstractEventLoop] = None) -> asyncio.Queue:
+    """Registrar un suscriptor; devuelve la cola donde recibirá los cambios"""
+    cola = asyncio.Queue(maxsize=_TAMANO_COLA)
+    with _lock:
+        _suscriptores.add((loop or asyncio.get_running_loop(), cola))
+    return cola
+
+
+def cancelar_suscripcion(cola: asyncio.Queue):
+    with _lock:
+        for suscriptor in [s for s in _suscriptores if s[1] is cola]:
+            _suscriptores.discard(suscriptor)
+
+
+if CANAL:
+    invalidation_channel.add_handler(CANAL, _recibir_aviso)
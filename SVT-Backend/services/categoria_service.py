@@ -1,7 +1,20 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 import models
-from schemas import CategoriaCreate
+from schemas import CategoriaCreate, CategoriaResponse
+from services.reference_cache import reference_cache
+from utils.resource_versions import bump_version
+
+
+def _cargar_categorias(db: Session):
+    """Cargar todas las categorías para la caché de referencia"""
+    return [
+        CategoriaResponse.model_validate(categoria)
+        for categoria in db.query(models.Categoria).order_by(models.Categoria.nombre)
+    ]
+
+
+reference_cache.register("categorias", _cargar_categorias)
 
 
 def get_categoria(db: Session, categoria_id: int):
@@ -41,8 +54,8 @@ def create_categoria(db: Session, categoria: CategoriaCreate):
     """Crear una nueva categoría"""
     db_categoria = models.Categoria(**categoria.model_dump())
     db.add(db_categoria)
+    bump_version(db, "categorias")
     db.commit()
-    db.refresh(db_categoria)
     return db_categoria
 
 
@@ -54,8 +67,8 @@ def update_categoria(db: Session, categoria_id: int, categoria: CategoriaCreate)
     if db_categoria:
         for key, value in categoria.model_dump().items():
             setattr(db_categoria, key, value)
+        bump_version(db, "categorias")
         db.commit()
-        db.refresh(db_categoria)
         return db_categoria
     return None
 
@@ -67,14 +80,19 @@ def delete_categoria(db: Session, categoria_id: int):
     )
     if db_categoria:
         db.delete(db_categoria)
+        bump_version(db, "categorias")
         db.commit()
         return True
     return False
 
 
 def get_categorias_activas(db: Session):
-    """Obtener solo las categorías activas"""
-    return db.query(models.Categoria).filter(models.Categoria.activa).order_by(models.Categoria.nombre).all()
+    """Obtener solo las categorías activas (desde la caché de referencia)"""
+    return [
+        categoria
+        for categoria in reference_cache.get_all("categorias", db)
+        if categoria.activa
+    ]
 
 
 def count_productos_por_categoria(db: Session, categoria_id: int):
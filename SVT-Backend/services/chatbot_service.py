@@ -1,26 +1,46 @@
-import google.generativeai as genai
+import asyncio
 import os
+import threading
+from datetime import datetime
 from sqlalchemy.orm import Session
 
 from services.product_queries import (
-    get_products_query,
-    search_products_query,
-    get_low_stock_query,
-    get_low_stock_threshold_query,
-    get_inventory_stats_query,
-    get_top_categories_query,
-    get_top_products_query,
-    get_product_by_sku_query,
+    PRODUCTOS,
+    BUSCAR_PRODUCTOS,
+    STOCK_BAJO,
+    STOCK_BAJO_UMBRAL,
+    ESTADISTICAS_INVENTARIO,
+    TOP_CATEGORIAS,
+    TOP_PRODUCTOS,
+    PRODUCTO_POR_SKU,
 )
-from services.supplier_queries import get_supplier_analysis_query
+from services.supplier_queries import ANALISIS_PROVEEDORES
 from services.utils import format_currency
+from utils.coalescing import single_flight
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+MODELO_GEMINI = "gemini-1.5-flash"
+
+# El SDK de Gemini (grpc/protobuf) se importa en el primer uso del modelo, no al
+# arrancar: los endpoints de análisis y los workers sin chatbot no lo cargan
+_modelo = None
+_lock_modelo = threading.Lock()
+
+
+def get_modelo():
+    """Obtener el modelo de Gemini (importa y configura el SDK la primera vez)"""
+    global _modelo
+    if _modelo is None:
+        with _lock_modelo:
+            if _modelo is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _modelo = genai.GenerativeModel(MODELO_GEMINI)
+    return _modelo
 
 
 class InventoryAIAssistant:
     def __init__(self):
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
         self.system_prompt = """
             Eres un asistente inteligente especializado en el Sistema de Gestión de Inventarios SVT.
 
@@ -45,10 +65,13 @@ class InventoryAIAssistant:
             Tu propósito es mejorar la eficiencia operativa, apoyar la toma de decisiones y brindar soporte confiable a los usuarios del sistema.
             """
 
-    async def get_products_context(self, db: Session) -> str:
+    @property
+    def model(self):
+        return get_modelo()
+
+    def get_products_context(self, db: Session) -> str:
         try:
-            query = get_products_query()
-            result = db.execute(query).fetchall()
+            result = PRODUCTOS.filas(db)
             context = "Productos en inventario SVT:\n"
             for row in result:
                 context += f"- ID: {row.id}, SKU: {row.sku}, Nombre: {row.nombre}\n"
@@ -63,15 +86,13 @@ class InventoryAIAssistant:
         except Exception as e:
             return f"Error obteniendo productos: {str(e)}"
 
-    async def get_low_stock_analysis(self, db: Session, threshold: int = None) -> str:
+    def get_low_stock_analysis(self, db: Session, threshold: int = None) -> str:
         try:
             if threshold is None:
-                query = get_low_stock_query()
-                result = db.execute(query).fetchall()
+                result = STOCK_BAJO.filas(db)
                 title = "⚠️ Productos por debajo del stock mínimo:"
             else:
-                query = get_low_stock_threshold_query()
-                result = db.execute(query, {"threshold": threshold}).fetchall()
+                result = STOCK_BAJO_UMBRAL.filas(db, threshold=threshold)
                 title = f"⚠️ Productos con menos de {threshold} unidades:"
             if not result:
                 return "✅ No hay productos con stock bajo actualmente."
@@ -101,11 +122,11 @@ class InventoryAIAssistant:
         except Exception as e:
             return f"Error en análisis de stock bajo: {str(e)}"
 
-    async def get_inventory_stats(self, db: Session) -> str:
+    def get_inventory_stats(self, db: Session) -> str:
         try:
-            stats = db.execute(get_inventory_stats_query()).fetchone()
-            categories = db.execute(get_top_categories_query()).fetchall()
-            top_products = db.execute(get_top_products_query()).fetchall()
+            stats = ESTADISTICAS_INVENTARIO.primera(db)
+            categories = TOP_CATEGORIAS.filas(db)
+            top_products = TOP_PRODUCTOS.filas(db)
             analysis = f"""📊 **Estadísticas del Sistema SVT**
                 🔢 **Números Generales:**
                 • Total de productos: {stats.total_productos:,}
@@ -127,10 +148,9 @@ class InventoryAIAssistant:
         except Exception as e:
             return f"Error obteniendo estadísticas: {str(e)}"
 
-    async def search_products(self, db: Session, query: str) -> str:
+    def search_products(self, db: Session, query: str) -> str:
         try:
-            sql = search_products_query()
-            results = db.execute(sql, {"search": f"%{query}%"}).fetchall()
+            results = BUSCAR_PRODUCTOS.filas(db, search=f"%{query}%")
             if not results:
                 return f"❌ No se encontraron productos que coincidan con '{query}'"
             response = f"🔍 **Resultados de búsqueda para '{query}'** ({len(results)} productos):\n\n"
@@ -149,10 +169,9 @@ class InventoryAIAssistant:
         except Exception as e:
             return f"Error en búsqueda: {str(e)}"
 
-    async def get_supplier_analysis(self, db: Session) -> str:
+    def get_supplier_analysis(self, db: Session) -> str:
         try:
-            query = get_supplier_analysis_query()
-            results = db.execute(query).fetchall()
+            results = ANALISIS_PROVEEDORES.filas(db)
             if not results:
                 return "📦 No se encontraron proveedores en el sistema."
             analysis = "🏭 **Análisis de Proveedores SVT:**\n\n"
@@ -176,10 +195,9 @@ class InventoryAIAssistant:
         except Exception as e:
             return f"Error en análisis de proveedores: {str(e)}"
 
-    async def get_product_by_sku(self, db: Session, sku: str) -> str:
+    def get_product_by_sku(self, db: Session, sku: str) -> str:
         try:
-            query = get_product_by_sku_query()
-            result = db.execute(query, {"sku": sku}).fetchone()
+            result = PRODUCTO_POR_SKU.primera(db, sku=sku)
             if not result:
                 return f"❌ No se encontró producto con SKU: {sku}"
             stock_status = (
@@ -206,71 +224,77 @@ class InventoryAIAssistant:
         except Exception as e:
             return f"Error obteniendo producto: {str(e)}"
 
-    async def process_user_message(self, message: str, db: Session) -> str:
-        try:
-            message_lower = message.lower()
-            context_data = ""
-            if any(word in message_lower for word in ["sku", "código"]):
-                words = message.split()
-                sku = None
-                for word in words:
-                    if len(word) > 3 and any(char.isdigit() for char in word):
-                        sku = word.replace(",", "").replace(".", "")
+    def get_context_data(self, message: str, db: Session) -> str:
+        """Datos del sistema que se incluyen en el prompt según la pregunta"""
+        message_lower = message.lower()
+        context_data = ""
+        if any(word in message_lower for word in ["sku", "código"]):
+            words = message.split()
+            sku = None
+            for word in words:
+                if len(word) > 3 and any(char.isdigit() for char in word):
+                    sku = word.replace(",", "").replace(".", "")
+                    break
+            if sku:
+                context_data = self.get_product_by_sku(db, sku)
+            else:
+                context_data = "Por favor especifica el SKU del producto."
+        elif any(
+            word in message_lower
+            for word in ["buscar", "encuentra", "busca", "mostrar"]
+        ):
+            search_terms = []
+            words = message.split()
+            skip_next = False
+            for i, word in enumerate(words):
+                if skip_next:
+                    skip_next = False
+                    continue
+                if word.lower() in [
+                    "buscar",
+                    "busca",
+                    "encuentra",
+                    "mostrar",
+                    "productos",
+                    "de",
+                    "con",
+                ]:
+                    if i + 1 < len(words):
+                        search_terms.extend(words[i + 1 :])
                         break
-                if sku:
-                    context_data = await self.get_product_by_sku(db, sku)
-                else:
-                    context_data = "Por favor especifica el SKU del producto."
-            elif any(
-                word in message_lower
-                for word in ["buscar", "encuentra", "busca", "mostrar"]
-            ):
-                search_terms = []
-                words = message.split()
-                skip_next = False
-                for i, word in enumerate(words):
-                    if skip_next:
-                        skip_next = False
-                        continue
-                    if word.lower() in [
-                        "buscar",
-                        "busca",
-                        "encuentra",
-                        "mostrar",
-                        "productos",
-                        "de",
-                        "con",
-                    ]:
-                        if i + 1 < len(words):
-                            search_terms.extend(words[i + 1 :])
-                            break
-                search_term = " ".join(search_terms[:3]) if search_terms else ""
-                if search_term:
-                    context_data = await self.search_products(db, search_term)
-                else:
-                    context_data = await self.get_products_context(db)
-            elif any(
-                word in message_lower
-                for word in ["stock bajo", "bajo stock", "mínimo", "crítico", "restock"]
-            ):
-                context_data = await self.get_low_stock_analysis(db)
-            elif any(
-                word in message_lower
-                for word in ["estadísticas", "stats", "resumen", "reporte", "números"]
-            ):
-                context_data = await self.get_inventory_stats(db)
-            elif any(
-                word in message_lower
-                for word in ["proveedores", "suppliers", "proveedor", "fabricantes"]
-            ):
-                context_data = await self.get_supplier_analysis(db)
-            elif any(
-                word in message_lower
-                for word in ["productos", "inventario", "stock", "catálogo"]
-            ):
-                context_data = await self.get_products_context(db)
+            search_term = " ".join(search_terms[:3]) if search_terms else ""
+            if search_term:
+                context_data = self.search_products(db, search_term)
             else:
-                context_data = await self.get_inventory_stats(db)
+                context_data = self.get_products_context(db)
+        elif any(
+            word in message_lower
+            for word in ["stock bajo", "bajo stock", "mínimo", "crítico", "restock"]
+        ):
+            context_data = self.get_low_stock_analysis(db)
+        elif any(
+            word in message_lower
+            for word in ["estadísticas", "stats", "resumen", "reporte", "números"]
+        ):
+            context_data = self.get_inventory_stats(db)
+        elif any(
+            word in message_lower
+            for word in ["proveedores", "suppliers", "proveedor", "fabricantes"]
+        ):
+            context_data = self.get_supplier_analysis(db)
+        elif any(
+            word in message_lower
+            for word in ["productos", "inventario", "stock", "catálogo"]
+        ):
+            context_data = self.get_products_context(db)
+        else:
+            context_data = self.get_inventory_stats(db)
+        return context_data
+
+    async def process_user_message(self, message: str, db: Session) -> str:
+        try:
+            # Las consultas son síncronas: en un hilo para no bloquear el event loop
+            context_data = await asyncio.to_thread(self.get_context_data, message, db)
             full_prompt = f"""
             {self.system_prompt}
             **DATOS ACTUALES DEL SISTEMA SVT:**
@@ -287,12 +311,27 @@ class InventoryAIAssistant:
             - Para consultas de búsqueda, presenta los resultados de forma organizada
             - Incluye recomendaciones cuando sea apropiado
             """
-            response = await self.model.generate_content_async(full_prompt)
+            # La primera importación del SDK tarda: fuera del event loop
+            modelo = _modelo or await asyncio.to_thread(get_modelo)
+            response = await modelo.generate_content_async(full_prompt)
             return response.text
         except Exception as e:
             return f"❌ Lo siento, ocurrió un error procesando tu consulta: {str(e)}\n\nPor favor intenta reformular tu pregunta o contacta al administrador."
 
 
+@single_flight()
+def analisis_inventario(db: Session) -> dict:
+    """Estadísticas, stock bajo y proveedores; las peticiones simultáneas comparten una ejecución"""
+    assistant = InventoryAIAssistant()
+    return {
+        "general_stats": assistant.get_inventory_stats(db),
+        "low_stock_analysis": assistant.get_low_stock_analysis(db),
+        "supplier_analysis": assistant.get_supplier_analysis(db),
+        "generated_at": datetime.now(),
+        "system": "SVT Inventory Management",
+    }
+
+
 # Factory para FastAPI
 async def get_ai_assistant():
     return InventoryAIAssistant()
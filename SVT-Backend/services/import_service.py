@@ -0,0 +1,279 @@
+# services/import_service.py
+"""
+Importación masiva de productos desde CSV o NDJSON.
+
+El archivo se lee en streaming y se procesa por lotes de _LOTE filas: no se
+carga entero en memoria. Las referencias (proveedor, categoría, bodega) se
+validan contra conjuntos en memoria tomados de la caché de referencia y los SKU
+existentes se consultan una vez por lote. Todos los lotes se cargan en una sola
+transacción: con PostgreSQL se usa COPY para productos, stock inicial y
+movimientos INVENTARIO_INICIAL; con otros motores, INSERT de múltiples filas.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterable, Iterator, List, Union
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from database import copy_desde
+from schemas import ProductoCreate
+from services import alert_service
+from services.reference_cache import reference_cache
+from utils.resource_versions import bump_version
+
+_LOTE = 5000  # Filas validadas y cargadas por lote
+_MAX_ERRORES = 1000
+
+
+def leer_filas(archivo: BinaryIO, formato: str) -> Iterator[Union[dict, bytes]]:
+    """Leer el archivo subido línea a línea: diccionarios (CSV) o líneas sin decodificar (NDJSON)
+
+    Las líneas NDJSON se decodifican en importar_productos, fila por fila, para
+    que una línea inválida sea un error de esa fila y no de toda la carga.
+    """
+    if formato not in ("csv", "ndjson"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato no soportado: {formato}. Use 'csv' o 'ndjson'",
+        )
+    if formato == "csv":
+        return csv.DictReader(io.TextIOWrapper(archivo, encoding="utf-8-sig", newline=""))
+    return (linea for linea in archivo if linea.strip())
+
+
+def _como_dict(fila: Union[dict, bytes]) -> dict:
+    """Fila del CSV o línea NDJSON como diccionario (TypeError si no es un objeto)"""
+    if isinstance(fila, bytes):
+        fila = json.loads(fila.decode("utf-8-sig"))
+    if not isinstance(fila, dict):
+        raise TypeError("Se esperaba un objeto JSON")
+    return fila
+
+
+def _skus_existentes(db: Session, skus: List[str]) -> set:
+    """Consultar qué SKU del lote ya existen"""
+    return set(
+        db.execute(select(models.Producto.sku).where(models.Producto.sku.in_(skus))).scalars()
+    )
+
+
+def importar_productos(db: Session, filas: Iterable[Union[dict, bytes]], usuario_id: int):
+    """Validar e insertar productos en bloque; devuelve el resumen con errores por fila"""
+    # Versiones confirmadas: un ID creado en otro worker no debe rechazarse
+    proveedores = {p.id for p in reference_cache.get_all("proveedores", db, fresh=True)}
+    categorias = {c.id: c.nombre for c in reference_cache.get_all("categorias", db, fresh=True)}
+    bodegas = {b.id for b in reference_cache.get_all("bodegas", db, fresh=True)}
+
+    cargar = _cargar_con_copy if db.get_bind().dialect.name == "postgresql" else _cargar_con_insert
+
+    errores = []
+    lote = []
+    vistos = set()
+    en_alerta = []  # Solo pueden nacer en alerta los que empiezan con stock <= mínimo
+    total = 0
+    importados = 0
+
+    def registrar_error(fila: int, sku, mensaje: str):
+        if len(errores) < _MAX_ERRORES:
+            errores.append({"fila": fila, "sku": sku, "error": mensaje})
+
+    def cargar_lote():
+        existentes = _skus_existentes(db, [producto.sku for _, producto in lote])
+        for numero, producto in lote:
+            if producto.sku in existentes:
+                registrar_error(
+                    numero, producto.sku, f"Ya existe un producto con el SKU {producto.sku}"
+                )
+        productos = [producto for _, producto in lote if producto.sku not in existentes]
+        if not productos:
+            return 0
+        ids = cargar(db, productos, categorias, usuario_id)
+        en_alerta.extend(ids[p.sku] for p in productos if p.stock_inicial <= p.stock_minimo)
+        return len(productos)
+
+    try:
+        # Filas numeradas desde 1 (sin contar el encabezado del CSV)
+        for numero, fila in enumerate(filas, start=1):
+            total += 1
+            try:
+                fila = _como_dict(fila)
+                producto = ProductoCreate.model_validate(fila)
+            except UnicodeDecodeError:
+                registrar_error(numero, None, "La línea no está codificada en UTF-8")
+                continue
+            except json.JSONDecodeError as e:
+                registrar_error(numero, None, f"JSON inválido: {e.msg} (columna {e.colno})")
+                continue
+            except TypeError:
+                registrar_error(numero, None, "La línea debe ser un objeto JSON")
+                continue
+            except ValidationError as e:
+                detalle = "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                )
+                registrar_error(numero, fila.get("sku"), detalle)
+                continue
+
+            if producto.sku in vistos:
+                registrar_error(numero, producto.sku, "SKU duplicado dentro del archivo")
+            elif producto.proveedor_id not in proveedores:
+                registrar_error(
+                    numero, producto.sku, f"Proveedor con ID {producto.proveedor_id} no encontrado"
+                )
+            elif producto.categoria_id not in categorias:
+                registrar_error(
+                    numero, producto.sku, f"Categoría con ID {producto.categoria_id} no encontrada"
+                )
+            elif producto.bodega_id not in bodegas:
+                registrar_error(
+                    numero, producto.sku, f"Bodega con ID {producto.bodega_id} no encontrada"
+                )
+            else:
+                vistos.add(producto.sku)
+                lote.append((numero, producto))
+                if len(lote) >= _LOTE:
+                    importados += cargar_lote()
+                    lote = []
+
+        if lote:
+            importados += cargar_lote()
+        if importados:
+            bump_version(db, "productos")
+            db.commit()
+    except (IntegrityError, db.get_bind().dialect.dbapi.IntegrityError):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Conflicto de integridad durante la importación (¿SKU creado en paralelo?). No se importó ninguna fila.",
+        )
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Un CSV ilegible no permite seguir en la fila siguiente (y se decodifica
+        # por bloques: el número de fila no sería exacto)
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El CSV no se puede leer (¿no está en UTF-8?): {e}. No se importó ninguna fila.",
+        )
+
+    if importados:
+        alert_service.evaluar_productos(db, en_alerta)
+
+    errores.sort(key=lambda error: error["fila"])
+    return {
+        "total_filas": total,
+        "importados": importados,
+        "errores": errores,
+    }
+
+
+def _valores_producto(producto: ProductoCreate, categorias: dict, ahora: datetime):
+    return {
+        "sku": producto.sku,
+        "nombre": producto.nombre,
+        "descripcion": producto.descripcion,
+        "categoria_id": producto.categoria_id,
+        "categoria_nombre": categorias[producto.categoria_id],
+        "precio_unitario": producto.precio_unitario,
+        "proveedor_id": producto.proveedor_id,
+        "stock_actual": producto.stock_inicial,
+        "stock_minimo": producto.stock_minimo,
+        "fecha_creacion": ahora,
+        "fecha_actualizacion": ahora,
+    }
+
+
+def _valores_stock(producto: ProductoCreate, producto_id: int):
+    return {
+        "producto_id": producto_id,
+        "bodega_id": producto.bodega_id,
+        "cantidad": producto.stock_inicial,
+        "ubicacion": "A1",
+    }
+
+
+def _valores_movimiento(
+    producto: ProductoCreate, producto_id: int, usuario_id: int, ahora: datetime
+):
+    return {
+        "producto_id": producto_id,
+        "tipo_movimiento": models.TipoMovimiento.INVENTARIO_INICIAL.value,
+        "cantidad": producto.stock_inicial,
+        "motivo": models.MotivoMovimiento.AJUSTE_STOCK.value,
+        "observaciones": "Stock inicial por importación masiva",
+        "usuario_id": usuario_id,
+        "fecha_movimiento": ahora,
+        "stock_anterior": 0,
+        "stock_posterior": producto.stock_inicial,
+        "bodega_destino_id": producto.bodega_id,
+    }
+
+
+def _cargar_con_insert(db: Session, productos, categorias: dict, usuario_id: int):
+    """Carga con INSERT de múltiples filas (insertmanyvalues de SQLAlchemy)"""
+    ahora = datetime.now(timezone.utc)
+    ids = {
+        fila.sku: fila.id
+        for fila in db.execute(
+            insert(models.Producto).returning(models.Producto.id, models.Producto.sku),
+            [_valores_producto(p, categorias, ahora) for p in productos],
+        )
+    }
+    db.execute(
+        insert(models.StockBodega), [_valores_stock(p, ids[p.sku]) for p in productos]
+    )
+    db.execute(
+        insert(models.MovimientoInventario),
+        [_valores_movimiento(p, ids[p.sku], usuario_id, ahora) for p in productos],
+    )
+    return ids
+
+
+def _copiar(cursor, tabla: str, columnas: list, filas: Iterable[dict]):
+    """COPY ... FROM STDIN en formato CSV (cadena vacía sin comillas = NULL)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for fila in filas:
+        escritor.writerow(["" if fila[c] is None else fila[c] for c in columnas])
+    buffer.seek(0)
+    copy_desde(
+        cursor, f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)", buffer
+    )
+
+
+def _cargar_con_copy(db: Session, productos, categorias: dict, usuario_id: int):
+    """Carga con COPY dentro de la transacción de la sesión"""
+    ahora = datetime.now(timezone.utc)
+    cursor = db.connection().connection.driver_connection.cursor()
+    try:
+        valores = [_valores_producto(p, categorias, ahora) for p in productos]
+        _copiar(cursor, models.Producto.__tablename__, list(valores[0]), valores)
+
+        cursor.execute(
+            f"SELECT id, sku FROM {models.Producto.__tablename__} WHERE sku = ANY(%s)",
+            ([p.sku for p in productos],),
+        )
+        ids = {sku: id for id, sku in cursor.fetchall()}
+
+        stocks = [_valores_stock(p, ids[p.sku]) for p in productos]
+        _copiar(cursor, models.StockBodega.__tablename__, list(stocks[0]), stocks)
+
+        movimientos = [
+            _valores_movimiento(p, ids[p.sku], usuario_id, ahora) for p in productos
+        ]
+        _copiar(
+            cursor,
+            models.MovimientoInventario.__tablename__,
+            list(movimientos[0]),
+            movimientos,
+        )
+    finally:
+        cursor.close()
+    return ids
@@ -1,31 +1,58 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_, bindparam, case, func, insert, literal, select, tuple_, update
 from fastapi import HTTPException, status
 from datetime import datetime, timezone
-from typing import Optional
+from typing import List, Optional, Set
 import models
+from database import pipeline
 from schemas import (
     BodegaCreate,
     BodegaUpdate,
+    BodegaResponse,
     AjusteInventarioCreate,
+    AjusteInventarioLote,
     TransferenciaInventarioCreate,
     InventarioFisicoCreate,
     MovimientoInventarioCreate,
     TipoMovimientoEnum,
     MotivoMovimientoEnum,
+    ProductoResponse,
 )
+from services import alert_service
+from services.partition_service import to_utc_naive
+from services.reference_cache import reference_cache
+from services.snapshot_service import (
+    delta_columna,
+    delta_movimiento,
+    stock_a_fecha,
+    stock_historico,
+)
+from utils.coalescing import single_flight
+from utils.resource_versions import bump_version
 
 # ==================== FUNCIONES DE BODEGA ====================
 
 
+def _cargar_bodegas(db: Session):
+    """Cargar todas las bodegas para la caché de referencia"""
+    return [
+        BodegaResponse.model_validate(bodega)
+        for bodega in db.query(models.Bodega).order_by(models.Bodega.id)
+    ]
+
+
+reference_cache.register("bodegas", _cargar_bodegas)
+
+
 def get_bodegas(
     db: Session, skip: int = 0, limit: int = 100, solo_activas: bool = True
 ):
-    """Obtener todas las bodegas"""
-    query = db.query(models.Bodega)
+    """Obtener todas las bodegas (desde la caché de referencia)"""
+    bodegas = reference_cache.get_all("bodegas", db)
     if solo_activas:
-        query = query.filter(models.Bodega.activa)
-    return query.offset(skip).limit(limit).all()
+        bodegas = [bodega for bodega in bodegas if bodega.activa]
+    return bodegas[skip : skip + limit]
 
 
 def get_bodega(db: Session, bodega_id: int):
@@ -43,8 +70,8 @@ def create_bodega(db: Session, bodega: BodegaCreate):
 
     db_bodega = models.Bodega(**bodega.dict())
     db.add(db_bodega)
+    bump_version(db, "bodegas")
     db.commit()
-    db.refresh(db_bodega)
     return db_bodega
 
 
@@ -61,8 +88,8 @@ def update_bodega(db: Session, bodega_id: int, bodega_update: BodegaUpdate):
     for key, value in update_data.items():
         setattr(db_bodega, key, value)
 
+    bump_version(db, "bodegas")
     db.commit()
-    db.refresh(db_bodega)
     return db_bodega
 
 
@@ -88,6 +115,7 @@ def delete_bodega(db: Session, bodega_id: int):
 
     # Soft delete - marcar como inactiva
     db_bodega.activa = False
+    bump_version(db, "bodegas")
     db.commit()
 
     return {"message": f"Bodega {db_bodega.nombre} eliminada exitosamente"}
@@ -123,62 +151,176 @@ def get_stock_bodega(db: Session, bodega_id: int):
     )
 
 
-def get_stock_consolidado(db: Session, producto_id: int):
-    """Obtener el stock consolidado de un producto en todas las bodegas"""
-    # Primero, actualizar el stock total del producto
-    stock_total_real = actualizar_stock_total_producto(db, producto_id)
+def get_stock_historico(
+    db: Session,
+    fecha: datetime,
+    producto_id: Optional[int] = None,
+    bodega_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 1000,
+):
+    """Obtener el stock por producto y bodega en una fecha pasada"""
+    corte, saldos = stock_historico(db, fecha, producto_id, bodega_id)
+    claves = sorted(saldos)
+    pagina = claves[skip : skip + limit]
+
+    productos = {}
+    if pagina:
+        productos = {
+            fila.id: fila
+            for fila in db.query(
+                models.Producto.id, models.Producto.sku, models.Producto.nombre
+            ).filter(models.Producto.id.in_({producto for producto, _ in pagina}))
+        }
+    bodegas = {bodega.id: bodega for bodega in reference_cache.get_all("bodegas", db)}
+
+    items = []
+    for producto, bodega in pagina:
+        items.append(
+            {
+                "producto_id": producto,
+                "sku": productos[producto].sku if producto in productos else None,
+                "producto_nombre": (
+                    productos[producto].nombre if producto in productos else None
+                ),
+                "bodega_id": bodega,
+                "bodega_nombre": bodegas[bodega].nombre if bodega in bodegas else None,
+                "cantidad": saldos[(producto, bodega)],
+            }
+        )
 
-    # Obtener el producto actualizado
-    producto = (
-        db.query(models.Producto).filter(models.Producto.id == producto_id).first()
+    return {
+        "fecha": fecha,
+        "corte_snapshot": corte,
+        "total": len(claves),
+        "items": items,
+    }
+
+
+_COLUMNAS_PRODUCTO_CONSOLIDADO = (
+    models.Producto.id,
+    models.Producto.sku,
+    models.Producto.nombre,
+    models.Producto.descripcion,
+    models.Producto.categoria_id,
+    models.Producto.precio_unitario,
+    models.Producto.proveedor_id,
+    models.Producto.stock_minimo,
+    models.Producto.stock_actual,
+    models.Producto.fecha_creacion,
+    models.Producto.fecha_actualizacion,
+)
+
+
+def get_stock_consolidado_lectura(db: Session, producto_id: int):
+    """Obtener el stock consolidado de un producto sin escrituras.
+
+    Una sola sentencia: el producto unido a su stock por bodega, con el total
+    (SUM ... OVER ()) y el estado calculados en la base de datos.
+    """
+    total = func.coalesce(func.sum(models.StockBodega.cantidad).over(), 0)
+    consulta = (
+        select(
+            *_COLUMNAS_PRODUCTO_CONSOLIDADO,
+            models.StockBodega.id.label("stock_id"),
+            models.StockBodega.bodega_id,
+            models.StockBodega.cantidad,
+            models.StockBodega.ubicacion,
+            models.Bodega.nombre.label("bodega_nombre"),
+            models.Bodega.codigo.label("bodega_codigo"),
+            models.Bodega.direccion.label("bodega_direccion"),
+            models.Bodega.encargado.label("bodega_encargado"),
+            models.Bodega.telefono.label("bodega_telefono"),
+            models.Bodega.activa.label("bodega_activa"),
+            models.Bodega.fecha_creacion.label("bodega_fecha_creacion"),
+            total.label("stock_total"),
+            case(
+                (total == 0, literal("SIN_STOCK")),
+                (total <= models.Producto.stock_minimo, literal("STOCK_BAJO")),
+                else_=literal("NORMAL"),
+            ).label("estado"),
+        )
+        .select_from(models.Producto)
+        .outerjoin(
+            models.StockBodega, models.StockBodega.producto_id == models.Producto.id
+        )
+        .outerjoin(models.Bodega, models.Bodega.id == models.StockBodega.bodega_id)
+        .where(models.Producto.id == producto_id)
+        .order_by(models.StockBodega.id)
     )
+    filas = db.execute(consulta).all()
 
-    if not producto:
+    if not filas:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Producto con ID {producto_id} no encontrado",
         )
 
-    # Obtener stocks por bodega
-    stocks = (
-        db.query(models.StockBodega)
-        .filter(models.StockBodega.producto_id == producto_id)
-        .options(
-            joinedload(models.StockBodega.producto),
-            joinedload(models.StockBodega.bodega),
-        )
-        .all()
-    )
-
-    # Determinar el estado del stock
-    if stock_total_real == 0:
-        estado = "SIN_STOCK"
-    elif stock_total_real <= producto.stock_minimo:
-        estado = "STOCK_BAJO"
-    else:
-        estado = "NORMAL"
-
-    # Commit para guardar la actualización del stock_actual
-    db.commit()
+    primera = filas[0]
+    producto = {
+        columna.key: getattr(primera, columna.key)
+        for columna in _COLUMNAS_PRODUCTO_CONSOLIDADO
+    }
+    stocks = [
+        {
+            "id": fila.stock_id,
+            "producto_id": producto_id,
+            "bodega_id": fila.bodega_id,
+            "cantidad": fila.cantidad,
+            "ubicacion": fila.ubicacion,
+            "producto": producto,
+            "bodega": {
+                "id": fila.bodega_id,
+                "nombre": fila.bodega_nombre,
+                "codigo": fila.bodega_codigo,
+                "direccion": fila.bodega_direccion,
+                "encargado": fila.bodega_encargado,
+                "telefono": fila.bodega_telefono,
+                "activa": fila.bodega_activa,
+                "fecha_creacion": fila.bodega_fecha_creacion,
+            },
+        }
+        for fila in filas
+        if fila.stock_id is not None
+    ]
 
     return {
         "producto": producto,
-        "stock_total": stock_total_real,
+        "stock_total": primera.stock_total,
         "stock_por_bodega": stocks,
-        "estado": estado,
+        "estado": primera.estado,
     }
 
 
-def get_productos_stock_bajo(db: Session):
-    """Obtener productos con stock bajo o sin stock"""
-    # Primero actualizar todos los stocks
-    productos = db.query(models.Producto).all()
-    for producto in productos:
-        actualizar_stock_total_producto(db, producto.id)
-
+def recalcular_stock_total(db: Session) -> List[int]:
+    """Igualar stock_actual a la suma de las bodegas en un solo UPDATE; devuelve los productos corregidos"""
+    total = (
+        select(func.coalesce(func.sum(models.StockBodega.cantidad), 0))
+        .where(models.StockBodega.producto_id == models.Producto.id)
+        .scalar_subquery()
+    )
+    cambiados = (
+        db.execute(
+            update(models.Producto)
+            .where(models.Producto.stock_actual.is_distinct_from(total))
+            .values(stock_actual=total, fecha_actualizacion=datetime.now(timezone.utc))
+            .returning(models.Producto.id)
+            .execution_options(synchronize_session=False)
+        )
+        .scalars()
+        .all()
+    )
+    if cambiados:
+        bump_version(db, "productos")
     db.commit()
+    if cambiados:
+        alert_service.evaluar_productos(db, cambiados)
+    return cambiados
+
 
-    # Ahora obtener productos con stock bajo
+@single_flight()
+def get_productos_stock_bajo(db: Session):
+    """Obtener productos con stock bajo o sin stock (solo lectura; las peticiones simultáneas comparten la consulta)"""
     productos_alerta = (
         db.query(models.Producto)
         .filter(models.Producto.stock_actual <= models.Producto.stock_minimo)
@@ -194,7 +336,8 @@ def get_productos_stock_bajo(db: Session):
         )
         alertas.append(
             {
-                "producto": producto,
+                # Modelo ya serializable: el resultado se comparte entre peticiones
+                "producto": ProductoResponse.model_validate(producto),
                 "stock_actual": producto.stock_actual,
                 "stock_minimo": producto.stock_minimo,
                 "porcentaje_alerta": porcentaje,
@@ -206,6 +349,27 @@ def get_productos_stock_bajo(db: Session):
 
 # ==================== FUNCIONES DE MOVIMIENTOS ====================
 
+# Relaciones que serializa MovimientoInventarioResponse (en la misma consulta)
+_CARGA_MOVIMIENTO_RESPUESTA = (
+    joinedload(models.MovimientoInventario.producto),
+    joinedload(models.MovimientoInventario.usuario),
+    joinedload(models.MovimientoInventario.bodega_origen),
+    joinedload(models.MovimientoInventario.bodega_destino),
+)
+
+
+def _get_bodega_movimiento(db: Session, bodega_id: Optional[int]):
+    """Bodega de un movimiento (None si no aplica); 404 si no existe"""
+    if bodega_id is None:
+        return None
+    bodega = db.get(models.Bodega, bodega_id)
+    if not bodega:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bodega con ID {bodega_id} no encontrada",
+        )
+    return bodega
+
 
 def create_movimiento(
     db: Session, movimiento: MovimientoInventarioCreate, usuario_id: int
@@ -223,9 +387,19 @@ def create_movimiento(
             detail=f"Producto con ID {movimiento.producto_id} no encontrado",
         )
 
-    # Crear el movimiento
+    bodega_origen = _get_bodega_movimiento(db, movimiento.bodega_origen_id)
+    bodega_destino = _get_bodega_movimiento(db, movimiento.bodega_destino_id)
+
+    # Crear el movimiento con sus relaciones ya asignadas (la respuesta las
+    # serializa sin cargas perezosas; el usuario autenticado está en la sesión)
     db_movimiento = models.MovimientoInventario(
-        **movimiento.dict(), usuario_id=usuario_id, stock_anterior=producto.stock_actual
+        **movimiento.dict(),
+        usuario_id=usuario_id,
+        stock_anterior=producto.stock_actual,
+        producto=producto,
+        usuario=db.get(models.User, usuario_id),
+        bodega_origen=bodega_origen,
+        bodega_destino=bodega_destino,
     )
 
     # Actualizar stock según el tipo de movimiento
@@ -248,8 +422,9 @@ def create_movimiento(
     db_movimiento.stock_posterior = producto.stock_actual
 
     db.add(db_movimiento)
+    bump_version(db, "productos")
     db.commit()
-    db.refresh(db_movimiento)
+    alert_service.evaluar_productos(db, [movimiento.producto_id])
     return db_movimiento
 
 
@@ -346,6 +521,14 @@ def ajustar_inventario(db: Session, ajuste: AjusteInventarioCreate, usuario_id:
         usuario_id=usuario_id,
         stock_anterior=stock_anterior_bodega,
         stock_posterior=stock_bodega.cantidad,
+        producto=producto,
+        usuario=db.get(models.User, usuario_id),
+        bodega_origen=(
+            bodega if tipo_movimiento == models.TipoMovimiento.AJUSTE_NEGATIVO else None
+        ),
+        bodega_destino=(
+            bodega if tipo_movimiento == models.TipoMovimiento.AJUSTE_POSITIVO else None
+        ),
     )
 
     db.add(db_movimiento)
@@ -353,8 +536,9 @@ def ajustar_inventario(db: Session, ajuste: AjusteInventarioCreate, usuario_id:
     # Actualizar stock total del producto
     actualizar_stock_total_producto(db, ajuste.producto_id)
 
+    bump_version(db, "productos")
     db.commit()
-    db.refresh(db_movimiento)
+    alert_service.evaluar_productos(db, [ajuste.producto_id])
 
     # Log para debugging
     print("Ajuste completado:")
@@ -372,6 +556,145 @@ def ajustar_inventario(db: Session, ajuste: AjusteInventarioCreate, usuario_id:
     return db_movimiento
 
 
+def ajustar_inventario_lote(db: Session, lote: AjusteInventarioLote, usuario_id: int):
+    """Aplicar varios ajustes de inventario en una sola transacción
+
+    Las líneas se agrupan por (producto, bodega) y la suficiencia de stock se
+    valida sobre el neto de cada grupo. Dentro de un grupo se registran primero
+    las entradas y luego las salidas, un movimiento por línea.
+    """
+    grupos = {}
+    for linea, item in enumerate(lote.items):
+        grupos.setdefault((item.producto_id, item.bodega_id), []).append(linea)
+
+    producto_ids = {producto_id for producto_id, _ in grupos}
+    productos = {
+        p.id: p
+        for p in db.query(models.Producto).filter(models.Producto.id.in_(producto_ids))
+    }
+    bodegas = {b.id for b in reference_cache.get_all("bodegas", db)}
+    stocks = {
+        (s.producto_id, s.bodega_id): s
+        for s in db.query(models.StockBodega)
+        .filter(
+            tuple_(models.StockBodega.producto_id, models.StockBodega.bodega_id).in_(
+                list(grupos)
+            )
+        )
+        .order_by(models.StockBodega.id)
+        .with_for_update()
+    }
+
+    resultados = [
+        {
+            "linea": linea,
+            "producto_id": item.producto_id,
+            "bodega_id": item.bodega_id,
+            "cantidad": item.cantidad,
+            "aplicado": False,
+        }
+        for linea, item in enumerate(lote.items)
+    ]
+
+    # Validación agregada por grupo
+    grupos_validos = {}
+    for (producto_id, bodega_id), lineas in grupos.items():
+        error = None
+        if producto_id not in productos:
+            error = f"Producto con ID {producto_id} no encontrado"
+        elif bodega_id not in bodegas:
+            error = f"Bodega con ID {bodega_id} no encontrada"
+        else:
+            stock = stocks.get((producto_id, bodega_id))
+            disponible = stock.cantidad if stock else 0
+            neto = sum(lote.items[linea].cantidad for linea in lineas)
+            if disponible + neto < 0:
+                error = f"Stock insuficiente en bodega. Stock actual: {disponible}, cambio neto del lote: {neto}"
+
+        if error:
+            for linea in lineas:
+                resultados[linea]["error"] = error
+        else:
+            grupos_validos[(producto_id, bodega_id)] = lineas
+
+    hay_errores = len(grupos_validos) < len(grupos)
+    if not grupos_validos or (lote.todo_o_nada and hay_errores):
+        db.rollback()
+        return _resumen_lote(resultados)
+
+    movimientos = []
+    for (producto_id, bodega_id), lineas in grupos_validos.items():
+        stock = stocks.get((producto_id, bodega_id))
+        if not stock:
+            stock = models.StockBodega(
+                producto_id=producto_id, bodega_id=bodega_id, cantidad=0, ubicacion="A1"
+            )
+            db.add(stock)
+
+        for linea in sorted(lineas, key=lambda l: lote.items[l].cantidad < 0):
+            item = lote.items[linea]
+            positivo = item.cantidad >= 0
+            stock_anterior = stock.cantidad
+            stock.cantidad += item.cantidad
+
+            movimiento = models.MovimientoInventario(
+                producto_id=producto_id,
+                tipo_movimiento=(
+                    models.TipoMovimiento.AJUSTE_POSITIVO
+                    if positivo
+                    else models.TipoMovimiento.AJUSTE_NEGATIVO
+                ),
+                cantidad=abs(item.cantidad),
+                bodega_origen_id=None if positivo else bodega_id,
+                bodega_destino_id=bodega_id if positivo else None,
+                motivo=item.motivo,
+                observaciones=item.observaciones,
+                usuario_id=usuario_id,
+                stock_anterior=stock_anterior,
+                stock_posterior=stock.cantidad,
+            )
+            movimientos.append((linea, movimiento))
+
+    db.add_all([movimiento for _, movimiento in movimientos])
+    db.flush()
+
+    # Recalcular el stock total de los productos afectados en una sola consulta
+    afectados = {producto_id for producto_id, _ in grupos_validos}
+    totales = dict(
+        db.query(models.StockBodega.producto_id, func.sum(models.StockBodega.cantidad))
+        .filter(models.StockBodega.producto_id.in_(afectados))
+        .group_by(models.StockBodega.producto_id)
+    )
+    ahora = datetime.now(timezone.utc)
+    for producto_id in afectados:
+        producto = productos[producto_id]
+        total = totales.get(producto_id) or 0
+        if producto.stock_actual != total:
+            producto.stock_actual = total
+            producto.fecha_actualizacion = ahora
+
+    bump_version(db, "productos")
+    db.commit()
+    alert_service.evaluar_productos(db, afectados)
+
+    for linea, movimiento in movimientos:
+        resultados[linea].update(
+            aplicado=True,
+            movimiento_id=movimiento.id,
+            stock_posterior=movimiento.stock_posterior,
+        )
+    return _resumen_lote(resultados)
+
+
+def _resumen_lote(resultados: list):
+    aplicados = sum(1 for r in resultados if r["aplicado"])
+    return {
+        "aplicados": aplicados,
+        "rechazados": len(resultados) - aplicados,
+        "resultados": resultados,
+    }
+
+
 def transferir_entre_bodegas(
     db: Session, transferencia: TransferenciaInventarioCreate, usuario_id: int
 ):
@@ -450,6 +773,14 @@ def transferir_entre_bodegas(
         )
         db.add(stock_destino)
 
+    # Relaciones de ambos movimientos, ya cargadas
+    relaciones = {
+        "producto": producto,
+        "usuario": db.get(models.User, usuario_id),
+        "bodega_origen": bodega_origen,
+        "bodega_destino": bodega_destino,
+    }
+
     # Crear movimiento de salida
     movimiento_salida = models.MovimientoInventario(
         producto_id=transferencia.producto_id,
@@ -462,6 +793,7 @@ def transferir_entre_bodegas(
         usuario_id=usuario_id,
         stock_anterior=stock_origen.cantidad,
         stock_posterior=stock_origen.cantidad - transferencia.cantidad,
+        **relaciones,
     )
 
     # Crear movimiento de entrada
@@ -476,6 +808,7 @@ def transferir_entre_bodegas(
         usuario_id=usuario_id,
         stock_anterior=stock_destino.cantidad,
         stock_posterior=stock_destino.cantidad + transferencia.cantidad,
+        **relaciones,
     )
 
     # Actualizar stocks
@@ -483,11 +816,13 @@ def transferir_entre_bodegas(
     stock_destino.cantidad += transferencia.cantidad
 
     db.add_all([movimiento_salida, movimiento_entrada])
-    db.commit()
 
+    # Mismo commit que los movimientos: la versión no se incrementa a medias
     actualizar_stock_total_producto(db, transferencia.producto_id)
 
+    bump_version(db, "productos")
     db.commit()
+    alert_service.evaluar_productos(db, [transferencia.producto_id])
 
     return {
         "movimiento_salida": movimiento_salida,
@@ -501,36 +836,15 @@ def get_kardex(
     fecha_inicio: Optional[datetime] = None,
     fecha_fin: Optional[datetime] = None,
     bodega_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 500,
 ):
-    """Obtener el kardex (historial de movimientos) de un producto"""
-    query = (
-        db.query(models.MovimientoInventario)
-        .filter(models.MovimientoInventario.producto_id == producto_id)
-        .options(
-            joinedload(models.MovimientoInventario.producto),
-            joinedload(models.MovimientoInventario.usuario),
-            joinedload(models.MovimientoInventario.bodega_origen),
-            joinedload(models.MovimientoInventario.bodega_destino),
-        )
-    )
+    """Obtener el kardex (historial de movimientos) de un producto
 
-    if fecha_inicio:
-        query = query.filter(
-            models.MovimientoInventario.fecha_movimiento >= fecha_inicio
-        )
-    if fecha_fin:
-        query = query.filter(models.MovimientoInventario.fecha_movimiento <= fecha_fin)
-    if bodega_id:
-        query = query.filter(
-            (models.MovimientoInventario.bodega_origen_id == bodega_id)
-            | (models.MovimientoInventario.bodega_destino_id == bodega_id)
-        )
-
-    movimientos = query.order_by(
-        models.MovimientoInventario.fecha_movimiento.desc()
-    ).all()
-
-    # Obtener producto
+    Devuelve como máximo `limit` movimientos, del más reciente al más antiguo
+    (`skip` para las páginas siguientes; hay_mas indica si quedan). Sin
+    fecha_inicio abarca todo el historial.
+    """
     producto = (
         db.query(models.Producto).filter(models.Producto.id == producto_id).first()
     )
@@ -540,53 +854,385 @@ def get_kardex(
             detail=f"Producto con ID {producto_id} no encontrado",
         )
 
+    # Comparar con timestamp sin zona permite descartar particiones por fecha
+    fecha_inicio, fecha_fin = to_utc_naive(fecha_inicio), to_utc_naive(fecha_fin)
+    hasta = fecha_fin or to_utc_naive(datetime.now(timezone.utc))
+
+    M = models.MovimientoInventario
+    condiciones = [M.producto_id == producto_id, M.fecha_movimiento <= hasta]
+    if fecha_inicio:
+        condiciones.append(M.fecha_movimiento >= fecha_inicio)
+    if bodega_id:
+        condiciones.append((M.bodega_origen_id == bodega_id) | (M.bodega_destino_id == bodega_id))
+    orden = (M.fecha_movimiento.desc(), M.id.desc())
+
+    movimientos = (
+        db.query(M)
+        .filter(*condiciones)
+        .options(*_CARGA_MOVIMIENTO_RESPUESTA)
+        .order_by(*orden)
+        .offset(skip)
+        .limit(limit + 1)
+        .all()
+    )
+    hay_mas = len(movimientos) > limit
+    movimientos = movimientos[:limit]
+
+    # Saldo al final del periodo (snapshot más cercano + movimientos) y hacia
+    # atrás: cada movimiento muestra el saldo después de aplicarse. El snapshot
+    # solo da el saldo: es correcto aunque los movimientos antiguos ya no estén
+    saldo = sum(stock_a_fecha(db, hasta, producto_id, bodega_id).values())
+    if skip:
+        omitidos = (
+            select(delta_columna(bodega_id).label("delta"))
+            .where(*condiciones)
+            .order_by(*orden)
+            .limit(skip)
+            .subquery()
+        )
+        saldo -= db.execute(select(func.coalesce(func.sum(omitidos.c.delta), 0))).scalar()
+    for movimiento in movimientos:
+        movimiento.saldo = saldo
+        saldo -= delta_movimiento(movimiento, bodega_id)
+
     return {
         "producto": producto,
         "movimientos": movimientos,
         "stock_actual": producto.stock_actual,
+        "saldo_inicial": saldo,
+        "hay_mas": hay_mas,
     }
 
 
-def inventario_fisico(db: Session, inventario: InventarioFisicoCreate, usuario_id: int):
-    """Realizar un inventario físico y ajustar las diferencias"""
-    movimientos_creados = []
+def get_movimientos(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    producto_id: Optional[int] = None,
+    bodega_id: Optional[int] = None,
+    tipo_movimiento: Optional[str] = None,
+    fecha_inicio: Optional[datetime] = None,
+    fecha_fin: Optional[datetime] = None,
+):
+    """Obtener movimientos de inventario con filtros"""
+    query = _filtrar_movimientos(
+        db.query(models.MovimientoInventario).options(*_CARGA_MOVIMIENTO_RESPUESTA),
+        producto_id,
+        bodega_id,
+        tipo_movimiento,
+        fecha_inicio,
+        fecha_fin,
+    )
 
-    for item in inventario.items:
-        # Obtener stock actual en bodega
-        stock_bodega = (
-            db.query(models.StockBodega)
-            .filter(
-                and_(
-                    models.StockBodega.producto_id == item.producto_id,
-                    models.StockBodega.bodega_id == item.bodega_id,
-                )
+    # Orden por la clave de partición: recorre las particiones más recientes primero
+    return (
+        query.order_by(
+            models.MovimientoInventario.fecha_movimiento.desc(),
+            models.MovimientoInventario.id.desc(),
+        )
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+# Relaciones de MovimientoInventarioResponse -> columna con su ID
+_RELACIONES_MOVIMIENTO = {
+    "producto": "producto_id",
+    "usuario": "usuario_id",
+    "bodega_origen": "bodega_origen_id",
+    "bodega_destino": "bodega_destino_id",
+}
+
+# Columnas de ProductoResponse y UserResponse para las relaciones anidadas
+_COLUMNAS_PRODUCTO_MOVIMIENTO = (
+    models.Producto.id,
+    models.Producto.sku,
+    models.Producto.nombre,
+    models.Producto.descripcion,
+    models.Producto.categoria_id,
+    models.Producto.precio_unitario,
+    models.Producto.proveedor_id,
+    models.Producto.stock_minimo,
+    models.Producto.stock_actual,
+    models.Producto.fecha_creacion,
+    models.Producto.fecha_actualizacion,
+)
+
+_COLUMNAS_USUARIO_MOVIMIENTO = (
+    models.User.email,
+    models.User.nombre,
+    models.User.apellido,
+    models.User.rol,
+    models.User.id,
+    models.User.activo,
+    models.User.fecha_creacion,
+    models.User.fecha_actualizacion,
+)
+
+
+def get_movimientos_campos(
+    db: Session,
+    campos: Set[str],
+    skip: int = 0,
+    limit: int = 100,
+    producto_id: Optional[int] = None,
+    bodega_id: Optional[int] = None,
+    tipo_movimiento: Optional[str] = None,
+    fecha_inicio: Optional[datetime] = None,
+    fecha_fin: Optional[datetime] = None,
+):
+    """Obtener movimientos como dicts con solo los campos pedidos (fields=).
+
+    Consulta únicamente las columnas pedidas; producto y usuario se cargan con
+    una consulta por IN cada uno y las bodegas salen de la caché de referencia.
+    """
+    tabla = models.MovimientoInventario
+    claves = [columna.key for columna in tabla.__table__.columns if columna.key in campos]
+    # Las relaciones pedidas necesitan su columna de ID aunque no se devuelva
+    claves += [
+        _RELACIONES_MOVIMIENTO[campo]
+        for campo in campos
+        if campo in _RELACIONES_MOVIMIENTO and _RELACIONES_MOVIMIENTO[campo] not in claves
+    ]
+    query = _filtrar_movimientos(
+        db.query(*(getattr(tabla, clave) for clave in claves)),
+        producto_id,
+        bodega_id,
+        tipo_movimiento,
+        fecha_inicio,
+        fecha_fin,
+    )
+    filas = (
+        query.order_by(tabla.fecha_movimiento.desc(), tabla.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+    relacionados = {}
+    if "producto" in campos and filas:
+        relacionados["producto"] = {
+            fila.id: dict(fila._mapping)
+            for fila in db.query(*_COLUMNAS_PRODUCTO_MOVIMIENTO).filter(
+                models.Producto.id.in_({fila.producto_id for fila in filas})
+            )
+        }
+    if "usuario" in campos and filas:
+        relacionados["usuario"] = {
+            fila.id: dict(fila._mapping)
+            for fila in db.query(*_COLUMNAS_USUARIO_MOVIMIENTO).filter(
+                models.User.id.in_({fila.usuario_id for fila in filas})
             )
-            .first()
+        }
+    if campos & {"bodega_origen", "bodega_destino"}:
+        bodegas = {bodega.id: bodega for bodega in reference_cache.get_all("bodegas", db)}
+        relacionados["bodega_origen"] = relacionados["bodega_destino"] = bodegas
+
+    movimientos = []
+    for fila in filas:
+        movimiento = {clave: valor for clave, valor in fila._mapping.items() if clave in campos}
+        for relacion, datos in relacionados.items():
+            if relacion in campos:
+                movimiento[relacion] = datos.get(getattr(fila, _RELACIONES_MOVIMIENTO[relacion]))
+        movimientos.append(movimiento)
+    return movimientos
+
+
+def _filtrar_movimientos(
+    query,
+    producto_id: Optional[int],
+    bodega_id: Optional[int],
+    tipo_movimiento: Optional[str],
+    fecha_inicio: Optional[datetime],
+    fecha_fin: Optional[datetime],
+):
+    """Aplicar los filtros del listado de movimientos"""
+    fecha_inicio, fecha_fin = to_utc_naive(fecha_inicio), to_utc_naive(fecha_fin)
+
+    if producto_id:
+        query = query.filter(models.MovimientoInventario.producto_id == producto_id)
+    if bodega_id:
+        query = query.filter(
+            (models.MovimientoInventario.bodega_origen_id == bodega_id)
+            | (models.MovimientoInventario.bodega_destino_id == bodega_id)
+        )
+    if tipo_movimiento:
+        query = query.filter(
+            models.MovimientoInventario.tipo_movimiento == tipo_movimiento
         )
+    if fecha_inicio:
+        query = query.filter(
+            models.MovimientoInventario.fecha_movimiento >= fecha_inicio
+        )
+    if fecha_fin:
+        query = query.filter(models.MovimientoInventario.fecha_movimiento <= fecha_fin)
+    return query
 
-        if not stock_bodega:
-            # Crear registro de stock si no existe
-            stock_bodega = models.StockBodega(
-                producto_id=item.producto_id, bodega_id=item.bodega_id, cantidad=0
+
+def inventario_fisico(db: Session, inventario: InventarioFisicoCreate, usuario_id: int):
+    """Realizar un inventario físico y ajustar las diferencias
+
+    Todo el conteo se aplica en una transacción: una consulta para los
+    productos, otra (con bloqueo) para el stock contado y las escrituras como
+    sentencias por lote; con psycopg 3 las de stock (una por fila) van en modo
+    pipeline y esperan una sola respuesta. Un mismo producto y bodega contado
+    dos veces queda con el último conteo, como si se ajustara línea por línea.
+    """
+    pares = {(item.producto_id, item.bodega_id) for item in inventario.items}
+    productos = {
+        p.id: p
+        for p in db.query(models.Producto).filter(
+            models.Producto.id.in_({producto_id for producto_id, _ in pares})
+        )
+    }
+    bodegas = {b.id: b for b in reference_cache.get_all("bodegas", db)}
+    for item in inventario.items:
+        if item.producto_id not in productos:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Producto con ID {item.producto_id} no encontrado",
             )
-            db.add(stock_bodega)
-
-        diferencia = item.cantidad_contada - stock_bodega.cantidad
-
-        if diferencia != 0:
-            # Crear ajuste por la diferencia
-            ajuste = AjusteInventarioCreate(
-                producto_id=item.producto_id,
-                bodega_id=item.bodega_id,
-                cantidad=diferencia,
-                motivo=MotivoMovimientoEnum.CONTEO_FISICO,
-                observaciones=f"Inventario físico. {inventario.observaciones or ''}",
+        if item.bodega_id not in bodegas:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Bodega con ID {item.bodega_id} no encontrada",
+            )
+        if item.cantidad_contada < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cantidad contada negativa para el producto {item.producto_id}",
             )
 
-            movimiento = ajustar_inventario(db, ajuste, usuario_id)
-            movimientos_creados.append(movimiento)
+    # (producto_id, bodega_id) -> [id de stock_bodega (None si no existe), cantidad]
+    stocks = {
+        (fila.producto_id, fila.bodega_id): [fila.id, fila.cantidad]
+        for fila in db.query(
+            models.StockBodega.id,
+            models.StockBodega.producto_id,
+            models.StockBodega.bodega_id,
+            models.StockBodega.cantidad,
+        )
+        .filter(
+            tuple_(models.StockBodega.producto_id, models.StockBodega.bodega_id).in_(
+                list(pares)
+            )
+        )
+        .order_by(models.StockBodega.id)
+        .with_for_update()
+    }
+
+    ahora = datetime.now(timezone.utc)
+    movimientos = []
+    contados = {}
+    for item in inventario.items:
+        clave = (item.producto_id, item.bodega_id)
+        stock = stocks.setdefault(clave, [None, 0])
+        diferencia = item.cantidad_contada - stock[1]
+        if diferencia == 0:
+            continue
+
+        positivo = diferencia > 0
+        movimientos.append(
+            {
+                "producto_id": item.producto_id,
+                "tipo_movimiento": (
+                    models.TipoMovimiento.AJUSTE_POSITIVO
+                    if positivo
+                    else models.TipoMovimiento.AJUSTE_NEGATIVO
+                ),
+                "cantidad": abs(diferencia),
+                "bodega_origen_id": None if positivo else item.bodega_id,
+                "bodega_destino_id": item.bodega_id if positivo else None,
+                "motivo": models.MotivoMovimiento.CONTEO_FISICO,
+                "observaciones": f"Inventario físico. {inventario.observaciones or ''}",
+                "documento_referencia": None,
+                "usuario_id": usuario_id,
+                "stock_anterior": stock[1],
+                "stock_posterior": item.cantidad_contada,
+                "fecha_movimiento": ahora,
+            }
+        )
+        stock[1] = item.cantidad_contada
+        contados[clave] = stock
+
+    if not movimientos:
+        db.rollback()
+        return []
+
+    tabla_stock = models.StockBodega.__table__
+    tabla_productos = models.Producto.__table__
+    tabla_movimientos = models.MovimientoInventario.__table__
+    afectados = {producto_id for producto_id, _ in contados}
+    # Stock nuevo (poco frecuente): el INSERT de una fila lleva RETURNING implícito
+    nuevos = [
+        {
+            "producto_id": producto_id,
+            "bodega_id": bodega_id,
+            "cantidad": cantidad,
+            "ubicacion": "A1",
+        }
+        for (producto_id, bodega_id), (stock_id, cantidad) in contados.items()
+        if stock_id is None
+    ]
+    if nuevos:
+        db.execute(insert(tabla_stock), nuevos)
+
+    # Un UPDATE por fila de stock contada: con psycopg 3 van en pipeline
+    existentes = [
+        {"b_id": stock_id, "b_cantidad": cantidad}
+        for stock_id, cantidad in contados.values()
+        if stock_id is not None
+    ]
+    if existentes:
+        with pipeline(db):
+            db.execute(
+                update(tabla_stock)
+                .where(tabla_stock.c.id == bindparam("b_id"))
+                .values(cantidad=bindparam("b_cantidad")),
+                existentes,
+            )
+
+    ids = db.scalars(
+        insert(tabla_movimientos).returning(
+            tabla_movimientos.c.id, sort_by_parameter_order=True
+        ),
+        movimientos,
+    ).all()
+    stock_total = (
+        select(func.coalesce(func.sum(tabla_stock.c.cantidad), 0))
+        .where(tabla_stock.c.producto_id == tabla_productos.c.id)
+        .scalar_subquery()
+    )
+    totales = db.execute(
+        update(tabla_productos)
+        .where(tabla_productos.c.id.in_(afectados))
+        .values(stock_actual=stock_total, fecha_actualizacion=ahora)
+        .returning(tabla_productos.c.id, tabla_productos.c.stock_actual)
+    ).all()
 
-    return movimientos_creados
+    # Las escrituras Core no pasan por el ORM: reflejar el stock sin marcar cambios
+    for producto_id, total in totales:
+        set_committed_value(productos[producto_id], "stock_actual", total)
+        set_committed_value(productos[producto_id], "fecha_actualizacion", ahora)
+
+    bump_version(db, "productos")
+    db.commit()
+    alert_service.evaluar_productos(db, afectados)
+    print(f"Inventario físico: {len(movimientos)} ajustes en {len(afectados)} productos")
+
+    usuario = db.get(models.User, usuario_id)
+    return [
+        {
+            **movimiento,
+            "id": movimiento_id,
+            "producto": productos[movimiento["producto_id"]],
+            "usuario": usuario,
+            "bodega_origen": bodegas.get(movimiento["bodega_origen_id"]),
+            "bodega_destino": bodegas.get(movimiento["bodega_destino_id"]),
+        }
+        for movimiento, movimiento_id in zip(movimientos, ids)
+    ]
 
 
 # ==================== FUNCIONES AUXILIARES ====================
@@ -594,6 +1240,9 @@ def inventario_fisico(db: Session, inventario: InventarioFisicoCreate, usuario_i
 
 def actualizar_stock_total_producto(db: Session, producto_id: int):
     """Actualizar el stock total de un producto sumando todas las bodegas"""
+    # La sesión no hace autoflush: enviar los cambios pendientes antes de sumar
+    db.flush()
+
     # Calcular el stock total sumando todas las bodegas
     stock_total = (
         db.query(func.sum(models.StockBodega.cantidad))
@@ -602,17 +1251,12 @@ def actualizar_stock_total_producto(db: Session, producto_id: int):
         or 0
     )
 
-    # Actualizar el producto
-    producto = (
-        db.query(models.Producto).filter(models.Producto.id == producto_id).first()
-    )
+    # Actualizar el producto (normalmente ya está en la sesión: sin consulta)
+    producto = db.get(models.Producto, producto_id)
 
-    if producto:
+    if producto and producto.stock_actual != stock_total:
         producto.stock_actual = stock_total
         producto.fecha_actualizacion = datetime.now(timezone.utc)
         db.flush()  # Usar flush en lugar de commit para que sea parte de la transacción
-        print(
-            f"✅ Stock actualizado para producto {producto_id}: {stock_total}"
-        )  # Debug
 
     return stock_total
@@ -0,0 +1,226 @@
+# services/partition_service.py
+"""
+Particiones mensuales de movimientos_inventario (PostgreSQL).
+
+La tabla está particionada por RANGE (fecha_movimiento) con una partición por
+mes, creada por adelantado (ensure_partitions) al iniciar la aplicación y en un
+ciclo de mantenimiento diario. No se crea partición DEFAULT: DETACH PARTITION
+CONCURRENTLY no la admite, y sin ella las particiones antiguas se pueden
+separar o archivar sin bloquear las escrituras de la tabla.
+
+Las fechas se guardan como timestamp sin zona horaria en UTC; las consultas
+deben comparar fecha_movimiento con valores del mismo tipo (ver to_utc_naive)
+para que el planificador descarte particiones.
+
+En otros motores (SQLite en desarrollo) todas las funciones son no-op.
+"""
+
+import asyncio
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+import models
+
+TABLA = models.MovimientoInventario.__tablename__
+ESQUEMA_ARCHIVO = "archivo"
+
+# Meses creados por delante del mes actual
+MESES_ADELANTE = int(os.getenv("MOVIMIENTOS_PARTICIONES_ADELANTE", "3"))
+# Meses que se conservan en la tabla; 0 desactiva el archivado automático
+MESES_RETENCION = int(os.getenv("MOVIMIENTOS_RETENCION_MESES", "0"))
+INTERVALO_MANTENIMIENTO = int(os.getenv("MOVIMIENTOS_MANTENIMIENTO_SEGUNDOS", "86400"))
+
+_PATRON_PARTICION = re.compile(rf"^{TABLA}_p(\d{{4}})_(\d{{2}})$")
+
+
+def to_utc_naive(valor: Optional[datetime]) -> Optional[datetime]:
+    """Convertir un datetime con zona a UTC sin zona (tipo de fecha_movimiento)"""
+    if valor is None or valor.tzinfo is None:
+        return valor
+    return valor.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _inicio_mes(valor) -> date:
+    return date(valor.year, valor.month, 1)
+
+
+def _sumar_meses(mes: date, meses: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(mes: date) -> str:
+    return f"{TABLA}_p{mes.year:04d}_{mes.month:02d}"
+
+
+def _es_postgres(engine: Engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def is_partitioned(connection) -> bool:
+    """Indicar si la tabla de movimientos ya está particionada"""
+    return bool(
+        connection.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :tabla AND pg_table_is_visible(c.oid)"
+            ),
+            {"tabla": TABLA},
+        ).first()
+    )
+
+
+def list_partitions(connection) -> List[date]:
+    """Meses con partición adjunta, en orden"""
+    filas = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:tabla AS regclass)"
+        ),
+        {"tabla": TABLA},
+    )
+    meses = []
+    for (nombre,) in filas:
+        coincidencia = _PATRON_PARTICION.match(nombre)
+        if coincidencia:
+            meses.append(date(int(coincidencia[1]), int(coincidencia[2]), 1))
+    return sorted(meses)
+
+
+def create_partitions(
+    connection,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    meses_adelante: int = None,
+) -> List[str]:
+    """Crear, dentro de la transacción dada, las particiones mensuales que falten.
+
+    Cubre desde el mes de `desde` (o el actual) hasta el mayor entre el mes de
+    `hasta` y N meses por delante del actual.
+    """
+    meses_adelante = MESES_ADELANTE if meses_adelante is None else meses_adelante
+    actual = _inicio_mes(datetime.now(timezone.utc))
+    mes = _inicio_mes(desde) if desde else actual
+    ultimo = _sumar_meses(actual, meses_adelante)
+    if hasta:
+        ultimo = max(ultimo, _inicio_mes(hasta))
+
+    # Serializar entre workers que arrancan a la vez
+    connection.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:clave))"),
+        {"clave": f"{TABLA}_particiones"},
+    )
+    existentes = set(list_partitions(connection))
+    creadas = []
+    while mes <= ultimo:
+        if mes not in existentes:
+            siguiente = _sumar_meses(mes, 1)
+            connection.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {nombre_particion(mes)} "
+                    f"PARTITION OF {TABLA} "
+                    f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{siguiente.isoformat()}')"
+                )
+            )
+            creadas.append(nombre_particion(mes))
+        mes = _sumar_meses(mes, 1)
+    return creadas
+
+
+def ensure_partitions(
+    engine: Engine, desde: Optional[datetime] = None, meses_adelante: int = None
+) -> List[str]:
+    """Crear las particiones mensuales que falten desde `desde` hasta N meses adelante"""
+    if not _es_postgres(engine):
+        return []
+
+    with engine.begin() as connection:
+        if not is_partitioned(connection):
+            print(
+                f"⚠️  {TABLA} no está particionada; ejecute python -m migrations upgrade"
+            )
+            return []
+        creadas = create_partitions(connection, desde, meses_adelante=meses_adelante)
+
+    if creadas:
+        print(f"🗂️  Particiones creadas: {', '.join(creadas)}")
+    return creadas
+
+
+def _finalizar_pendientes(connection):
+    """Completar DETACH CONCURRENTLY interrumpidos (quedan marcados como pendientes)"""
+    pendientes = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:tabla AS regclass) AND i.inhdetachpending"
+        ),
+        {"tabla": TABLA},
+    ).scalars().all()
+    for nombre in pendientes:
+        connection.execute(text(f"ALTER TABLE {TABLA} DETACH PARTITION {nombre} FINALIZE"))
+        print(f"🗂️  Separación pendiente finalizada: {nombre}")
+
+
+def detach_partitions_before(
+    engine: Engine, antes_de: date, accion: str = "archivar"
+) -> List[str]:
+    """Separar las particiones anteriores a un mes sin bloquear la tabla.
+
+    accion: "separar" (deja la tabla suelta), "archivar" (la mueve al esquema
+    archivo) o "eliminar" (la borra tras separarla).
+    """
+    if accion not in ("separar", "archivar", "eliminar"):
+        raise ValueError(f"Acción de archivado no válida: {accion}")
+    if not _es_postgres(engine):
+        return []
+
+    limite = _inicio_mes(antes_de)
+    procesadas = []
+    # DETACH ... CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if not is_partitioned(connection):
+            return []
+        _finalizar_pendientes(connection)
+        for mes in list_partitions(connection):
+            if mes >= limite:
+                break
+            nombre = nombre_particion(mes)
+            connection.execute(
+                text(f"ALTER TABLE {TABLA} DETACH PARTITION {nombre} CONCURRENTLY")
+            )
+            if accion == "archivar":
+                connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ESQUEMA_ARCHIVO}"))
+                connection.execute(text(f"ALTER TABLE {nombre} SET SCHEMA {ESQUEMA_ARCHIVO}"))
+            elif accion == "eliminar":
+                connection.execute(text(f"DROP TABLE {nombre}"))
+            procesadas.append(nombre)
+
+    if procesadas:
+        print(f"🗂️  Particiones procesadas ({accion}): {', '.join(procesadas)}")
+    return procesadas
+
+
+def run_maintenance(engine: Engine):
+    """Crear particiones futuras y archivar las que excedan la retención"""
+    ensure_partitions(engine)
+    if MESES_RETENCION > 0:
+        actual = _inicio_mes(datetime.now(timezone.utc))
+        detach_partitions_before(engine, _sumar_meses(actual, -MESES_RETENCION))
+
+
+async def maintenance_loop(engine: Engine):
+    """Ciclo de mantenimiento periódico (se lanza como tarea al iniciar la app)"""
+    while True:
+        await asyncio.sleep(INTERVALO_MANTENIMIENTO)
+        try:
+            await asyncio.to_thread(run_maintenance, engine)
+        except Exception as e:
+            print(f"⚠️  Error en el mantenimiento de particiones: {e}")
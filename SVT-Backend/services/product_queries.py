@@ -1,116 +1,134 @@
-from sqlalchemy import text
+from sqlalchemy import DateTime, Integer, String, bindparam, or_, select
 
+import models
+from services.query_registry import registrar
 
-def get_products_query():
-    return text(
-        """
-        SELECT p.id, p.sku, p.nombre, p.descripcion, p.categoria,
-               p.precio_unitario, p.stock_actual, p.stock_minimo,
-               prov.nombre as proveedor_nombre
-        FROM productos p
-        LEFT JOIN proveedores prov ON p.proveedor_id = prov.id
-        ORDER BY p.nombre
-        LIMIT 50
+PRODUCTOS = registrar(
+    "productos",
     """
+    SELECT p.id, p.sku, p.nombre, p.descripcion, p.categoria_nombre AS categoria,
+           p.precio_unitario, p.stock_actual, p.stock_minimo,
+           prov.nombre as proveedor_nombre
+    FROM productos p
+    LEFT JOIN proveedores prov ON p.proveedor_id = prov.id
+    ORDER BY p.nombre
+    LIMIT 50
+    """,
+)
+
+
+def _buscar_productos():
+    # Sentencia Core para usar ILIKE en PostgreSQL (lower() LIKE lower() en otros motores)
+    p = models.Producto.__table__
+    prov = models.Proveedor.__table__
+    busqueda = bindparam("search", type_=String)
+    return (
+        select(
+            p.c.id,
+            p.c.sku,
+            p.c.nombre,
+            p.c.descripcion,
+            p.c.categoria_nombre.label("categoria"),
+            p.c.stock_actual,
+            p.c.stock_minimo,
+            p.c.precio_unitario,
+            prov.c.nombre.label("proveedor_nombre"),
+        )
+        .select_from(p.outerjoin(prov, p.c.proveedor_id == prov.c.id))
+        .where(
+            or_(
+                p.c.nombre.ilike(busqueda),
+                p.c.sku.ilike(busqueda),
+                p.c.categoria_nombre.ilike(busqueda),
+                p.c.descripcion.ilike(busqueda),
+            )
+        )
+        .order_by(p.c.nombre)
+        .limit(15)
     )
 
 
-def search_products_query():
-    return text(
-        """
-        SELECT p.id, p.sku, p.nombre, p.descripcion, p.categoria,
-               p.stock_actual, p.stock_minimo, p.precio_unitario,
-               prov.nombre as proveedor_nombre
-        FROM productos p
-        LEFT JOIN proveedores prov ON p.proveedor_id = prov.id
-        WHERE LOWER(p.nombre) LIKE LOWER(:search)
-           OR LOWER(p.sku) LIKE LOWER(:search)
-           OR LOWER(p.categoria) LIKE LOWER(:search)
-           OR LOWER(p.descripcion) LIKE LOWER(:search)
-        ORDER BY p.nombre
-        LIMIT 15
-    """
-    )
-
+BUSCAR_PRODUCTOS = registrar("buscar_productos", _buscar_productos())
 
-def get_low_stock_query():
-    return text(
-        """
-        SELECT p.id, p.sku, p.nombre, p.stock_actual, p.stock_minimo,
-               p.precio_unitario, p.categoria, prov.nombre as proveedor_nombre
-        FROM productos p
-        LEFT JOIN proveedores prov ON p.proveedor_id = prov.id
-        WHERE p.stock_actual <= p.stock_minimo
-        ORDER BY (p.stock_actual - p.stock_minimo) ASC
-        LIMIT 20
+STOCK_BAJO = registrar(
+    "stock_bajo",
     """
-    )
-
-
-def get_low_stock_threshold_query():
-    return text(
-        """
-        SELECT p.id, p.sku, p.nombre, p.stock_actual, p.stock_minimo,
-               p.precio_unitario, p.categoria, prov.nombre as proveedor_nombre
-        FROM productos p
-        LEFT JOIN proveedores prov ON p.proveedor_id = prov.id
-        WHERE p.stock_actual < :threshold
-        ORDER BY p.stock_actual ASC
-        LIMIT 20
+    SELECT p.id, p.sku, p.nombre, p.stock_actual, p.stock_minimo,
+           p.precio_unitario, p.categoria_nombre AS categoria,
+           prov.nombre as proveedor_nombre
+    FROM productos p
+    LEFT JOIN proveedores prov ON p.proveedor_id = prov.id
+    WHERE p.stock_actual <= p.stock_minimo
+    ORDER BY (p.stock_actual - p.stock_minimo) ASC
+    LIMIT 20
+    """,
+)
+
+STOCK_BAJO_UMBRAL = registrar(
+    "stock_bajo_umbral",
     """
-    )
-
-
-def get_inventory_stats_query():
-    return text(
-        """
-        SELECT
-            COUNT(*) as total_productos,
-            SUM(stock_actual) as total_unidades,
-            SUM(stock_actual * precio_unitario) as valor_total_inventario,
-            AVG(precio_unitario) as precio_promedio,
-            COUNT(DISTINCT categoria) as total_categorias,
-            COUNT(DISTINCT proveedor_id) as total_proveedores,
-            COUNT(CASE WHEN stock_actual <= stock_minimo THEN 1 END) as productos_stock_bajo
-        FROM productos
+    SELECT p.id, p.sku, p.nombre, p.stock_actual, p.stock_minimo,
+           p.precio_unitario, p.categoria_nombre AS categoria,
+           prov.nombre as proveedor_nombre
+    FROM productos p
+    LEFT JOIN proveedores prov ON p.proveedor_id = prov.id
+    WHERE p.stock_actual < :threshold
+    ORDER BY p.stock_actual ASC
+    LIMIT 20
+    """,
+    threshold=Integer,
+)
+
+ESTADISTICAS_INVENTARIO = registrar(
+    "estadisticas_inventario",
     """
-    )
-
-
-def get_top_categories_query():
-    return text(
-        """
-        SELECT categoria,
-               COUNT(*) as cantidad_productos,
-               SUM(stock_actual) as total_stock,
-               SUM(stock_actual * precio_unitario) as valor_categoria
-        FROM productos
-        WHERE categoria IS NOT NULL
-        GROUP BY categoria
-        ORDER BY cantidad_productos DESC
-        LIMIT 5
+    SELECT
+        COUNT(*) as total_productos,
+        SUM(stock_actual) as total_unidades,
+        SUM(stock_actual * precio_unitario) as valor_total_inventario,
+        AVG(precio_unitario) as precio_promedio,
+        COUNT(DISTINCT categoria_nombre) as total_categorias,
+        COUNT(DISTINCT proveedor_id) as total_proveedores,
+        COUNT(CASE WHEN stock_actual <= stock_minimo THEN 1 END) as productos_stock_bajo
+    FROM productos
+    """,
+)
+
+TOP_CATEGORIAS = registrar(
+    "top_categorias",
     """
-    )
-
-
-def get_top_products_query():
-    return text(
-        """
-        SELECT nombre, stock_actual, precio_unitario,
-               (stock_actual * precio_unitario) as valor_total
-        FROM productos
-        ORDER BY valor_total DESC
-        LIMIT 5
+    SELECT categoria_nombre AS categoria,
+           COUNT(*) as cantidad_productos,
+           SUM(stock_actual) as total_stock,
+           SUM(stock_actual * precio_unitario) as valor_categoria
+    FROM productos
+    WHERE categoria_nombre IS NOT NULL
+    GROUP BY categoria_nombre
+    ORDER BY cantidad_productos DESC
+    LIMIT 5
+    """,
+)
+
+TOP_PRODUCTOS = registrar(
+    "top_productos",
     """
-    )
-
-
-def get_product_by_sku_query():
-    return text(
-        """
-        SELECT p.*, prov.nombre as proveedor_nombre, prov.telefono as proveedor_telefono
-        FROM productos p
-        LEFT JOIN proveedores prov ON p.proveedor_id = prov.id
-        WHERE LOWER(p.sku) = LOWER(:sku)
+    SELECT nombre, stock_actual, precio_unitario,
+           (stock_actual * precio_unitario) as valor_total
+    FROM productos
+    ORDER BY valor_total DESC
+    LIMIT 5
+    """,
+)
+
+PRODUCTO_POR_SKU = registrar(
+    "producto_por_sku",
     """
-    )
+    SELECT p.*, p.categoria_nombre AS categoria,
+           prov.nombre as proveedor_nombre, prov.telefono as proveedor_telefono
+    FROM productos p
+    LEFT JOIN proveedores prov ON p.proveedor_id = prov.id
+    WHERE LOWER(p.sku) = LOWER(:sku)
+    """,
+    columnas={"fecha_creacion": DateTime, "fecha_actualizacion": DateTime},
+    sku=String,
+)
@@ -1,18 +1,29 @@
-from sqlalchemy.orm import Session, joinedload, noload
+from typing import Optional, Set
+
+from sqlalchemy.orm import Session, joinedload, noload, selectinload
 from fastapi import HTTPException, status
 import models
 from schemas import ProductoCreate, ProductoUpdate
+from services import alert_service
+from services.reference_cache import reference_cache
+from utils.resource_versions import bump_version
+
+
+# Relaciones que serializa ProductoDetailResponse: proveedor en la misma consulta
+# y el stock por bodega (con su bodega) en una segunda, sin cargas perezosas
+_CARGA_PRODUCTO_DETALLE = (
+    joinedload(models.Producto.proveedor),
+    selectinload(models.Producto.stocks_bodega).joinedload(models.StockBodega.bodega),
+    noload(models.Producto.categoria_rel),  # Evitar cargar la relación problemática
+)
 
 
 def get_producto(db: Session, producto_id: int):
-    """Obtener un producto por su ID con los datos del proveedor"""
+    """Obtener un producto por su ID con los datos del proveedor y el stock por bodega"""
     return (
         db.query(models.Producto)
         .filter(models.Producto.id == producto_id)
-        .options(
-            joinedload(models.Producto.proveedor),
-            noload(models.Producto.categoria_rel),  # Evitar cargar la relación problemática
-        )
+        .options(*_CARGA_PRODUCTO_DETALLE)
         .first()
     )
 
@@ -22,6 +33,32 @@ def get_producto_by_sku(db: Session, sku: str):
     return db.query(models.Producto).filter(models.Producto.sku == sku).first()
 
 
+# Columnas que necesita ProductoListResponse (evita hidratar el grafo ORM completo)
+_COLUMNAS_PRODUCTO_LISTADO = (
+    models.Producto.id,
+    models.Producto.sku,
+    models.Producto.nombre,
+    models.Producto.descripcion,
+    models.Producto.categoria_id,
+    models.Producto.categoria_nombre,
+    models.Producto.precio_unitario,
+    models.Producto.proveedor_id,
+    models.Producto.stock_actual,
+    models.Producto.stock_minimo,
+    models.Producto.fecha_creacion,
+    models.Producto.fecha_actualizacion,
+)
+
+_COLUMNAS_PROVEEDOR_LISTADO = (
+    models.Proveedor.nombre.label("proveedor_nombre"),
+    models.Proveedor.codigo.label("proveedor_codigo"),
+    models.Proveedor.contacto.label("proveedor_contacto"),
+    models.Proveedor.telefono.label("proveedor_telefono"),
+    models.Proveedor.email.label("proveedor_email"),
+    models.Proveedor.direccion.label("proveedor_direccion"),
+)
+
+
 def get_productos(
     db: Session,
     skip: int = 0,
@@ -30,13 +67,34 @@ def get_productos(
     nombre: str = None,
     categoria_id: int = None,
     proveedor_id: int = None,
+    campos: Optional[Set[str]] = None,
 ):
-    """Obtener productos con filtros opcionales"""
-    query = db.query(models.Producto).options(
-        joinedload(models.Producto.proveedor),
-        joinedload(models.Producto.stocks_bodega).joinedload(models.StockBodega.bodega),
-        noload(models.Producto.categoria_rel),  # Evitar cargar la relación problemática
-    )
+    """Obtener productos con filtros opcionales.
+
+    Usa proyección de columnas en lugar de joinedload: una consulta para los
+    productos (con su proveedor) y otra, por IN, para el stock en bodegas.
+    Devuelve diccionarios con la forma de ProductoListResponse; con `campos`
+    (fields=) solo se consultan esas columnas, y el proveedor y el stock por
+    bodega solo si se piden.
+    """
+    claves = [
+        columna.key
+        for columna in _COLUMNAS_PRODUCTO_LISTADO
+        if campos is None or columna.key in campos
+    ]
+    con_proveedor = campos is None or "proveedor" in campos
+    con_stock = campos is None or "stocks_bodega" in campos
+
+    columnas = [
+        columna
+        for columna in _COLUMNAS_PRODUCTO_LISTADO
+        if columna.key in claves or (con_proveedor and columna.key == "proveedor_id")
+    ]
+    query = db.query(*columnas)
+    if con_proveedor:
+        query = query.add_columns(*_COLUMNAS_PROVEEDOR_LISTADO).outerjoin(
+            models.Proveedor, models.Producto.proveedor_id == models.Proveedor.id
+        )
 
     # Aplicar filtros si se proporcionan
     if sku:
@@ -48,36 +106,112 @@ def get_productos(
     if proveedor_id:
         query = query.filter(models.Producto.proveedor_id == proveedor_id)
 
-    return query.order_by(models.Producto.nombre).offset(skip).limit(limit).all()
+    filas = (
+        query.order_by(models.Producto.nombre, models.Producto.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    if not filas:
+        return []
+
+    stocks_por_producto = (
+        _get_stocks_listado(db, [fila.id for fila in filas]) if con_stock else {}
+    )
+
+    productos = []
+    for fila in filas:
+        producto = {clave: getattr(fila, clave) for clave in claves}
+        if con_proveedor:
+            producto["proveedor"] = None
+            if fila.proveedor_codigo is not None:
+                producto["proveedor"] = {
+                    "id": fila.proveedor_id,
+                    "nombre": fila.proveedor_nombre,
+                    "codigo": fila.proveedor_codigo,
+                    "contacto": fila.proveedor_contacto,
+                    "telefono": fila.proveedor_telefono,
+                    "email": fila.proveedor_email,
+                    "direccion": fila.proveedor_direccion,
+                }
+        if con_stock:
+            producto["stocks_bodega"] = stocks_por_producto.get(fila.id, [])
+        productos.append(producto)
+
+    return productos
+
+
+def _get_stocks_listado(db: Session, producto_ids: list):
+    """Obtener el stock por bodega de varios productos en una sola consulta"""
+    filas = (
+        db.query(
+            models.StockBodega.id,
+            models.StockBodega.producto_id,
+            models.StockBodega.bodega_id,
+            models.StockBodega.cantidad,
+            models.StockBodega.ubicacion,
+            models.Bodega.nombre.label("bodega_nombre"),
+            models.Bodega.codigo.label("bodega_codigo"),
+            models.Bodega.direccion.label("bodega_direccion"),
+            models.Bodega.encargado.label("bodega_encargado"),
+            models.Bodega.telefono.label("bodega_telefono"),
+            models.Bodega.activa.label("bodega_activa"),
+            models.Bodega.fecha_creacion.label("bodega_fecha_creacion"),
+        )
+        .join(models.Bodega, models.StockBodega.bodega_id == models.Bodega.id)
+        .filter(models.StockBodega.producto_id.in_(producto_ids))
+        .order_by(models.StockBodega.producto_id, models.StockBodega.id)
+        .all()
+    )
+
+    stocks = {}
+    for fila in filas:
+        stocks.setdefault(fila.producto_id, []).append(
+            {
+                "id": fila.id,
+                "bodega_id": fila.bodega_id,
+                "cantidad": fila.cantidad,
+                "ubicacion": fila.ubicacion,
+                "bodega": {
+                    "id": fila.bodega_id,
+                    "nombre": fila.bodega_nombre,
+                    "codigo": fila.bodega_codigo,
+                    "direccion": fila.bodega_direccion,
+                    "encargado": fila.bodega_encargado,
+                    "telefono": fila.bodega_telefono,
+                    "activa": fila.bodega_activa,
+                    "fecha_creacion": fila.bodega_fecha_creacion,
+                },
+            }
+        )
+    return stocks
 
 
 def create_producto(db: Session, producto: ProductoCreate):
     """Crear un nuevo producto con stock en bodega"""
 
-    # Validar proveedor
-    proveedor = (
-        db.query(models.Proveedor)
-        .filter(models.Proveedor.id == producto.proveedor_id)
-        .first()
-    )
+    # Validar proveedor, categoría y bodega contra la caché de referencia
+    proveedor = reference_cache.get_by_id("proveedores", db, producto.proveedor_id)
     if not proveedor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Proveedor con ID {producto.proveedor_id} no encontrado",
         )
 
-    # Validar categoría
-    categoria = (
-        db.query(models.Categoria)
-        .filter(models.Categoria.id == producto.categoria_id)
-        .first()
-    )
+    categoria = reference_cache.get_by_id("categorias", db, producto.categoria_id)
     if not categoria:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Categoría con ID {producto.categoria_id} no encontrada",
         )
 
+    bodega = reference_cache.get_by_id("bodegas", db, producto.bodega_id)
+    if not bodega:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bodega con ID {producto.bodega_id} no encontrada",
+        )
+
     # Crear producto
     db_producto = models.Producto(
         sku=producto.sku,
@@ -91,18 +225,7 @@ def create_producto(db: Session, producto: ProductoCreate):
         stock_actual=producto.stock_inicial,
     )
     db.add(db_producto)
-    db.commit()
-    db.refresh(db_producto)
-
-    # Validar bodega
-    bodega = (
-        db.query(models.Bodega).filter(models.Bodega.id == producto.bodega_id).first()
-    )
-    if not bodega:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Bodega con ID {producto.bodega_id} no encontrada",
-        )
+    db.flush()  # El ID llega con el INSERT ... RETURNING
 
     # Crear stock en bodega
     stock_bodega = models.StockBodega(
@@ -127,40 +250,46 @@ def create_producto(db: Session, producto: ProductoCreate):
     )
     db.add(movimiento)
 
+    bump_version(db, "productos")
     db.commit()
+    alert_service.evaluar_productos(db, [db_producto.id])
 
     print(
         f"Producto creado: {db_producto.nombre} en bodega {bodega.nombre} con stock {producto.stock_inicial}"
     )
 
-    producto_completo = (
-        db.query(models.Producto)
-        .options(
-            joinedload(models.Producto.proveedor),
-            joinedload(models.Producto.stocks_bodega).joinedload(
-                models.StockBodega.bodega
-            ),
-        )
-        .filter(models.Producto.id == db_producto.id)
-        .first()
-    )
-    return producto_completo
+    # La respuesta se arma con lo ya conocido (sesión sin expire_on_commit y
+    # proveedor/bodega de la caché), sin volver a consultar el producto
+    return {
+        **{
+            columna.key: getattr(db_producto, columna.key)
+            for columna in models.Producto.__table__.columns
+        },
+        "proveedor": proveedor,
+        "stocks_bodega": [
+            {
+                "id": stock_bodega.id,
+                "producto_id": db_producto.id,
+                "bodega_id": bodega.id,
+                "cantidad": stock_bodega.cantidad,
+                "ubicacion": stock_bodega.ubicacion,
+                "producto": db_producto,
+                "bodega": bodega,
+            }
+        ],
+    }
 
 
 def update_producto(db: Session, producto_id: int, producto_update: ProductoUpdate):
     """Actualizar un producto existente"""
-    db_producto = (
-        db.query(models.Producto).filter(models.Producto.id == producto_id).first()
-    )
+    db_producto = get_producto(db, producto_id)
     if not db_producto:
         return None
 
     # Si se actualiza el proveedor, verificar que exista
     if producto_update.proveedor_id is not None:
-        proveedor = (
-            db.query(models.Proveedor)
-            .filter(models.Proveedor.id == producto_update.proveedor_id)
-            .first()
+        proveedor = reference_cache.get_by_id(
+            "proveedores", db, producto_update.proveedor_id
         )
         if not proveedor:
             raise HTTPException(
@@ -177,8 +306,14 @@ def update_producto(db: Session, producto_id: int, producto_update: ProductoUpda
         if value is not None:  # Actualizamos solo campos no nulos
             setattr(db_producto, key, value)
 
+    # El proveedor cargado con el producto quedaría desfasado del nuevo proveedor_id
+    if producto_update.proveedor_id is not None:
+        db_producto.proveedor = db.get(models.Proveedor, producto_update.proveedor_id)
+
+    bump_version(db, "productos")
     db.commit()
-    db.refresh(db_producto)
+    # El cambio de stock_minimo puede activar o resolver una alerta
+    alert_service.evaluar_productos(db, [producto_id])
     return db_producto
 
 
@@ -191,5 +326,6 @@ def delete_producto(db: Session, producto_id: int):
         return False
 
     db.delete(db_producto)
+    bump_version(db, "productos")
     db.commit()
     return True
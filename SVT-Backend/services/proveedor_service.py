@@ -1,7 +1,20 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 import models
-from schemas import ProveedorCreate
+from schemas import ProveedorCreate, ProveedorResponse
+from services.reference_cache import reference_cache
+from utils.resource_versions import bump_version
+
+
+def _cargar_proveedores(db: Session):
+    """Cargar todos los proveedores para la caché de referencia"""
+    return [
+        ProveedorResponse.model_validate(proveedor)
+        for proveedor in db.query(models.Proveedor).order_by(models.Proveedor.nombre)
+    ]
+
+
+reference_cache.register("proveedores", _cargar_proveedores)
 
 
 def get_proveedor(db: Session, proveedor_id: int):
@@ -18,15 +31,15 @@ def get_proveedor_by_codigo(db: Session, codigo: str):
 
 def get_proveedores(db: Session, skip: int = 0, limit: int = 100, search: str = None):
     """Obtener lista de proveedores con búsqueda opcional"""
-    query = db.query(models.Proveedor)
-
-    if search:
-        query = query.filter(
-            or_(
-                models.Proveedor.nombre.ilike(f"%{search}%"),
-                models.Proveedor.codigo.ilike(f"%{search}%"),
-            )
+    if not search:
+        return reference_cache.get_all("proveedores", db)[skip : skip + limit]
+
+    query = db.query(models.Proveedor).filter(
+        or_(
+            models.Proveedor.nombre.ilike(f"%{search}%"),
+            models.Proveedor.codigo.ilike(f"%{search}%"),
         )
+    )
 
     return query.order_by(models.Proveedor.nombre).offset(skip).limit(limit).all()
 
@@ -35,8 +48,8 @@ def create_proveedor(db: Session, proveedor: ProveedorCreate):
     """Crear un nuevo proveedor"""
     db_proveedor = models.Proveedor(**proveedor.model_dump())
     db.add(db_proveedor)
+    bump_version(db, "proveedores")
     db.commit()
-    db.refresh(db_proveedor)
     return db_proveedor
 
 
@@ -48,8 +61,8 @@ def update_proveedor(db: Session, proveedor_id: int, proveedor: ProveedorCreate)
     if db_proveedor:
         for key, value in proveedor.model_dump().items():
             setattr(db_proveedor, key, value)
+        bump_version(db, "proveedores")
         db.commit()
-        db.refresh(db_proveedor)
         return db_proveedor
     return None
 
@@ -61,6 +74,7 @@ def delete_proveedor(db: Session, proveedor_id: int):
     )
     if db_proveedor:
         db.delete(db_proveedor)
+        bump_version(db, "proveedores")
         db.commit()
         return True
     return False
@@ -0,0 +1,174 @@
+# services/query_registry.py
+"""
+Registro de las consultas SQL del chatbot, con nombre y parámetros tipados.
+
+Cada consulta se construye una sola vez al importar el módulo que la declara
+(services.product_queries, services.supplier_queries): el texto no se vuelve a
+analizar en cada llamada y, al ser siempre el mismo objeto, SQLAlchemy
+reutiliza la compilación de su caché de sentencias. Los parámetros se declaran
+con su tipo (bindparam) en lugar de inferirse del valor.
+
+Cada ejecución registra latencia y filas devueltas por nombre de consulta;
+las estadísticas se exponen en /chatbot/query-stats y en /metrics.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from utils import metrics
+
+# Ejecuciones más lentas que esto se avisan por consola
+CONSULTA_LENTA_MS = float(os.getenv("CHATBOT_CONSULTA_LENTA_MS", "500"))
+# Últimas duraciones guardadas por consulta para los percentiles
+MUESTRAS = 200
+
+
+class _Estadisticas:
+    __slots__ = ("ejecuciones", "errores", "filas", "segundos", "maximo_ms", "recientes")
+
+    def __init__(self):
+        self.ejecuciones = 0
+        self.errores = 0
+        self.filas = 0
+        self.segundos = 0.0
+        self.maximo_ms = 0.0
+        self.recientes = deque(maxlen=MUESTRAS)
+
+
+class Consulta:
+    """Consulta registrada: sentencia construida una vez y estadísticas por nombre"""
+
+    def __init__(self, nombre: str, sentencia):
+        self.nombre = nombre
+        self.sentencia = sentencia
+        self._stats = _Estadisticas()
+
+    def filas(self, db: Session, **parametros) -> list:
+        """Ejecutar y devolver todas las filas"""
+        return self._ejecutar(db, parametros, primera=False)
+
+    def primera(self, db: Session, **parametros):
+        """Ejecutar y devolver la primera fila (None si no hay)"""
+        return self._ejecutar(db, parametros, primera=True)
+
+    def _ejecutar(self, db: Session, parametros: dict, primera: bool):
+        inicio = time.perf_counter()
+        try:
+            resultado = db.execute(self.sentencia, parametros)
+            if primera:
+                filas = resultado.first()
+                cantidad = int(filas is not None)
+            else:
+                filas = resultado.fetchall()
+                cantidad = len(filas)
+        except Exception:
+            with _lock:
+                self._stats.errores += 1
+            raise
+        duracion = time.perf_counter() - inicio
+        with _lock:
+            stats = self._stats
+            stats.ejecuciones += 1
+            stats.filas += cantidad
+            stats.segundos += duracion
+            stats.maximo_ms = max(stats.maximo_ms, duracion * 1000)
+            stats.recientes.append(duracion * 1000)
+        if duracion * 1000 >= CONSULTA_LENTA_MS:
+            print(
+                f"🐢 Consulta lenta del chatbot '{self.nombre}': "
+                f"{duracion * 1000:.1f} ms, {cantidad} filas"
+            )
+        return filas
+
+
+_lock = threading.Lock()
+_consultas: Dict[str, Consulta] = {}
+
+
+def registrar(nombre: str, sentencia, columnas: Optional[dict] = None, **tipos) -> Consulta:
+    """Registrar una consulta de lectura: SQL (con parámetros :nombre y sus tipos) o sentencia Core.
+
+    `columnas` tipa columnas del resultado del SQL (p. ej. fechas, que algunos
+    drivers devuelven como texto si la consulta no declara el tipo).
+    """
+    if nombre in _consultas:
+        raise ValueError(f"Consulta '{nombre}' ya registrada")
+    if isinstance(sentencia, str):
+        sentencia = text(sentencia)
+        if tipos:
+            sentencia = sentencia.bindparams(
+                *(bindparam(parametro, type_=tipo) for parametro, tipo in tipos.items())
+            )
+        # Como TextualSelect (is_select) la sesión de lectura la envía a la réplica
+        sentencia = sentencia.columns(**(columnas or {}))
+    consulta = _consultas[nombre] = Consulta(nombre, sentencia)
+    return consulta
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(len(ordenados) * p) - 1)]
+
+
+def stats(nombre: Optional[str] = None) -> dict:
+    """Ejecuciones, errores, filas y latencia (promedio, p50, p95, máximo) por consulta"""
+    resultado = {}
+    with _lock:
+        for consulta in _consultas.values():
+            if nombre and consulta.nombre != nombre:
+                continue
+            s = consulta._stats
+            recientes = list(s.recientes)
+            resultado[consulta.nombre] = {
+                "ejecuciones": s.ejecuciones,
+                "errores": s.errores,
+                "filas_total": s.filas,
+                "filas_promedio": round(s.filas / s.ejecuciones, 2) if s.ejecuciones else 0.0,
+                "segundos_total": round(s.segundos, 6),
+                "promedio_ms": round(s.segundos * 1000 / s.ejecuciones, 3) if s.ejecuciones else 0.0,
+                "p50_ms": round(_percentil(recientes, 0.50), 3) if recientes else 0.0,
+                "p95_ms": round(_percentil(recientes, 0.95), 3) if recientes else 0.0,
+                "maximo_ms": round(s.maximo_ms, 3),
+            }
+    return resultado
+
+
+def _metricas_consultas():
+    valores = stats()
+    if not valores:
+        return []
+    lineas = [
+        "# HELP svt_chatbot_query_executions_total Ejecuciones de las consultas del chatbot",
+        "# TYPE svt_chatbot_query_executions_total counter",
+    ]
+    for nombre, s in valores.items():
+        lineas.append(f'svt_chatbot_query_executions_total{{query="{nombre}"}} {s["ejecuciones"]}')
+    lineas += [
+        "# HELP svt_chatbot_query_errors_total Ejecuciones fallidas de las consultas del chatbot",
+        "# TYPE svt_chatbot_query_errors_total counter",
+    ]
+    for nombre, s in valores.items():
+        lineas.append(f'svt_chatbot_query_errors_total{{query="{nombre}"}} {s["errores"]}')
+    lineas += [
+        "# HELP svt_chatbot_query_rows_total Filas devueltas por las consultas del chatbot",
+        "# TYPE svt_chatbot_query_rows_total counter",
+    ]
+    for nombre, s in valores.items():
+        lineas.append(f'svt_chatbot_query_rows_total{{query="{nombre}"}} {s["filas_total"]}')
+    lineas += [
+        "# HELP svt_chatbot_query_seconds_total Tiempo acumulado de las consultas del chatbot",
+        "# TYPE svt_chatbot_query_seconds_total counter",
+    ]
+    for nombre, s in valores.items():
+        lineas.append(f'svt_chatbot_query_seconds_total{{query="{nombre}"}} {s["segundos_total"]}')
+    return lineas
+
+
+metrics.add_collector(_metricas_consultas)
@@ -0,0 +1,155 @@
+# services/reference_cache.py
+"""
+Caché en proceso para tablas de referencia pequeñas (categorías, proveedores, bodegas).
+
+Cada entrada guarda la versión compartida del recurso (utils.resource_versions,
+la misma de los ETags) con la que se cargó; cuando una escritura de cualquier
+worker incrementa la versión, la siguiente lectura la detecta (como mucho tras
+la ventana TTL de las versiones) y recarga desde la base de datos. Los valores
+son modelos Pydantic desacoplados de la sesión, seguros para compartir entre
+peticiones; no deben modificarse.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from utils import metrics
+from utils.resource_versions import shared_versions
+
+
+class _Entrada:
+    __slots__ = ("version", "valores", "por_id")
+
+    def __init__(self, version: int, valores: list):
+        self.version = version
+        self.valores = valores
+        self.por_id = {valor.id: valor for valor in valores}
+
+
+class _Estadisticas:
+    __slots__ = ("aciertos", "fallos", "recargas", "segundos_recarga", "ultima_recarga_ms")
+
+    def __init__(self):
+        self.aciertos = 0
+        self.fallos = 0
+        self.recargas = 0
+        self.segundos_recarga = 0.0
+        self.ultima_recarga_ms = 0.0
+
+
+class ReferenceCache:
+    """Caché de lectura con recarga perezosa por versión de recurso"""
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[Session], list]] = {}
+        self._entradas: Dict[str, _Entrada] = {}
+        self._stats: Dict[str, _Estadisticas] = {}
+        self._lock = threading.Lock()
+
+    def register(self, nombre: str, loader: Callable[[Session], list]):
+        """Registrar el cargador de una tabla de referencia (nombre = recurso versionado)"""
+        self._loaders[nombre] = loader
+        self._stats[nombre] = _Estadisticas()
+
+    def _entrada(self, nombre: str, db: Session, fresh: bool = False) -> _Entrada:
+        (version,) = shared_versions(nombre, fresh=fresh)
+        entrada = self._entradas.get(nombre)
+        stats = self._stats[nombre]
+
+        if entrada is not None and entrada.version == version:
+            stats.aciertos += 1
+            return entrada
+
+        stats.fallos += 1
+        inicio = time.perf_counter()
+        # La versión se lee antes de cargar: si hay una escritura concurrente
+        # la entrada queda con la versión vieja y se recarga en la próxima lectura
+        if db.info.get("replica") is not None:
+            # Una réplica atrasada dejaría datos viejos con la versión nueva
+            with SessionLocal() as primario:
+                entrada = _Entrada(version, self._loaders[nombre](primario))
+        else:
+            entrada = _Entrada(version, self._loaders[nombre](db))
+        duracion = time.perf_counter() - inicio
+
+        with self._lock:
+            self._entradas[nombre] = entrada
+            stats.recargas += 1
+            stats.segundos_recarga += duracion
+            stats.ultima_recarga_ms = round(duracion * 1000, 3)
+        return entrada
+
+    def get_all(self, nombre: str, db: Session, fresh: bool = False) -> List:
+        """Obtener todos los registros cacheados de una tabla de referencia
+
+        fresh=True confirma la versión en la base de datos aunque no haya vencido
+        su ventana (para validar contra registros creados en otros workers).
+        """
+        return self._entrada(nombre, db, fresh).valores
+
+    def get_by_id(self, nombre: str, db: Session, id: int) -> Optional[object]:
+        """Obtener un registro cacheado por ID (None si no existe)"""
+        valor = self._entrada(nombre, db).por_id.get(id)
+        if valor is None:
+            # Puede haberse creado en otro worker dentro de la ventana de versiones
+            valor = self._entrada(nombre, db, fresh=True).por_id.get(id)
+        return valor
+
+    def invalidate(self, *nombres: str):
+        """Descartar entradas locales sin cambiar las versiones"""
+        with self._lock:
+            for nombre in nombres or list(self._entradas):
+                self._entradas.pop(nombre, None)
+
+    def stats(self) -> dict:
+        """Contadores por tabla: aciertos, fallos, tasa de aciertos y costo de recarga"""
+        resultado = {}
+        for nombre, stats in list(self._stats.items()):
+            total = stats.aciertos + stats.fallos
+            resultado[nombre] = {
+                "aciertos": stats.aciertos,
+                "fallos": stats.fallos,
+                "tasa_aciertos": round(stats.aciertos / total, 4) if total else 0.0,
+                "recargas": stats.recargas,
+                "segundos_recarga_total": round(stats.segundos_recarga, 6),
+                "ultima_recarga_ms": stats.ultima_recarga_ms,
+                "registros": len(self._entradas[nombre].valores)
+                if nombre in self._entradas
+                else 0,
+            }
+        return resultado
+
+
+reference_cache = ReferenceCache()
+
+
+def _metricas_cache():
+    lineas = [
+        "# HELP svt_reference_cache_hits_total Aciertos de la caché de referencia",
+        "# TYPE svt_reference_cache_hits_total counter",
+    ]
+    stats = reference_cache.stats()
+    for tabla, valores in stats.items():
+        lineas.append(f'svt_reference_cache_hits_total{{tabla="{tabla}"}} {valores["aciertos"]}')
+    lineas += [
+        "# HELP svt_reference_cache_misses_total Fallos (recargas) de la caché de referencia",
+        "# TYPE svt_reference_cache_misses_total counter",
+    ]
+    for tabla, valores in stats.items():
+        lineas.append(f'svt_reference_cache_misses_total{{tabla="{tabla}"}} {valores["fallos"]}')
+    lineas += [
+        "# HELP svt_reference_cache_reload_seconds_total Tiempo total de recarga",
+        "# TYPE svt_reference_cache_reload_seconds_total counter",
+    ]
+    for tabla, valores in stats.items():
+        lineas.append(
+            f'svt_reference_cache_reload_seconds_total{{tabla="{tabla}"}} {valores["segundos_recarga_total"]}'
+        )
+    return lineas
+
+
+metrics.add_collector(_metricas_cache)
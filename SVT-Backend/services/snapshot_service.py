@@ -0,0 +1,357 @@
+# services/snapshot_service.py
+"""
+Snapshots periódicos de stock por producto y bodega.
+
+Cada corte guarda el saldo de cierre de todas las claves (producto, bodega)
+con saldo distinto de cero. Un corte se calcula a partir del anterior más los
+movimientos del periodo, en una sola sentencia INSERT ... SELECT, y se
+confirma en su propia transacción junto con su fila en snapshot_cortes: si la
+generación se interrumpe, la siguiente ejecución continúa desde el último
+corte completo.
+
+Regla de saldo por bodega (la misma que aplican los servicios sobre
+StockBodega): AJUSTE_POSITIVO, INVENTARIO_INICIAL y TRANSFERENCIA_ENTRADA suman
+en la bodega destino; AJUSTE_NEGATIVO y TRANSFERENCIA_SALIDA restan en la
+bodega origen. Los movimientos genéricos ENTRADA/SALIDA no afectan el stock
+por bodega.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, and_, case, func, insert, literal, select, text, union_all
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from services.partition_service import to_utc_naive
+
+INTERVALO = os.getenv("SNAPSHOT_INTERVALO", "mensual")  # mensual | diario
+# Margen para no cerrar un periodo con transacciones aún en curso
+MARGEN_CIERRE = timedelta(minutes=int(os.getenv("SNAPSHOT_MARGEN_MINUTOS", "5")))
+INTERVALO_MANTENIMIENTO = int(os.getenv("SNAPSHOT_MANTENIMIENTO_SEGUNDOS", "3600"))
+
+TIPOS_ENTRADA_BODEGA = (
+    models.TipoMovimiento.AJUSTE_POSITIVO,
+    models.TipoMovimiento.INVENTARIO_INICIAL,
+    models.TipoMovimiento.TRANSFERENCIA_ENTRADA,
+)
+TIPOS_SALIDA_BODEGA = (
+    models.TipoMovimiento.AJUSTE_NEGATIVO,
+    models.TipoMovimiento.TRANSFERENCIA_SALIDA,
+)
+
+_M = models.MovimientoInventario
+_S = models.SnapshotStock
+
+
+def delta_movimiento(movimiento, bodega_id: Optional[int] = None) -> int:
+    """Efecto de un movimiento en el stock de una bodega (o de todas)"""
+    tipo = movimiento.tipo_movimiento
+    if tipo in TIPOS_ENTRADA_BODEGA and movimiento.bodega_destino_id is not None:
+        if bodega_id is None or movimiento.bodega_destino_id == bodega_id:
+            return movimiento.cantidad
+    elif tipo in TIPOS_SALIDA_BODEGA and movimiento.bodega_origen_id is not None:
+        if bodega_id is None or movimiento.bodega_origen_id == bodega_id:
+            return -movimiento.cantidad
+    return 0
+
+
+def delta_columna(bodega_id: Optional[int] = None):
+    """Expresión SQL equivalente a delta_movimiento"""
+    entrada = and_(_M.tipo_movimiento.in_(TIPOS_ENTRADA_BODEGA), _M.bodega_destino_id.isnot(None))
+    salida = and_(_M.tipo_movimiento.in_(TIPOS_SALIDA_BODEGA), _M.bodega_origen_id.isnot(None))
+    if bodega_id is not None:
+        entrada = and_(entrada, _M.bodega_destino_id == bodega_id)
+        salida = and_(salida, _M.bodega_origen_id == bodega_id)
+    return case((entrada, _M.cantidad), (salida, -_M.cantidad), else_=0)
+
+
+def _siguiente_corte(fecha: datetime, intervalo: str = None) -> datetime:
+    """Primer corte estrictamente posterior a una fecha"""
+    intervalo = intervalo or INTERVALO
+    dia = datetime(fecha.year, fecha.month, fecha.day)
+    if intervalo == "diario":
+        return dia + timedelta(days=1)
+    if fecha.month == 12:
+        return datetime(fecha.year + 1, 1, 1)
+    return datetime(fecha.year, fecha.month + 1, 1)
+
+
+def _deltas(
+    desde: Optional[datetime],
+    hasta: datetime,
+    inclusivo: bool,
+    producto_id: Optional[int] = None,
+    bodega_id: Optional[int] = None,
+) -> List:
+    """SELECTs (producto_id, bodega_id, delta) de los movimientos de un rango"""
+
+    def filtrar(consulta, columna_bodega):
+        if desde is not None:
+            consulta = consulta.where(_M.fecha_movimiento >= desde)
+        consulta = consulta.where(
+            _M.fecha_movimiento <= hasta if inclusivo else _M.fecha_movimiento < hasta
+        )
+        if producto_id is not None:
+            consulta = consulta.where(_M.producto_id == producto_id)
+        if bodega_id is not None:
+            consulta = consulta.where(columna_bodega == bodega_id)
+        return consulta.where(columna_bodega.isnot(None))
+
+    entradas = filtrar(
+        select(
+            _M.producto_id,
+            _M.bodega_destino_id.label("bodega_id"),
+            _M.cantidad.label("delta"),
+        ).where(_M.tipo_movimiento.in_(TIPOS_ENTRADA_BODEGA)),
+        _M.bodega_destino_id,
+    )
+    salidas = filtrar(
+        select(
+            _M.producto_id,
+            _M.bodega_origen_id.label("bodega_id"),
+            (-_M.cantidad).label("delta"),
+        ).where(_M.tipo_movimiento.in_(TIPOS_SALIDA_BODEGA)),
+        _M.bodega_origen_id,
+    )
+    return [entradas, salidas]
+
+
+def _saldos_corte(
+    corte: datetime, producto_id: Optional[int] = None, bodega_id: Optional[int] = None
+):
+    consulta = select(_S.producto_id, _S.bodega_id, _S.cantidad.label("delta")).where(
+        _S.fecha_corte == corte
+    )
+    if producto_id is not None:
+        consulta = consulta.where(_S.producto_id == producto_id)
+    if bodega_id is not None:
+        consulta = consulta.where(_S.bodega_id == bodega_id)
+    return consulta
+
+
+def ultimo_corte(db: Session, hasta: Optional[datetime] = None) -> Optional[datetime]:
+    """Corte completo más reciente (opcionalmente no posterior a una fecha)"""
+    consulta = db.query(func.max(models.SnapshotCorte.fecha_corte))
+    if hasta is not None:
+        consulta = consulta.filter(models.SnapshotCorte.fecha_corte <= hasta)
+    return consulta.scalar()
+
+
+def stock_a_fecha(
+    db: Session,
+    fecha: datetime,
+    producto_id: Optional[int] = None,
+    bodega_id: Optional[int] = None,
+    inclusivo: bool = True,
+) -> Dict[Tuple[int, int], int]:
+    """Saldo por (producto, bodega) en una fecha: snapshot más cercano + movimientos.
+
+    Con inclusivo=False se excluyen los movimientos exactamente en `fecha`
+    (saldo inicial de un periodo).
+    """
+    fecha = to_utc_naive(fecha)
+    corte = ultimo_corte(db, fecha)
+
+    partes = _deltas(corte, fecha, inclusivo, producto_id, bodega_id)
+    if corte is not None:
+        partes.append(_saldos_corte(corte, producto_id, bodega_id))
+    union = union_all(*partes).subquery()
+
+    filas = db.execute(
+        select(union.c.producto_id, union.c.bodega_id, func.sum(union.c.delta))
+        .group_by(union.c.producto_id, union.c.bodega_id)
+        .having(func.sum(union.c.delta) != 0)
+    )
+    return {(producto, bodega): int(cantidad) for producto, bodega, cantidad in filas}
+
+
+def _movimientos_saldo(
+    desde: Optional[datetime],
+    hasta: datetime,
+    producto_id: Optional[int] = None,
+    bodega_id: Optional[int] = None,
+) -> List:
+    """SELECTs de los movimientos que fijan el saldo de una bodega (con stock_posterior)"""
+    consultas = []
+    for tipos, columna_bodega in (
+        (TIPOS_ENTRADA_BODEGA, _M.bodega_destino_id),
+        (TIPOS_SALIDA_BODEGA, _M.bodega_origen_id),
+    ):
+        consulta = select(
+            _M.producto_id,
+            columna_bodega.label("bodega_id"),
+            _M.stock_posterior,
+            _M.fecha_movimiento,
+            _M.id,
+        ).where(
+            _M.tipo_movimiento.in_(tipos),
+            columna_bodega.isnot(None),
+            _M.fecha_movimiento <= hasta,
+        )
+        if desde is not None:
+            consulta = consulta.where(_M.fecha_movimiento >= desde)
+        if producto_id is not None:
+            consulta = consulta.where(_M.producto_id == producto_id)
+        if bodega_id is not None:
+            consulta = consulta.where(columna_bodega == bodega_id)
+        consultas.append(consulta)
+    return consultas
+
+
+def stock_historico(
+    db: Session,
+    fecha: datetime,
+    producto_id: Optional[int] = None,
+    bodega_id: Optional[int] = None,
+) -> Tuple[Optional[datetime], Dict[Tuple[int, int], int]]:
+    """Saldo por (producto, bodega) en una fecha según el último movimiento <= fecha.
+
+    Usa stock_posterior del último movimiento de cada clave en lugar de sumar
+    el historial. Para una sola clave son dos búsquedas por índice (LIMIT 1);
+    en otro caso solo se recorren los movimientos posteriores al snapshot más
+    cercano, y las claves sin movimientos desde entonces toman el saldo del
+    snapshot. Devuelve el corte usado y los saldos distintos de cero.
+    """
+    fecha = to_utc_naive(fecha)
+
+    if producto_id is not None and bodega_id is not None:
+        ultimo = None
+        for consulta in _movimientos_saldo(None, fecha, producto_id, bodega_id):
+            fila = db.execute(
+                consulta.order_by(_M.fecha_movimiento.desc(), _M.id.desc()).limit(1)
+            ).first()
+            if fila and (
+                ultimo is None
+                or (fila.fecha_movimiento, fila.id) > (ultimo.fecha_movimiento, ultimo.id)
+            ):
+                ultimo = fila
+        return None, {(producto_id, bodega_id): ultimo.stock_posterior if ultimo else 0}
+
+    corte = ultimo_corte(db, fecha)
+    saldos = {}
+    if corte is not None:
+        saldos = {
+            (producto, bodega): cantidad
+            for producto, bodega, cantidad in db.execute(
+                _saldos_corte(corte, producto_id, bodega_id)
+            )
+        }
+
+    union = union_all(*_movimientos_saldo(corte, fecha, producto_id, bodega_id)).subquery()
+    ordenados = select(
+        union.c.producto_id,
+        union.c.bodega_id,
+        union.c.stock_posterior,
+        func.row_number()
+        .over(
+            partition_by=(union.c.producto_id, union.c.bodega_id),
+            order_by=(union.c.fecha_movimiento.desc(), union.c.id.desc()),
+        )
+        .label("orden"),
+    ).subquery()
+    for producto, bodega, cantidad in db.execute(
+        select(ordenados.c.producto_id, ordenados.c.bodega_id, ordenados.c.stock_posterior)
+        .where(ordenados.c.orden == 1)
+    ):
+        saldos[(producto, bodega)] = cantidad
+
+    return corte, {clave: cantidad for clave, cantidad in saldos.items() if cantidad}
+
+
+def _generar_corte(db: Session, corte: datetime, anterior: Optional[datetime]) -> bool:
+    """Generar un corte y confirmarlo; devuelve False si otro proceso ya lo hizo"""
+    inicio = time.perf_counter()
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:clave))"),
+            {"clave": models.SnapshotCorte.__tablename__},
+        )
+    if db.get(models.SnapshotCorte, corte) is not None:
+        db.rollback()
+        return False
+
+    partes = _deltas(anterior, corte, inclusivo=False)
+    if anterior is not None:
+        partes.append(_saldos_corte(anterior))
+    union = union_all(*partes).subquery()
+    resultado = db.execute(
+        insert(_S).from_select(
+            ["producto_id", "bodega_id", "fecha_corte", "cantidad"],
+            select(
+                union.c.producto_id,
+                union.c.bodega_id,
+                literal(corte, DateTime),
+                func.sum(union.c.delta),
+            )
+            .group_by(union.c.producto_id, union.c.bodega_id)
+            .having(func.sum(union.c.delta) != 0),
+        )
+    )
+    db.add(
+        models.SnapshotCorte(
+            fecha_corte=corte,
+            intervalo=INTERVALO,
+            filas=resultado.rowcount,
+            segundos=round(time.perf_counter() - inicio, 3),
+        )
+    )
+    db.commit()
+    return True
+
+
+def generar_snapshots(db: Session, hasta: Optional[datetime] = None) -> List[datetime]:
+    """Generar los cortes pendientes hasta `hasta` (por defecto, ahora menos el margen)"""
+    limite = to_utc_naive(hasta) if hasta else (
+        datetime.now(timezone.utc).replace(tzinfo=None) - MARGEN_CIERRE
+    )
+
+    anterior = ultimo_corte(db)
+    if anterior is None:
+        primera = db.query(func.min(_M.fecha_movimiento)).scalar()
+        if primera is None:
+            return []
+        corte = _siguiente_corte(primera)
+    else:
+        corte = _siguiente_corte(anterior)
+    db.rollback()  # No mantener la transacción de lectura abierta entre cortes
+
+    generados = []
+    while corte <= limite:
+        if _generar_corte(db, corte, anterior):
+            generados.append(corte)
+            print(f"📸 Snapshot de stock generado para el corte {corte.isoformat()}")
+        anterior, corte = corte, _siguiente_corte(corte)
+    return generados
+
+
+def get_cortes(db: Session, limit: int = 100):
+    """Obtener los cortes generados, del más reciente al más antiguo"""
+    return (
+        db.query(models.SnapshotCorte)
+        .order_by(models.SnapshotCorte.fecha_corte.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _generar_pendientes():
+    db = SessionLocal()
+    try:
+        generar_snapshots(db)
+    finally:
+        db.close()
+
+
+async def maintenance_loop():
+    """Generar periódicamente los cortes que vayan cerrando"""
+    while True:
+        try:
+            await asyncio.to_thread(_generar_pendientes)
+        except Exception as e:
+            print(f"⚠️  Error generando snapshots de stock: {e}")
+        await asyncio.sleep(INTERVALO_MANTENIMIENTO)
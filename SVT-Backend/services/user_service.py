@@ -41,7 +41,6 @@ class UserService:
 
             self.db.add(db_user)
             self.db.commit()
-            self.db.refresh(db_user)
 
             return db_user
 
@@ -88,7 +87,6 @@ class UserService:
             setattr(db_user, field, value)
 
         self.db.commit()
-        self.db.refresh(db_user)
 
         return db_user
 
@@ -101,7 +99,6 @@ class UserService:
 
         db_user.rol = new_role
         self.db.commit()
-        self.db.refresh(db_user)
 
         return db_user
 
@@ -0,0 +1,105 @@
+"""Planes de las consultas calientes: cada una debe usar alguno de sus índices (solo PostgreSQL)"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import insert, text
+
+import database
+import models
+from benchmarks.explain_indices import CASOS, capturar_sql, indices_del_plan
+from services import partition_service
+
+pytestmark = pytest.mark.skipif(
+    database.engine.dialect.name != "postgresql", reason="EXPLAIN requiere PostgreSQL"
+)
+
+PRODUCTOS = 5000
+BODEGAS = 5
+MOVIMIENTOS = 30000
+DIAS = 90
+
+
+@pytest.fixture
+def datos(db, catalogo):
+    """Catálogo con volumen suficiente para que el planificador prefiera los índices"""
+    aleatorio = random.Random(42)
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+    with database.engine.begin() as conn:
+        partition_service.create_partitions(conn, desde=ahora - timedelta(days=DIAS))
+
+    bodegas = [b.id for b in catalogo["bodegas"]]
+    for i in range(len(bodegas), BODEGAS):
+        bodega = models.Bodega(nombre=f"Bodega {i + 1}", codigo=f"B{i + 1}")
+        db.add(bodega)
+        db.flush()
+        bodegas.append(bodega.id)
+
+    productos = db.execute(
+        insert(models.Producto).returning(models.Producto.id),
+        [
+            {
+                "sku": f"SKU-{i}",
+                "nombre": f"Producto {i}",
+                "proveedor_id": catalogo["proveedor"].id,
+                "categoria_id": catalogo["categoria"].id,
+                "precio_unitario": 10,
+                # ~1 % en alerta (stock_actual <= stock_minimo)
+                "stock_actual": 0 if i % 100 == 0 else 50,
+                "stock_minimo": 5,
+            }
+            for i in range(PRODUCTOS)
+        ],
+    ).scalars().all()
+    db.execute(
+        insert(models.StockBodega),
+        [
+            {
+                "producto_id": producto_id,
+                "bodega_id": bodega_id,
+                # La mayoría de los pares sin existencias
+                "cantidad": 10 if aleatorio.random() < 0.1 else 0,
+            }
+            for producto_id in productos
+            for bodega_id in bodegas
+        ],
+    )
+    db.execute(
+        insert(models.MovimientoInventario),
+        [
+            {
+                "producto_id": aleatorio.choice(productos),
+                "tipo_movimiento": models.TipoMovimiento.ENTRADA,
+                "cantidad": 1,
+                "usuario_id": catalogo["usuario"].id,
+                "fecha_movimiento": ahora - timedelta(minutes=aleatorio.randrange(DIAS * 24 * 60)),
+                "bodega_destino_id": aleatorio.choice(bodegas),
+            }
+            for _ in range(MOVIMIENTOS)
+        ],
+    )
+    db.commit()
+    for tabla in ("productos", "stock_bodega", "movimientos_inventario"):
+        db.execute(text(f"ANALYZE {tabla}"))
+    db.commit()
+    return SimpleNamespace(producto=productos[0], bodega=bodegas[0])
+
+
+def test_consultas_usan_sus_indices(db, datos):
+    # Un solo test para sembrar una vez; el mensaje lista todos los casos que fallan
+    fallos = []
+    for nombre, tabla, funcion, esperados in CASOS:
+        sentencia, parametros = capturar_sql(db, lambda: funcion(db, datos), tabla)
+        if sentencia is None:
+            fallos.append(f"{nombre}: no se capturó ninguna consulta sobre {tabla}")
+            continue
+        indices, secuenciales, _ = indices_del_plan(db, sentencia, parametros)
+        db.rollback()
+        if not indices & esperados:
+            fallos.append(
+                f"{nombre}: índices={sorted(indices)} seq_scan={secuenciales} "
+                f"(se esperaba alguno de {sorted(esperados)})"
+            )
+    assert not fallos, "\n".join(fallos)
@@ -0,0 +1,75 @@
+import io
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import models
+# Los servicios de catálogo registran los cargadores de la caché de referencia
+from services import categoria_service, import_service, inventory_service, proveedor_service  # noqa: F401
+
+
+def _fila(catalogo, sku: str) -> dict:
+    return {
+        "sku": sku,
+        "nombre": f"Producto {sku}",
+        "descripcion": "Importado",
+        "categoria_id": catalogo["categoria"].id,
+        "precio_unitario": 10,
+        "proveedor_id": catalogo["proveedor"].id,
+        "stock_minimo": 2,
+        "stock_inicial": 5,
+        "bodega_id": catalogo["bodegas"][0].id,
+    }
+
+
+def _importar(db, catalogo, contenido: bytes, formato: str):
+    filas = import_service.leer_filas(io.BytesIO(contenido), formato)
+    return import_service.importar_productos(db, filas, usuario_id=catalogo["usuario"].id)
+
+
+def test_ndjson_con_lineas_invalidas(db, catalogo):
+    lineas = [
+        json.dumps(_fila(catalogo, "N-1")).encode(),
+        b'{"sku": "N-2", ',
+        b'["N-3"]',
+        b'"N-4"',
+        b"42",
+        b'{"sku": "N-5", "nombre": "Sin otros campos"}',
+        '{"sku": "N-6", "nombre": "Café"}'.encode("latin-1"),
+        json.dumps(_fila(catalogo, "N-7")).encode(),
+    ]
+    resultado = _importar(db, catalogo, b"\n".join(lineas) + b"\n", "ndjson")
+
+    assert resultado["total_filas"] == 8
+    assert resultado["importados"] == 2
+    errores = {error["fila"]: error for error in resultado["errores"]}
+    assert sorted(errores) == [2, 3, 4, 5, 6, 7]
+    assert errores[2]["error"].startswith("JSON inválido")
+    assert errores[3]["error"] == errores[4]["error"] == errores[5]["error"] == (
+        "La línea debe ser un objeto JSON"
+    )
+    assert errores[6]["sku"] == "N-5"
+    assert errores[7]["error"] == "La línea no está codificada en UTF-8"
+    assert {p.sku for p in db.query(models.Producto)} == {"N-1", "N-7"}
+
+
+def test_ndjson_con_bom(db, catalogo):
+    contenido = b"\xef\xbb\xbf" + json.dumps(_fila(catalogo, "B-1")).encode() + b"\r\n"
+    assert _importar(db, catalogo, contenido, "ndjson")["importados"] == 1
+
+
+def test_csv_no_utf8(db, catalogo):
+    fila = _fila(catalogo, "C-1")
+    encabezado = ",".join(fila).encode()
+    valores = ",".join(str(valor) for valor in fila.values())
+    contenido = b"\n".join(
+        [encabezado, valores.encode(), valores.replace("C-1", "C-ñ").encode("latin-1")]
+    )
+
+    with pytest.raises(HTTPException) as error:
+        _importar(db, catalogo, contenido, "csv")
+
+    assert error.value.status_code == 400
+    assert "UTF-8" in error.value.detail
+    assert db.query(models.Producto).count() == 0
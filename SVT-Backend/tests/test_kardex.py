@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import database
+import models
+from services import inventory_service, partition_service, snapshot_service
+
+
+def _inicio_mes_anterior() -> datetime:
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+    anterior = ahora.replace(day=1) - timedelta(days=1)
+    return datetime(anterior.year, anterior.month, 1)
+
+
+@pytest.fixture
+def historial(db, catalogo):
+    """Producto con movimientos antes y después de un corte de snapshot"""
+    corte = _inicio_mes_anterior()
+    with database.engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            partition_service.create_partitions(conn, desde=corte - timedelta(days=10))
+
+    bodega = catalogo["bodegas"][0]
+    producto = models.Producto(
+        sku="K-1", nombre="Kardex", proveedor_id=catalogo["proveedor"].id, stock_actual=9
+    )
+    db.add(producto)
+    db.flush()
+
+    def movimiento(dias: float, tipo: models.TipoMovimiento, cantidad: int):
+        entrada = tipo == models.TipoMovimiento.AJUSTE_POSITIVO
+        return models.MovimientoInventario(
+            producto_id=producto.id,
+            tipo_movimiento=tipo,
+            cantidad=cantidad,
+            usuario_id=catalogo["usuario"].id,
+            fecha_movimiento=corte + timedelta(days=dias),
+            bodega_destino_id=bodega.id if entrada else None,
+            bodega_origen_id=None if entrada else bodega.id,
+        )
+
+    positivo, negativo = models.TipoMovimiento.AJUSTE_POSITIVO, models.TipoMovimiento.AJUSTE_NEGATIVO
+    db.add_all(
+        [
+            # Antes del corte: saldo 10 + 5 - 3 = 12
+            movimiento(-5, positivo, 10),
+            movimiento(-4, positivo, 5),
+            movimiento(-3, negativo, 3),
+            # Después del corte: 12 - 4 + 2 - 1 = 9
+            movimiento(1, negativo, 4),
+            movimiento(2, positivo, 2),
+            movimiento(3, negativo, 1),
+        ]
+    )
+    db.commit()
+    assert snapshot_service.generar_snapshots(db, hasta=corte) == [corte]
+    return producto, bodega, corte
+
+
+def test_kardex_sin_fechas_incluye_todo_el_historial(db, historial):
+    producto, bodega, corte = historial
+    kardex = inventory_service.get_kardex(db, producto.id, bodega_id=bodega.id)
+
+    # Movimientos a ambos lados del corte
+    assert [m.saldo for m in kardex["movimientos"]] == [9, 10, 8, 12, 15, 10]
+    assert kardex["saldo_inicial"] == 0
+    assert kardex["hay_mas"] is False
+
+
+def test_kardex_con_historial_archivado(db, historial):
+    producto, bodega, corte = historial
+    # Retención: los movimientos anteriores al corte ya no están
+    db.query(models.MovimientoInventario).filter(
+        models.MovimientoInventario.fecha_movimiento < corte
+    ).delete()
+    db.commit()
+
+    kardex = inventory_service.get_kardex(db, producto.id, bodega_id=bodega.id)
+
+    assert kardex["saldo_inicial"] == 12
+    assert [m.saldo for m in kardex["movimientos"]] == [9, 10, 8]
+    assert kardex["hay_mas"] is False
+
+
+def test_kardex_paginado(db, historial):
+    producto, bodega, corte = historial
+    paginas = [
+        inventory_service.get_kardex(db, producto.id, bodega_id=bodega.id, skip=skip, limit=2)
+        for skip in (0, 2, 4)
+    ]
+
+    # La segunda página cruza el corte del snapshot
+    assert [[m.saldo for m in p["movimientos"]] for p in paginas] == [[9, 10], [8, 12], [15, 10]]
+    assert [p["saldo_inicial"] for p in paginas] == [8, 15, 0]
+    assert [p["hay_mas"] for p in paginas] == [True, True, False]
+
+
+def test_kardex_con_fecha_inicio_antes_del_corte(db, historial):
+    producto, bodega, corte = historial
+    kardex = inventory_service.get_kardex(
+        db, producto.id, fecha_inicio=corte - timedelta(days=4), bodega_id=bodega.id
+    )
+
+    assert kardex["saldo_inicial"] == 10
+    assert [m.saldo for m in kardex["movimientos"]] == [9, 10, 8, 12, 15]
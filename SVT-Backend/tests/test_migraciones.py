@@ -0,0 +1,44 @@
+"""Las migraciones sobre una base vacía llegan al esquema de models.py"""
+
+import pytest
+from sqlalchemy import inspect, text
+
+import database
+import migrations
+import models
+from migrations import runner
+
+
+@pytest.fixture
+def base_vacia():
+    engine = database.engine
+    yield engine
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {runner.TABLA}"))
+        conn.execute(text("DROP TABLE IF EXISTS movimientos_inventario_legacy"))
+    models.Base.metadata.drop_all(bind=engine)
+
+
+def test_esquema_de_las_migraciones(base_vacia):
+    aplicadas = migrations.upgrade(base_vacia)
+
+    assert aplicadas == [m.version for m in runner.descubrir()]
+    assert migrations.upgrade(base_vacia) == []
+
+    inspector = inspect(base_vacia)
+    faltan = {}
+    for tabla in models.Base.metadata.sorted_tables:
+        if not inspector.has_table(tabla.name):
+            faltan[tabla.name] = "tabla"
+            continue
+        columnas = {columna["name"] for columna in inspector.get_columns(tabla.name)}
+        if columnas != set(tabla.columns.keys()):
+            faltan[tabla.name] = sorted(columnas ^ set(tabla.columns.keys()))
+        if base_vacia.dialect.name == "postgresql":
+            # En SQLite los índices nuevos los crea create_all al arrancar (0004 es solo PostgreSQL)
+            indices = {indice["name"] for indice in inspector.get_indexes(tabla.name)}
+            sin_crear = {indice.name for indice in tabla.indexes} - indices
+            if sin_crear:
+                faltan[f"{tabla.name} (índices)"] = sorted(sin_crear)
+    assert not faltan
+    assert not inspector.has_table("movimientos_inventario_legacy")
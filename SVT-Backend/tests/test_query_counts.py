@@ -0,0 +1,188 @@
+"""Número exacto de sentencias SQL de las escrituras (caché de referencia caliente)"""
+
+import pytest
+
+import models
+import schemas
+from services import categoria_service, inventory_service, producto_service, proveedor_service
+from services.reference_cache import reference_cache
+from services.user_service import UserService
+from utils.query_guard import QueryRecorder
+
+
+@pytest.fixture
+def producto(db, catalogo):
+    creado = producto_service.create_producto(
+        db,
+        schemas.ProductoCreate(
+            sku="SKU-1",
+            nombre="Producto",
+            descripcion="Descripción",
+            categoria_id=catalogo["categoria"].id,
+            precio_unitario=10,
+            proveedor_id=catalogo["proveedor"].id,
+            stock_minimo=2,
+            stock_inicial=10,
+            bodega_id=catalogo["bodegas"][0].id,
+        ),
+    )
+    for nombre in ("proveedores", "categorias", "bodegas"):
+        reference_cache.get_all(nombre, db)
+    db.expunge_all()
+    return creado
+
+
+def contar(funcion, *args, **kwargs):
+    with QueryRecorder(check=False) as recorder:
+        funcion(*args, **kwargs)
+    return recorder.count
+
+
+def test_create_bodega(db):
+    # SELECT por código, INSERT y versión compartida
+    assert contar(
+        inventory_service.create_bodega, db, schemas.BodegaCreate(nombre="Nueva", codigo="BN")
+    ) == 3
+
+
+def test_update_bodega(db, catalogo):
+    bodega_id = catalogo["bodegas"][0].id
+    db.expunge_all()
+    # SELECT, UPDATE y versión compartida
+    assert contar(
+        inventory_service.update_bodega, db, bodega_id, schemas.BodegaUpdate(encargado="Ana")
+    ) == 3
+
+
+def test_create_categoria(db):
+    # INSERT y versión compartida
+    assert contar(
+        categoria_service.create_categoria,
+        db,
+        schemas.CategoriaCreate(nombre="Hogar", codigo="HOG"),
+    ) == 2
+
+
+def test_update_categoria(db, catalogo):
+    categoria_id = catalogo["categoria"].id
+    db.expunge_all()
+    # SELECT, UPDATE y versión compartida
+    assert contar(
+        categoria_service.update_categoria,
+        db,
+        categoria_id,
+        schemas.CategoriaCreate(nombre="General", codigo="GEN001", descripcion="Todo"),
+    ) == 3
+
+
+def test_create_proveedor(db):
+    # INSERT y versión compartida
+    assert contar(
+        proveedor_service.create_proveedor,
+        db,
+        schemas.ProveedorCreate(nombre="Otro", codigo="PROV2"),
+    ) == 2
+
+
+def test_update_proveedor(db, catalogo):
+    proveedor_id = catalogo["proveedor"].id
+    db.expunge_all()
+    # SELECT, UPDATE y versión compartida
+    assert contar(
+        proveedor_service.update_proveedor,
+        db,
+        proveedor_id,
+        schemas.ProveedorCreate(nombre="Proveedor", codigo="PROV1", telefono="555"),
+    ) == 3
+
+
+def test_create_producto(db, catalogo):
+    for nombre in ("proveedores", "categorias", "bodegas"):
+        reference_cache.get_all(nombre, db)
+    # INSERT de producto, movimiento y stock, versión compartida y evaluación
+    # de alertas (producto y estado)
+    assert contar(
+        producto_service.create_producto,
+        db,
+        schemas.ProductoCreate(
+            sku="SKU-2",
+            nombre="Producto",
+            descripcion="Descripción",
+            categoria_id=catalogo["categoria"].id,
+            precio_unitario=10,
+            proveedor_id=catalogo["proveedor"].id,
+            stock_minimo=2,
+            stock_inicial=10,
+            bodega_id=catalogo["bodegas"][0].id,
+        ),
+    ) == 6
+
+
+def test_update_producto(db, producto):
+    # SELECT del producto (con proveedor) y de sus stocks, UPDATE, versión
+    # compartida, evaluación de alertas y alta de la alerta (stock 10 <= 20)
+    assert contar(
+        producto_service.update_producto,
+        db,
+        producto["id"],
+        schemas.ProductoUpdate(nombre="Renombrado", stock_minimo=20),
+    ) == 7
+
+
+def test_update_producto_cambia_proveedor(db, producto):
+    otro = proveedor_service.create_proveedor(
+        db, schemas.ProveedorCreate(nombre="Otro", codigo="PROV2")
+    )
+    reference_cache.get_all("proveedores", db)
+    db.expunge_all()
+    # Como test_update_producto, con el SELECT del nuevo proveedor para la
+    # relación en lugar del alta de alerta
+    assert contar(
+        producto_service.update_producto,
+        db,
+        producto["id"],
+        schemas.ProductoUpdate(proveedor_id=otro.id),
+    ) == 7
+
+
+def test_create_movimiento(db, catalogo, producto):
+    # El usuario autenticado ya está en la sesión de la petición
+    usuario = db.get(models.User, catalogo["usuario"].id)
+    # SELECT de producto y bodega, UPDATE del stock, INSERT del movimiento,
+    # versión compartida y evaluación de alertas (producto y estado)
+    assert contar(
+        inventory_service.create_movimiento,
+        db,
+        schemas.MovimientoInventarioCreate(
+            producto_id=producto["id"],
+            tipo_movimiento=schemas.TipoMovimientoEnum.SALIDA,
+            cantidad=3,
+            motivo=schemas.MotivoMovimientoEnum.VENTA,
+            bodega_origen_id=catalogo["bodegas"][0].id,
+        ),
+        usuario_id=usuario.id,
+    ) == 7
+
+
+def test_user_service_create_user(db):
+    # SELECT por email e INSERT
+    assert contar(
+        UserService(db).create_user,
+        schemas.UserCreate(email="nuevo@example.com", password="secreta"),
+    ) == 2
+
+
+def test_user_service_update_user(db, catalogo):
+    usuario_id = catalogo["usuario"].id
+    db.expunge_all()
+    # SELECT y UPDATE
+    assert contar(
+        UserService(db).update_user, usuario_id, schemas.UserUpdate(nombre="Ana")
+    ) == 2
+
+
+def test_user_service_deactivate_user(db, catalogo):
+    usuario_id = catalogo["usuario"].id
+    db.expunge_all()
+    # SELECT y UPDATE
+    assert contar(UserService(db).deactivate_user, usuario_id) == 2
@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import select, text
+
+import models
+from utils.query_guard import (
+    LazyLoadNotAllowed,
+    QueryBudgetExceeded,
+    describe_violations,
+    repeated_shapes,
+    statement_shape,
+)
+
+
+def test_statement_shape_quita_literales_y_espacios():
+    forma = statement_shape("SELECT *\n  FROM productos\tWHERE sku = 'A-1' AND stock_actual < 10")
+    assert forma == "SELECT * FROM productos WHERE sku = ? AND stock_actual < ?"
+
+
+@pytest.mark.parametrize(
+    "lista",
+    ["(?, ?, ?)", "(%(id_1)s, %(id_2)s)", "(:p1, :p2, :p3, :p4)", "($1, $2)", "(%s, %s)"],
+)
+def test_statement_shape_colapsa_listas_in(lista):
+    forma = statement_shape(f"SELECT id FROM productos WHERE id IN {lista}")
+    assert forma == "SELECT id FROM productos WHERE id IN (...)"
+
+
+def test_statement_shape_conserva_parametro_unico():
+    assert statement_shape("SELECT id FROM productos WHERE id = (?)") == (
+        "SELECT id FROM productos WHERE id = (?)"
+    )
+
+
+def test_repeated_shapes_detecta_n_mas_1():
+    sentencias = [f"SELECT * FROM stock_bodega WHERE producto_id = {i}" for i in range(5)]
+    sentencias.append("SELECT * FROM productos")
+
+    assert repeated_shapes(sentencias, threshold=5) == {
+        "SELECT * FROM stock_bodega WHERE producto_id = ?": 5
+    }
+    assert repeated_shapes(sentencias, threshold=6) == {}
+
+
+def test_describe_violations_presupuesto_y_repeticiones():
+    sentencias = ["SELECT 1"] * 3
+    problemas = describe_violations(sentencias, budget=2, threshold=3)
+    assert problemas == ["3 consultas (presupuesto: 2)", "3x SELECT ?"]
+    assert describe_violations(sentencias, budget=3, threshold=4) == []
+
+
+def test_query_budget_falla_al_superar_el_presupuesto(db, query_budget):
+    with pytest.raises(QueryBudgetExceeded, match=r"2 consultas \(presupuesto: 1\)"):
+        with query_budget(1):
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
+
+
+def test_query_budget_falla_con_patron_repetido(db, query_budget):
+    with pytest.raises(QueryBudgetExceeded, match=r"3x SELECT"):
+        with query_budget(repeat_threshold=3):
+            for i in range(3):
+                db.execute(select(models.Producto).where(models.Producto.id == i))
+
+
+def test_query_budget_dentro_del_presupuesto(db, query_budget):
+    with query_budget(2) as recorder:
+        db.execute(text("SELECT 1"))
+    assert recorder.count == 1
+
+
+def test_strict_loading_rechaza_cargas_perezosas(db, catalogo, strict_loading):
+    producto = models.Producto(sku="S1", nombre="Producto", proveedor_id=catalogo["proveedor"].id)
+    db.add(producto)
+    db.flush()
+    db.add(models.MovimientoInventario(producto_id=producto.id, cantidad=1))
+    db.commit()
+    db.expunge_all()
+
+    movimiento = db.scalars(select(models.MovimientoInventario)).one()
+    with pytest.raises(LazyLoadNotAllowed, match="MovimientoInventario.producto"):
+        movimiento.producto
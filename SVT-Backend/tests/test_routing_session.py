@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine, insert, select, text, update
+
+import database
+import models
+
+
+@pytest.fixture
+def sesion():
+    replica = create_engine("sqlite://")
+    sesion = database.SessionLectura(info={"replica": replica})
+    yield sesion, replica
+    sesion.close()
+    replica.dispose()
+
+
+def test_select_va_a_la_replica(sesion):
+    sesion, replica = sesion
+    assert sesion.get_bind(clause=select(models.Producto)) is replica
+    assert sesion.get_bind(clause=select(models.Producto).union_all(select(models.Producto))) is replica
+
+
+@pytest.mark.parametrize(
+    "clausula",
+    [
+        text("UPDATE productos SET stock_actual = 0"),
+        text("INSERT INTO categorias (nombre) VALUES ('x')"),
+        text("SELECT 1"),
+        update(models.Producto).values(stock_actual=0),
+        insert(models.Categoria).values(nombre="x"),
+        select(models.Producto).with_for_update(),
+        None,
+    ],
+)
+def test_lo_demas_va_al_primario(sesion, clausula):
+    sesion, _ = sesion
+    assert sesion.get_bind(clause=clausula) is database.engine
+
+
+def test_consultas_registradas_van_a_la_replica(sesion):
+    from services import product_queries
+
+    sesion, replica = sesion
+    assert sesion.get_bind(clause=product_queries.PRODUCTOS.sentencia) is replica
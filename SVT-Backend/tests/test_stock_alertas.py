@@ -0,0 +1,61 @@
+import models
+import schemas
+from services import inventory_service
+
+
+def _nuevo(catalogo, sku, stock_actual):
+    return models.Producto(
+        sku=sku,
+        nombre=sku,
+        descripcion=sku,
+        categoria_id=catalogo["categoria"].id,
+        precio_unitario=10,
+        proveedor_id=catalogo["proveedor"].id,
+        stock_actual=stock_actual,
+        stock_minimo=5,
+    )
+
+
+def _producto(db, catalogo, sku, stock_actual, en_bodega):
+    producto = _nuevo(catalogo, sku, stock_actual)
+    db.add(producto)
+    db.flush()
+    db.add(
+        models.StockBodega(
+            producto_id=producto.id, bodega_id=catalogo["bodegas"][0].id, cantidad=en_bodega
+        )
+    )
+    return producto
+
+
+def test_alertas_no_escriben(db, catalogo):
+    # stock_actual desfasado respecto a las bodegas
+    producto = _producto(db, catalogo, "A-1", stock_actual=2, en_bodega=20)
+    db.commit()
+
+    alertas = inventory_service.get_productos_stock_bajo(db)
+
+    assert [a["producto"].sku for a in alertas] == ["A-1"]
+    assert isinstance(alertas[0]["producto"], schemas.ProductoResponse)
+    db.expire_all()
+    assert db.get(models.Producto, producto.id).stock_actual == 2
+
+
+def test_recalcular_stock_total(db, catalogo):
+    desfasado = _producto(db, catalogo, "A-1", stock_actual=2, en_bodega=20)
+    _producto(db, catalogo, "A-2", stock_actual=3, en_bodega=3)
+    sin_bodegas = _nuevo(catalogo, "A-3", stock_actual=7)
+    db.add(sin_bodegas)
+    db.commit()
+
+    cambiados = inventory_service.recalcular_stock_total(db)
+
+    assert sorted(cambiados) == sorted([desfasado.id, sin_bodegas.id])
+    db.expire_all()
+    assert db.get(models.Producto, desfasado.id).stock_actual == 20
+    assert db.get(models.Producto, sin_bodegas.id).stock_actual == 0
+    assert [a["producto"].sku for a in inventory_service.get_productos_stock_bajo(db)] == [
+        "A-2",
+        "A-3",
+    ]
+    assert inventory_service.recalcular_stock_total(db) == []
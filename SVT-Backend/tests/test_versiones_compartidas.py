@@ -0,0 +1,126 @@
+"""ETags y caché de referencia con la versión compartida entre workers"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+import database
+import schemas
+from routers import proveedores
+from services import producto_service, proveedor_service
+from services.reference_cache import reference_cache
+from utils import etag, resource_versions
+from utils.security import get_current_user
+
+
+@pytest.fixture
+def cliente(db, catalogo, monkeypatch):
+    app = FastAPI()
+    app.include_router(proveedores.router, prefix="/proveedores")
+    app.dependency_overrides[get_current_user] = lambda: catalogo["usuario"]
+    monkeypatch.setattr(etag, "verify_token", lambda token: None)
+    with TestClient(app, headers={"Authorization": "Bearer token"}) as cliente:
+        yield cliente
+
+
+def _escritura_de_otro_worker():
+    """Lo que hace otro proceso: datos y versión en su transacción, sin tocar este proceso"""
+    with database.engine.begin() as conn:
+        conn.execute(text("INSERT INTO proveedores (nombre, codigo) VALUES ('Otro', 'PROV2')"))
+        conn.execute(resource_versions._INCREMENTAR_COMPARTIDA, {"recurso": "proveedores"})
+
+
+def _codigos(respuesta):
+    return [proveedor["codigo"] for proveedor in respuesta.json()]
+
+
+def test_etag_nuevo_con_lista_nueva(cliente, monkeypatch):
+    monkeypatch.setattr(resource_versions, "TTL", 0)
+    primera = cliente.get("/proveedores/")
+    assert _codigos(primera) == ["PROV1"]
+
+    _escritura_de_otro_worker()
+
+    # La caché local no puede servir la lista vieja con el ETag nuevo
+    segunda = cliente.get("/proveedores/", headers={"If-None-Match": primera.headers["ETag"]})
+    assert segunda.status_code == 200
+    assert segunda.headers["ETag"] != primera.headers["ETag"]
+    assert sorted(_codigos(segunda)) == ["PROV1", "PROV2"]
+
+    tercera = cliente.get("/proveedores/", headers={"If-None-Match": segunda.headers["ETag"]})
+    assert tercera.status_code == 304
+
+
+def test_ventana_de_versiones(cliente, monkeypatch):
+    monkeypatch.setattr(resource_versions, "TTL", 60)
+    primera = cliente.get("/proveedores/")
+
+    _escritura_de_otro_worker()
+
+    # Dentro de la ventana se mantiene el par ETag/lista anterior
+    assert (
+        cliente.get("/proveedores/", headers={"If-None-Match": primera.headers["ETag"]}).status_code
+        == 304
+    )
+    # El aviso del canal de invalidación descarta la versión leída
+    resource_versions.mark_changed("proveedores")
+    segunda = cliente.get("/proveedores/", headers={"If-None-Match": primera.headers["ETag"]})
+    assert segunda.status_code == 200
+    assert sorted(_codigos(segunda)) == ["PROV1", "PROV2"]
+
+
+def test_escritura_propia_visible_al_instante(cliente, db, monkeypatch):
+    monkeypatch.setattr(resource_versions, "TTL", 60)
+    primera = cliente.get("/proveedores/")
+
+    proveedor_service.create_proveedor(db, schemas.ProveedorCreate(nombre="Otro", codigo="PROV2"))
+
+    segunda = cliente.get("/proveedores/", headers={"If-None-Match": primera.headers["ETag"]})
+    assert segunda.status_code == 200
+    assert sorted(_codigos(segunda)) == ["PROV1", "PROV2"]
+
+
+def test_version_en_la_misma_transaccion(db, catalogo, monkeypatch):
+    (antes,) = resource_versions.shared_versions("proveedores", fresh=True)
+    monkeypatch.setattr(
+        resource_versions, "_INCREMENTAR_COMPARTIDA", text("UPDATE tabla_inexistente SET x = 1")
+    )
+
+    # Si la versión no se puede incrementar tampoco se guardan los datos
+    with pytest.raises(SQLAlchemyError):
+        proveedor_service.create_proveedor(
+            db, schemas.ProveedorCreate(nombre="Otro", codigo="PROV2")
+        )
+    db.rollback()
+
+    assert proveedor_service.get_proveedor_by_codigo(db, "PROV2") is None
+    assert resource_versions.shared_versions("proveedores", fresh=True) == (antes,)
+
+
+def test_proveedor_de_otro_worker_no_da_404(db, catalogo, monkeypatch):
+    monkeypatch.setattr(resource_versions, "TTL", 60)
+    reference_cache.get_all("proveedores", db)
+
+    _escritura_de_otro_worker()
+    otro = proveedor_service.get_proveedor_by_codigo(db, "PROV2")
+
+    # Un fallo de la caché confirma la versión antes de rechazar el ID
+    assert reference_cache.get_by_id("proveedores", db, otro.id).codigo == "PROV2"
+    assert reference_cache.get_by_id("proveedores", db, otro.id + 100) is None
+    producto = producto_service.create_producto(
+        db,
+        schemas.ProductoCreate(
+            sku="SKU-1",
+            nombre="Producto",
+            descripcion="Descripción",
+            categoria_id=catalogo["categoria"].id,
+            precio_unitario=10,
+            proveedor_id=otro.id,
+            stock_minimo=2,
+            stock_inicial=10,
+            bodega_id=catalogo["bodegas"][0].id,
+        ),
+    )
+    assert producto["proveedor_id"] == otro.id
@@ -0,0 +1,221 @@
+# utils/coalescing.py
+"""
+Agrupación de peticiones idénticas en vuelo (single-flight).
+
+Con @single_flight, mientras una llamada está en curso las llamadas idénticas
+que llegan no repiten el trabajo: esperan y reciben el mismo resultado (o la
+misma excepción). Útil en lecturas caras que muchos usuarios piden a la vez,
+p. ej. los paneles al cambio de turno.
+
+- Clave: nombre de la función (la ruta, si se decora el endpoint) + valores
+  simples de los argumentos (str, números, fechas, enums, modelos Pydantic y
+  colecciones de ellos) + rol del usuario (argumento con atributo `rol`). Los
+  demás argumentos (sesión, servicios inyectados) no forman parte de la clave.
+- Funciona con funciones síncronas (endpoints `def`, en el threadpool) y
+  asíncronas (`async def`, en el event loop).
+- Quien espera más de COALESCING_TIMEOUT_SEGUNDOS deja de esperar y ejecuta
+  la función por su cuenta; si la llamada que se esperaba se cancela, también.
+- El resultado se comparte tal cual entre peticiones: debe tratarse como de
+  solo lectura y no depender de la sesión de quien lo calculó: dicts o
+  modelos Pydantic, nunca objetos ORM. Decorar solo lecturas.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from datetime import date, datetime
+from enum import Enum
+from typing import Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from utils import metrics
+
+TIMEOUT = float(os.getenv("COALESCING_TIMEOUT_SEGUNDOS", "30"))
+
+_SIMPLES = (str, int, float, bool, date, datetime, Enum, type(None))
+
+
+class _Estadisticas:
+    __slots__ = ("ejecuciones", "compartidas", "timeouts")
+
+    def __init__(self):
+        self.ejecuciones = 0
+        self.compartidas = 0
+        self.timeouts = 0
+
+
+class _Vuelo:
+    """Llamada síncrona en curso"""
+
+    __slots__ = ("listo", "resultado", "error")
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error: Optional[BaseException] = None
+
+
+class _Abandonada(Exception):
+    """La llamada que se esperaba se canceló antes de terminar"""
+
+
+_lock = threading.Lock()
+_vuelos: Dict[tuple, _Vuelo] = {}
+_vuelos_async: Dict[tuple, asyncio.Future] = {}
+_stats: Dict[str, _Estadisticas] = {}
+
+
+def _valor_clave(valor):
+    if isinstance(valor, _SIMPLES):
+        return valor
+    if isinstance(valor, BaseModel):
+        return valor.model_dump_json()
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        partes = [_valor_clave(v) for v in valor]
+        return tuple(sorted(partes, key=repr) if isinstance(valor, (set, frozenset)) else partes)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _valor_clave(v)) for k, v in valor.items()))
+    rol = getattr(valor, "rol", None)
+    if rol is not None:
+        return ("rol", rol.value if isinstance(rol, Enum) else rol)
+    return None  # Dependencia (sesión, servicio): fuera de la clave
+
+
+def _clave(nombre: str, args: tuple, kwargs: dict) -> tuple:
+    posicionales = tuple(_valor_clave(valor) for valor in args)
+    nombrados = tuple(sorted((k, _valor_clave(v)) for k, v in kwargs.items()))
+    return (nombre, posicionales, nombrados)
+
+
+def _contar(nombre: str, campo: str):
+    with _lock:
+        stats = _stats.setdefault(nombre, _Estadisticas())
+        setattr(stats, campo, getattr(stats, campo) + 1)
+
+
+def single_flight(nombre: Optional[str] = None, timeout: Optional[float] = None):
+    """Decorador: las llamadas idénticas concurrentes comparten una sola ejecución"""
+
+    def decorador(funcion: Callable):
+        nombre_vuelo = nombre or f"{funcion.__module__}.{funcion.__qualname__}"
+        espera = TIMEOUT if timeout is None else timeout
+
+        if asyncio.iscoroutinefunction(funcion):
+
+            @functools.wraps(funcion)
+            async def envoltura_async(*args, **kwargs):
+                clave = _clave(nombre_vuelo, args, kwargs)
+                futuro = _vuelos_async.get(clave)
+                if futuro is not None:
+                    try:
+                        resultado = await asyncio.wait_for(asyncio.shield(futuro), espera)
+                        _contar(nombre_vuelo, "compartidas")
+                        return resultado
+                    except (asyncio.TimeoutError, _Abandonada):
+                        _contar(nombre_vuelo, "timeouts")
+                        return await funcion(*args, **kwargs)
+
+                futuro = _vuelos_async[clave] = asyncio.get_running_loop().create_future()
+                _contar(nombre_vuelo, "ejecuciones")
+                try:
+                    resultado = await funcion(*args, **kwargs)
+                except asyncio.CancelledError:
+                    futuro.set_exception(_Abandonada())
+                    raise
+                except Exception as e:
+                    futuro.set_exception(e)
+                    raise
+                else:
+                    futuro.set_result(resultado)
+                    return resultado
+                finally:
+                    _vuelos_async.pop(clave, None)
+                    if not futuro.done():
+                        futuro.set_exception(_Abandonada())
+                    # Evitar el aviso de excepción no recuperada si nadie esperaba
+                    futuro.exception()
+
+            return envoltura_async
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            clave = _clave(nombre_vuelo, args, kwargs)
+            with _lock:
+                vuelo = _vuelos.get(clave)
+                lider = vuelo is None
+                if lider:
+                    vuelo = _vuelos[clave] = _Vuelo()
+
+            if not lider:
+                if vuelo.listo.wait(espera) and not isinstance(vuelo.error, _Abandonada):
+                    _contar(nombre_vuelo, "compartidas")
+                    if vuelo.error is not None:
+                        raise vuelo.error
+                    return vuelo.resultado
+                _contar(nombre_vuelo, "timeouts")
+                return funcion(*args, **kwargs)
+
+            _contar(nombre_vuelo, "ejecuciones")
+            try:
+                vuelo.resultado = funcion(*args, **kwargs)
+                return vuelo.resultado
+            except Exception as e:
+                vuelo.error = e
+                raise
+            except BaseException:
+                vuelo.error = _Abandonada()
+                raise
+            finally:
+                with _lock:
+                    _vuelos.pop(clave, None)
+                vuelo.listo.set()
+
+        return envoltura
+
+    return decorador
+
+
+def stats() -> dict:
+    """Ejecuciones, llamadas servidas con un resultado compartido y esperas agotadas"""
+    with _lock:
+        return {
+            nombre: {
+                "ejecuciones": s.ejecuciones,
+                "compartidas": s.compartidas,
+                "timeouts": s.timeouts,
+                "en_vuelo": sum(
+                    1 for clave in [*_vuelos, *list(_vuelos_async)] if clave[0] == nombre
+                ),
+            }
+            for nombre, s in _stats.items()
+        }
+
+
+def _metricas_coalescing():
+    valores = stats()
+    if not valores:
+        return []
+    lineas = [
+        "# HELP svt_coalesced_executions_total Ejecuciones reales de funciones con single-flight",
+        "# TYPE svt_coalesced_executions_total counter",
+    ]
+    for nombre, s in valores.items():
+        lineas.append(f'svt_coalesced_executions_total{{funcion="{nombre}"}} {s["ejecuciones"]}')
+    lineas += [
+        "# HELP svt_coalesced_shared_total Llamadas servidas con el resultado de otra en vuelo",
+        "# TYPE svt_coalesced_shared_total counter",
+    ]
+    for nombre, s in valores.items():
+        lineas.append(f'svt_coalesced_shared_total{{funcion="{nombre}"}} {s["compartidas"]}')
+    lineas += [
+        "# HELP svt_coalesced_timeouts_total Esperas agotadas o abandonadas que ejecutaron por su cuenta",
+        "# TYPE svt_coalesced_timeouts_total counter",
+    ]
+    for nombre, s in valores.items():
+        lineas.append(f'svt_coalesced_timeouts_total{{funcion="{nombre}"}} {s["timeouts"]}')
+    return lineas
+
+
+metrics.add_collector(_metricas_coalescing)
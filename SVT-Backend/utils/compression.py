@@ -0,0 +1,135 @@
+# utils/compression.py
+"""
+Compresión de respuestas (brotli o gzip) según Accept-Encoding.
+
+- Brotli si el cliente lo acepta y el paquete `brotli` está instalado
+  (opcional); si no, gzip. Calidad/nivel moderados: las respuestas se
+  comprimen en cada petición y los niveles máximos cuestan mucha CPU.
+- Solo respuestas de al menos COMPRESION_MINIMO_BYTES.
+- No toca text/event-stream (el SSE de alertas debe llegar evento a evento)
+  ni respuestas que ya traen Content-Encoding.
+- El ETag de una respuesta comprimida pasa a débil (W/...): el cuerpo ya no es
+  idéntico byte a byte; If-None-Match sigue coincidiendo (ver utils.etag).
+"""
+
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Dependencia opcional: sin ella solo gzip
+    brotli = None
+
+MINIMO_BYTES = int(os.getenv("COMPRESION_MINIMO_BYTES", "1024"))
+NIVEL_GZIP = int(os.getenv("COMPRESION_NIVEL_GZIP", "6"))
+CALIDAD_BROTLI = int(os.getenv("COMPRESION_CALIDAD_BROTLI", "4"))
+
+
+def _aceptadas(accept_encoding: str) -> set:
+    """Codificaciones aceptadas por el cliente (descarta las de q=0)"""
+    aceptadas = set()
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        q = parametros.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if nombre:
+            aceptadas.add(nombre.strip())
+    return aceptadas
+
+
+class _ETagDebil:
+    """Marca como débil el ETag al comprimir la primera parte del cuerpo"""
+
+    _etag_revisado = False
+
+    def _debilitar_etag(self):
+        if self._etag_revisado:
+            return
+        self._etag_revisado = True
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+
+class _GZip(_ETagDebil, GZipResponder):
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        self._debilitar_etag()
+        return super().apply_compression(body, more_body=more_body)
+
+
+class _Brotli(_ETagDebil, IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compresor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        self._debilitar_etag()
+        comprimido = self.compresor.process(body)
+        # En streaming se vacía el buffer en cada parte para no retener datos
+        return comprimido + (self.compresor.flush() if more_body else self.compresor.finish())
+
+
+def _agrupar_inicio(app: ASGIApp, minimo: int) -> ASGIApp:
+    """Juntar las primeras partes del cuerpo hasta `minimo` bytes.
+
+    Con BaseHTTPMiddleware (metrics, query_guard) toda respuesta llega en partes
+    con more_body=True, y el responder de Starlette decide con la primera: sin
+    esto comprimiría incluso las respuestas pequeñas. SSE pasa sin agrupar.
+    """
+
+    async def agrupada(scope: Scope, receive: Receive, send: Send):
+        pendiente = b""
+        directo = False
+
+        async def enviar(message):
+            nonlocal pendiente, directo
+            if message["type"] == "http.response.start":
+                tipo = Headers(raw=message["headers"]).get("content-type", "")
+                directo = tipo.startswith("text/event-stream")
+                await send(message)
+            elif message["type"] != "http.response.body" or directo:
+                await send(message)
+            else:
+                pendiente += message.get("body", b"")
+                mas = message.get("more_body", False)
+                if not mas or len(pendiente) >= minimo:
+                    directo = True  # El resto del cuerpo pasa sin agrupar
+                    await send({"type": "http.response.body", "body": pendiente, "more_body": mas})
+                    pendiente = b""
+
+        await app(scope, receive, enviar)
+
+    return agrupada
+
+
+class CompressionMiddleware:
+    """Middleware ASGI que comprime las respuestas grandes con brotli o gzip"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMO_BYTES):
+        self.app = _agrupar_inicio(app, minimum_size)
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        aceptadas = _aceptadas(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in aceptadas:
+            responder = _Brotli(self.app, self.minimum_size, CALIDAD_BROTLI)
+        elif "gzip" in aceptadas:
+            responder = _GZip(self.app, self.minimum_size, compresslevel=NIVEL_GZIP)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
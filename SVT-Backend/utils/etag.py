@@ -0,0 +1,70 @@
+# utils/etag.py
+"""
+Soporte de GET condicional (ETag / If-None-Match) para endpoints de catálogo.
+
+El ETag se deriva de las versiones compartidas de los recursos (tabla
+versiones_recursos, ver utils.resource_versions) y de la query string: todos
+los workers calculan el mismo ETag y cualquiera puede responder 304. Es la
+misma versión que valida la caché de referencia, así que un ETag nuevo nunca
+acompaña a una lista vieja. La versión leída se reutiliza durante
+VERSIONES_COMPARTIDAS_TTL_SEGUNDOS: dentro de esa ventana el 304 no toca la
+base de datos, a cambio de que un cambio hecho en otro worker tarde hasta ese
+tiempo en invalidar el ETag.
+"""
+
+import hashlib
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from utils.resource_versions import shared_versions
+from utils.security import oauth2_scheme, verify_token
+
+
+def build_etag(request: Request, *resources: str) -> str:
+    """Construir un ETag fuerte para la petición según las versiones de los recursos"""
+    versiones = "-".join(str(v) for v in shared_versions(*resources))
+    consulta = "&".join(sorted(request.url.query.split("&")))
+    huella = hashlib.sha1(
+        f"{request.url.path}?{consulta}".encode("utf-8")
+    ).hexdigest()[:12]
+    return f'"{versiones}-{huella}"'
+
+
+def _etag_coincide(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110 §13.1.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
+
+
+def conditional_get(*resources: str):
+    """Dependencia que responde 304 si el cliente ya tiene la versión vigente
+
+    Debe declararse en `dependencies=[...]` del endpoint para que se resuelva
+    antes que la sesión y el usuario: solo valida el JWT y lee las versiones.
+    """
+
+    def verificar(
+        request: Request,
+        response: Response,
+        token: str = Depends(oauth2_scheme),
+    ):
+        verify_token(token)
+        # Para que las lecturas enrutadas a réplicas sepan qué recursos sirve el endpoint
+        request.state.recursos_etag = resources
+        etag = build_etag(request, *resources)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_coincide(if_none_match, etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+
+    return verificar
@@ -0,0 +1,82 @@
+# utils/fast_json.py
+"""
+Serialización rápida para listados grandes (productos, movimientos, stock por bodega).
+
+Por defecto FastAPI recorre el valor devuelto, lo valida contra response_model,
+lo vuelca a dicts/listas de Python y lo codifica con json.dumps. Aquí:
+
+- json_list_response: valida la lista completa con un TypeAdapter (uno por
+  esquema, reutilizado) y la serializa a bytes con pydantic-core (dump_json).
+- json_rows_response: para datos que ya tienen la forma exacta de la respuesta
+  (proyecciones de columnas, sin objetos ORM) los codifica directamente, sin
+  validación Pydantic; usa orjson si está instalado y json.dumps si no.
+
+Al devolver un Response propio FastAPI no copia las cabeceras que las
+dependencias dejan en `response` (ETag, cookies): estas funciones las copian.
+El endpoint conserva response_model para la documentación OpenAPI.
+"""
+
+import json
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, List, Optional
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional: sin ella se usa json.dumps
+    orjson = None
+
+MEDIA_TYPE = "application/json"
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema) -> TypeAdapter:
+    """TypeAdapter de List[schema] (construirlo es costoso: se crea una vez por esquema)"""
+    return TypeAdapter(List[schema])
+
+
+def _por_defecto(valor: Any):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, BaseModel):
+        return valor.model_dump(mode="json")
+    if orjson is None:
+        # json.dumps no conoce fechas ni enums (orjson sí)
+        if hasattr(valor, "isoformat"):
+            return valor.isoformat()
+        if hasattr(valor, "value"):
+            return valor.value
+    raise TypeError(f"Tipo no serializable a JSON: {type(valor).__name__}")
+
+
+def dumps(contenido: Any) -> bytes:
+    """Codificar a JSON (bytes UTF-8) con orjson o, si no está instalado, json.dumps"""
+    if orjson is not None:
+        return orjson.dumps(contenido, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        contenido, default=_por_defecto, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _respuesta(cuerpo: bytes, response: Optional[Response]) -> Response:
+    status_code = (response.status_code if response is not None else None) or 200
+    resultado = Response(content=cuerpo, status_code=status_code, media_type=MEDIA_TYPE)
+    if response is not None:
+        resultado.headers.raw.extend(response.headers.raw)
+    return resultado
+
+
+def json_list_response(schema, datos, response: Optional[Response] = None) -> Response:
+    """Respuesta JSON de una lista validada contra el esquema (acepta objetos ORM)"""
+    adaptador = list_adapter(schema)
+    cuerpo = adaptador.dump_json(adaptador.validate_python(datos, from_attributes=True))
+    return _respuesta(cuerpo, response)
+
+
+def json_rows_response(filas, response: Optional[Response] = None) -> Response:
+    """Respuesta JSON directa de dicts/filas que ya tienen la forma del esquema"""
+    filas = [fila if isinstance(fila, dict) else dict(fila._mapping) for fila in filas]
+    return _respuesta(dumps(filas), response)
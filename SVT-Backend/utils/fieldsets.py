@@ -0,0 +1,38 @@
+# utils/fieldsets.py
+"""
+Sparse fieldsets: parámetro `fields=` para que el cliente pida solo algunos campos.
+
+    GET /productos/?fields=id,sku,nombre,stock_actual
+
+El endpoint recibe el conjunto de campos (o None si no se pidió ninguno) y el
+servicio consulta solo esas columnas; el id se incluye siempre. Un campo que
+no existe en el esquema de respuesta responde 400.
+"""
+
+from typing import Optional, Set
+
+from fastapi import HTTPException, Query, status
+
+
+def sparse_fields(schema):
+    """Dependencia que valida `fields=` contra los campos del esquema de respuesta"""
+    permitidos = tuple(schema.model_fields)
+
+    def obtener(
+        fields: Optional[str] = Query(
+            None,
+            description=f"Campos a devolver, separados por comas: {', '.join(permitidos)}",
+        ),
+    ) -> Optional[Set[str]]:
+        if not fields:
+            return None
+        campos = {campo.strip() for campo in fields.split(",") if campo.strip()}
+        desconocidos = sorted(campos.difference(permitidos))
+        if desconocidos:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Campos no válidos en fields: {', '.join(desconocidos)}",
+            )
+        return campos | {"id"}
+
+    return obtener
@@ -0,0 +1,119 @@
+# utils/invalidation_channel.py
+"""
+Canal opcional de invalidación entre workers usando LISTEN/NOTIFY de PostgreSQL.
+
+Se activa con la variable de entorno CACHE_INVALIDATION_CHANNEL. Cada
+cambio de versión confirmado se publica con pg_notify; los demás workers
+reciben el aviso y vuelven a leer la versión compartida sin esperar a que
+venza su ventana TTL, lo que invalida su caché de referencia y sus ETags.
+"""
+
+import os
+import select
+import threading
+import time
+from typing import Callable, Dict, Iterable
+
+from sqlalchemy import text
+
+from database import engine
+from utils.resource_versions import EPOCH, add_version_listener, bump_all, mark_changed
+
+CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL")
+
+_handlers: Dict[str, Callable[[str], None]] = {}
+_detener = threading.Event()
+_hilo = None
+
+
+def _publicar_versiones(recursos: Iterable[str]):
+    publish(CHANNEL, f"{EPOCH}:{','.join(recursos)}")
+
+
+def _recibir_versiones(payload: str):
+    epoch, _, recursos = payload.partition(":")
+    if epoch == EPOCH or not recursos:
+        return  # Aviso propio o vacío
+    mark_changed(*recursos.split(","))
+
+
+def publish(canal: str, payload: str):
+    """Publicar un mensaje en un canal NOTIFY (errores solo se registran)"""
+    try:
+        with engine.connect() as connection:
+            connection.execute(
+                text("SELECT pg_notify(:canal, :payload)"),
+                {"canal": canal, "payload": payload},
+            )
+            connection.commit()
+    except Exception as e:
+        print(f"⚠️  No se pudo publicar en el canal {canal}: {e}")
+
+
+def add_handler(canal: str, handler: Callable[[str], None]):
+    """Registrar un manejador para los mensajes de un canal"""
+    _handlers[canal] = handler
+
+
+def _esperar_avisos(dbapi, timeout: float):
+    """Avisos NOTIFY que lleguen en hasta `timeout` segundos (psycopg2 o psycopg 3)"""
+    if not hasattr(dbapi, "poll"):
+        yield from dbapi.notifies(timeout=timeout)
+        return
+    if select.select([dbapi], [], [], timeout) == ([], [], []):
+        return
+    dbapi.poll()
+    while dbapi.notifies:
+        yield dbapi.notifies.pop(0)
+
+
+def _escuchar():
+    reconexion = False
+    while not _detener.is_set():
+        conexion = None
+        try:
+            conexion = engine.raw_connection().detach()
+            dbapi = conexion.driver_connection
+            dbapi.autocommit = True
+            with dbapi.cursor() as cursor:
+                for canal in _handlers:
+                    cursor.execute(f'LISTEN "{canal}"')
+
+            if reconexion:
+                # Pudimos perder avisos mientras no había conexión
+                bump_all()
+            reconexion = True
+
+            while not _detener.is_set():
+                for aviso in _esperar_avisos(dbapi, 5):
+                    handler = _handlers.get(aviso.channel)
+                    if handler:
+                        handler(aviso.payload)
+        except Exception as e:
+            print(f"⚠️  Canal de invalidación desconectado: {e}")
+            time.sleep(2)
+        finally:
+            if conexion is not None:
+                try:
+                    conexion.close()
+                except Exception:
+                    pass
+
+
+def start():
+    """Iniciar el canal si está configurado y la base de datos es PostgreSQL"""
+    global _hilo
+    if not CHANNEL or engine.dialect.name != "postgresql" or _hilo is not None:
+        return False
+
+    add_handler(CHANNEL, _recibir_versiones)
+    add_version_listener(_publicar_versiones)
+    _hilo = threading.Thread(target=_escuchar, name="svt-invalidation", daemon=True)
+    _hilo.start()
+    print(f"✅ Canal de invalidación '{CHANNEL}' activo")
+    return True
+
+
+def stop():
+    """Detener el hilo de escucha"""
+    _detener.set()
@@ -0,0 +1,168 @@
+# utils/metrics.py
+"""
+Instrumentación de peticiones: latencia por ruta y consultas SQL por petición.
+
+- Histogramas de latencia por (método, ruta, status) en formato Prometheus.
+- Eventos before/after_cursor_execute de SQLAlchemy para contar consultas y
+  tiempo de BD de la petición en curso (via ContextVar).
+- Cabecera Server-Timing con el tiempo total, el de BD y el número de consultas.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import event
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """Consultas y tiempo de BD acumulados durante una petición"""
+
+    __slots__ = ("consultas", "segundos_db", "sentencias")
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos_db = 0.0
+        self.sentencias = None  # Lista opcional usada por utils.query_guard
+
+
+class _Histograma:
+    __slots__ = ("conteos", "suma", "total")
+
+    def __init__(self):
+        self.conteos = [0] * len(BUCKETS)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        for i, limite in enumerate(BUCKETS):
+            if valor <= limite:
+                self.conteos[i] += 1
+        self.suma += valor
+        self.total += 1
+
+
+_contexto: ContextVar[Optional[RequestStats]] = ContextVar("svt_request_stats", default=None)
+_lock = threading.Lock()
+_latencias: Dict[Tuple[str, str, str], _Histograma] = {}
+_consultas_por_ruta: Dict[Tuple[str, str], List[float]] = {}  # [consultas, segundos_db]
+_collectors: List[Callable[[], List[str]]] = []
+
+
+def current_stats() -> Optional[RequestStats]:
+    """Estadísticas de la petición en curso (None fuera de una petición)"""
+    return _contexto.get()
+
+
+def instrument_engine(engine):
+    """Registrar los eventos de cursor que cuentan consultas y tiempo de BD"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("svt_inicio_consulta", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info["svt_inicio_consulta"].pop()
+        stats = _contexto.get()
+        if stats is not None:
+            stats.consultas += 1
+            stats.segundos_db += time.perf_counter() - inicio
+            if stats.sentencias is not None:
+                stats.sentencias.append(statement)
+
+
+async def middleware(request: Request, call_next):
+    """Middleware HTTP: mide la petición y añade la cabecera Server-Timing"""
+    stats = RequestStats()
+    token = _contexto.set(stats)
+    inicio = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        duracion = time.perf_counter() - inicio
+        response.headers["Server-Timing"] = (
+            f"app;dur={duracion * 1000:.1f}, "
+            f'db;dur={stats.segundos_db * 1000:.1f};desc="{stats.consultas} consultas"'
+        )
+        return response
+    finally:
+        _contexto.reset(token)
+        _registrar(request, status_code, time.perf_counter() - inicio, stats)
+
+
+def _registrar(request: Request, status_code: int, duracion: float, stats: RequestStats):
+    route = request.scope.get("route")
+    # Usar la plantilla de la ruta para no crear una serie por cada ID
+    ruta = getattr(route, "path", None) or "sin_ruta"
+    metodo = request.method
+
+    with _lock:
+        histograma = _latencias.get((metodo, ruta, str(status_code)))
+        if histograma is None:
+            histograma = _latencias[(metodo, ruta, str(status_code))] = _Histograma()
+        histograma.observar(duracion)
+
+        acumulado = _consultas_por_ruta.setdefault((metodo, ruta), [0, 0.0])
+        acumulado[0] += stats.consultas
+        acumulado[1] += stats.segundos_db
+
+
+def add_collector(collector: Callable[[], List[str]]):
+    """Registrar una función que devuelve líneas adicionales en formato Prometheus"""
+    _collectors.append(collector)
+
+
+def _etiquetas(**valores) -> str:
+    partes = []
+    for clave, valor in valores.items():
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"')
+        partes.append(f'{clave}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+def render_prometheus() -> str:
+    """Exportar todas las métricas en el formato de texto de Prometheus"""
+    lineas = [
+        "# HELP svt_http_request_duration_seconds Latencia de las peticiones HTTP",
+        "# TYPE svt_http_request_duration_seconds histogram",
+    ]
+    with _lock:
+        latencias = list(_latencias.items())
+        consultas = list(_consultas_por_ruta.items())
+
+    for (metodo, ruta, status_code), histograma in latencias:
+        for limite, conteo in zip(BUCKETS, histograma.conteos):
+            etiquetas = _etiquetas(method=metodo, route=ruta, status=status_code, le=limite)
+            lineas.append(f"svt_http_request_duration_seconds_bucket{etiquetas} {conteo}")
+        etiquetas = _etiquetas(method=metodo, route=ruta, status=status_code, le="+Inf")
+        lineas.append(f"svt_http_request_duration_seconds_bucket{etiquetas} {histograma.total}")
+        etiquetas = _etiquetas(method=metodo, route=ruta, status=status_code)
+        lineas.append(f"svt_http_request_duration_seconds_sum{etiquetas} {histograma.suma}")
+        lineas.append(f"svt_http_request_duration_seconds_count{etiquetas} {histograma.total}")
+
+    lineas += [
+        "# HELP svt_db_queries_total Consultas SQL ejecutadas por ruta",
+        "# TYPE svt_db_queries_total counter",
+    ]
+    for (metodo, ruta), (total, _) in consultas:
+        lineas.append(f"svt_db_queries_total{_etiquetas(method=metodo, route=ruta)} {total}")
+
+    lineas += [
+        "# HELP svt_db_query_seconds_total Tiempo de BD acumulado por ruta",
+        "# TYPE svt_db_query_seconds_total counter",
+    ]
+    for (metodo, ruta), (_, segundos) in consultas:
+        lineas.append(
+            f"svt_db_query_seconds_total{_etiquetas(method=metodo, route=ruta)} {segundos}"
+        )
+
+    for collector in _collectors:
+        lineas.extend(collector())
+
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,222 @@
+# utils/query_guard.py
+"""
+Detector de N+1 y presupuestos de consultas SQL.
+
+- QueryRecorder: context manager que registra las sentencias ejecutadas,
+  agrupa las que tienen la misma forma y falla si se supera el presupuesto
+  o si una forma se repite demasiadas veces (patrón N+1).
+- Fixture de pytest `query_budget` (en conftest.py).
+- Middleware opcional que aplica QUERY_BUDGETS por endpoint; se activa con
+  QUERY_BUDGET_MODE=warn|raise (desactivado por defecto).
+- Política de carga perezosa: con LAZY_LOAD_MODE=warn|raise toda relación que
+  se cargue de forma perezosa con SQL (p. ej. `movimiento.producto` sin
+  joinedload/selectinload en la consulta) avisa o lanza LazyLoadNotAllowed.
+  Las que resuelve el identity map (sin SQL) no cuentan. Fixture de pytest
+  `strict_loading` (en conftest.py) para activarla en un test.
+"""
+
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from utils import metrics
+
+MODE = os.getenv("QUERY_BUDGET_MODE", "off").lower()  # off | warn | raise
+REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 5))
+LAZY_LOAD_MODE = os.getenv("LAZY_LOAD_MODE", "off").lower()  # off | warn | raise
+
+# Presupuesto máximo de consultas por endpoint ("MÉTODO plantilla-de-ruta").
+# Incluye la consulta del usuario autenticado y la de versiones compartidas
+# (lectura del ETag en los GET condicionales, incremento en las escrituras).
+QUERY_BUDGETS: Dict[str, int] = {
+    "GET /productos/": 4,
+    "GET /productos/{producto_id}": 3,
+    "GET /inventario/movimientos": 4,  # Con fields=: producto y usuario por IN
+    "GET /categorias/": 3,
+    "GET /categorias/activas": 3,
+    "GET /proveedores/": 3,
+    "GET /inventario/bodegas": 3,
+    "GET /inventario/stock/producto/{producto_id}": 2,
+    "GET /inventario/stock/alertas": 2,
+    "GET /inventario/stock/alertas/estado": 2,
+    "GET /chatbot/analytics": 5,  # Estadísticas (3), stock bajo y proveedores
+    "POST /inventario/ajuste/lote": 9,
+    # Escrituras: sin SELECT posterior al commit (expire_on_commit=False). Incluyen
+    # margen para recargar las tablas de referencia que validan
+    "POST /auth/register": 2,
+    "POST /proveedores/": 4,
+    "PUT /proveedores/{proveedor_id}": 4,
+    "POST /categorias/": 5,
+    "PUT /categorias/{categoria_id}": 7,
+    "POST /inventario/bodegas": 4,
+    "PUT /inventario/bodegas/{bodega_id}": 4,
+    "POST /productos/": 11,
+    "PUT /productos/{producto_id}": 11,
+    "POST /inventario/movimientos": 10,
+    "POST /inventario/ajuste": 14,
+}
+
+_PLACEHOLDERS_IN = re.compile(
+    r"\((\s*(%\([^)]+\)s|\?|:\w+|\$\d+|%s)\s*,)+\s*(%\([^)]+\)s|\?|:\w+|\$\d+|%s)\s*\)"
+)
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ESPACIOS = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Se superó el presupuesto de consultas o se detectó un patrón N+1"""
+
+
+class LazyLoadNotAllowed(QueryBudgetExceeded):
+    """Carga perezosa de una relación con LAZY_LOAD_MODE=raise"""
+
+
+def statement_shape(statement: str) -> str:
+    """Normalizar una sentencia: sin literales, listas IN colapsadas y espacios simples"""
+    forma = _ESPACIOS.sub(" ", statement).strip()
+    forma = _PLACEHOLDERS_IN.sub("(...)", forma)
+    return _LITERALES.sub("?", forma)
+
+
+def repeated_shapes(statements: List[str], threshold: int = REPEAT_THRESHOLD) -> Dict[str, int]:
+    """Formas de sentencia que aparecen al menos `threshold` veces"""
+    conteo = Counter(statement_shape(s) for s in statements)
+    return {forma: n for forma, n in conteo.most_common() if n >= threshold}
+
+
+def describe_violations(
+    statements: List[str], budget: Optional[int], threshold: int = REPEAT_THRESHOLD
+) -> List[str]:
+    """Lista de problemas encontrados (vacía si todo está dentro del presupuesto)"""
+    problemas = []
+    if budget is not None and len(statements) > budget:
+        problemas.append(f"{len(statements)} consultas (presupuesto: {budget})")
+    for forma, n in repeated_shapes(statements, threshold).items():
+        problemas.append(f"{n}x {forma[:200]}")
+    return problemas
+
+
+class QueryRecorder:
+    """Registrar las sentencias SQL ejecutadas dentro del bloque `with`
+
+    Ejemplo:
+        with QueryRecorder(budget=3) as recorder:
+            producto_service.get_productos(db, limit=100)
+        recorder.count
+    """
+
+    def __init__(
+        self,
+        engine=None,
+        budget: Optional[int] = None,
+        repeat_threshold: int = REPEAT_THRESHOLD,
+        check: bool = True,
+    ):
+        if engine is None:
+            from database import engine
+        self.engine = engine
+        self.budget = budget
+        self.repeat_threshold = repeat_threshold
+        self.check_on_exit = check
+        self.statements: List[str] = []
+
+    def _registrar(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "after_cursor_execute", self._registrar)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, "after_cursor_execute", self._registrar)
+        if exc_type is None and self.check_on_exit:
+            self.check()
+        return False
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self) -> Dict[str, int]:
+        return repeated_shapes(self.statements, self.repeat_threshold)
+
+    def check(self):
+        """Lanzar QueryBudgetExceeded si hay violaciones"""
+        problemas = describe_violations(self.statements, self.budget, self.repeat_threshold)
+        if problemas:
+            raise QueryBudgetExceeded("; ".join(problemas))
+
+
+async def budget_middleware(request: Request, call_next):
+    """Aplicar QUERY_BUDGETS a cada petición (requiere el middleware de utils.metrics)"""
+    stats = metrics.current_stats()
+    if stats is None:
+        return await call_next(request)
+
+    stats.sentencias = []
+    response = await call_next(request)
+
+    route = request.scope.get("route")
+    clave = f"{request.method} {getattr(route, 'path', request.url.path)}"
+    problemas = describe_violations(stats.sentencias, QUERY_BUDGETS.get(clave))
+    if not problemas:
+        return response
+
+    print(f"⚠️  Presupuesto de consultas en {clave}: {' | '.join(problemas)}")
+    if MODE == "raise":
+        return JSONResponse(
+            status_code=500,
+            content={"detail": "Presupuesto de consultas excedido", "endpoint": clave, "problemas": problemas},
+        )
+    response.headers["X-Query-Budget"] = "exceeded"
+    return response
+
+
+_modo_lazy: ContextVar[str] = ContextVar("svt_lazy_load_mode", default=LAZY_LOAD_MODE)
+_politica_instalada = False
+
+
+def _vigilar_carga_perezosa(orm_execute_state):
+    """do_orm_execute: solo las cargas perezosas de relaciones traen lazy_loaded_from"""
+    if not orm_execute_state.is_select:
+        return
+    origen = orm_execute_state.lazy_loaded_from
+    if origen is None:
+        return
+    modo = _modo_lazy.get()
+    if modo == "off":
+        return
+
+    ruta = orm_execute_state.loader_strategy_path
+    relacion = f"{origen.class_.__name__}.{ruta[-1].key}" if ruta else origen.class_.__name__
+    mensaje = f"Carga perezosa de {relacion}: añadir joinedload/selectinload a la consulta"
+    print(f"⚠️  {mensaje}")
+    if modo == "raise":
+        raise LazyLoadNotAllowed(mensaje)
+
+
+def install_lazy_load_policy():
+    """Registrar la política de carga perezosa en todas las sesiones (idempotente)"""
+    global _politica_instalada
+    if not _politica_instalada:
+        event.listen(Session, "do_orm_execute", _vigilar_carga_perezosa)
+        _politica_instalada = True
+
+
+@contextmanager
+def lazy_loads(mode: str):
+    """Cambiar la política de carga perezosa dentro del bloque `with` (off | warn | raise)"""
+    install_lazy_load_policy()
+    token = _modo_lazy.set(mode)
+    try:
+        yield
+    finally:
+        _modo_lazy.reset(token)
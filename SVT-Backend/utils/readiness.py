@@ -0,0 +1,137 @@
+# utils/readiness.py
+"""
+Disponibilidad de la base de datos para el arranque y los health checks.
+
+- esperar_base_de_datos: reintentos asíncronos con backoff exponencial y jitter;
+  no bloquea el event loop, por lo que la app atiende desde el primer momento
+  las rutas que no usan la base de datos (/health/live, /).
+- inicializar: espera la base de datos y ejecuta la preparación (esquema,
+  particiones, tareas periódicas) en segundo plano.
+- sondeo_periodico: comprueba la base de datos cada DB_SONDEO_SEGUNDOS y guarda
+  el resultado; /health/ready responde con ese valor en caché, sin abrir una
+  conexión por cada llamada del orquestador.
+"""
+
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional, Tuple
+
+from sqlalchemy import text
+
+from database import engine
+
+BACKOFF_BASE = float(os.getenv("DB_BACKOFF_BASE_SEGUNDOS", "0.5"))
+BACKOFF_MAXIMO = float(os.getenv("DB_BACKOFF_MAXIMO_SEGUNDOS", "30"))
+INTERVALO_SONDEO = float(os.getenv("DB_SONDEO_SEGUNDOS", "5"))
+TIMEOUT_SONDEO = float(os.getenv("DB_SONDEO_TIMEOUT_SEGUNDOS", "3"))
+
+INICIANDO = "iniciando"
+LISTO = "listo"
+ERROR = "error"
+
+_inicio = time.monotonic()
+_estado = {"fase": INICIANDO, "error": None, "intentos": 0}
+_sondeo = {"ok": False, "latencia_ms": None, "fecha": None, "error": None}
+_ultimo_sondeo: Optional[float] = None
+
+
+def retraso_backoff(intento: int) -> float:
+    """Espera antes del reintento N: exponencial con tope y jitter (mitad fija, mitad aleatoria)"""
+    techo = min(BACKOFF_MAXIMO, BACKOFF_BASE * 2**intento)
+    return techo / 2 + random.uniform(0, techo / 2)
+
+
+def _ping() -> float:
+    inicio = time.perf_counter()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return (time.perf_counter() - inicio) * 1000
+
+
+async def sondear() -> bool:
+    """Comprobar la base de datos (en un hilo y con timeout) y guardar el resultado"""
+    global _ultimo_sondeo
+    try:
+        latencia = await asyncio.wait_for(asyncio.to_thread(_ping), TIMEOUT_SONDEO)
+        _sondeo.update(ok=True, latencia_ms=round(latencia, 2), error=None)
+    except Exception as e:
+        _sondeo.update(ok=False, latencia_ms=None, error=str(e) or type(e).__name__)
+    _sondeo["fecha"] = datetime.now(timezone.utc).isoformat()
+    _ultimo_sondeo = time.monotonic()
+    return _sondeo["ok"]
+
+
+async def esperar_base_de_datos(max_intentos: Optional[int] = None) -> bool:
+    """Esperar a que la base de datos responda (sin límite de intentos por defecto)"""
+    intento = 0
+    while not await sondear():
+        intento += 1
+        _estado["intentos"] = intento
+        if max_intentos is not None and intento >= max_intentos:
+            print("❌ No se pudo conectar a la base de datos después de varios intentos")
+            return False
+        espera = retraso_backoff(intento - 1)
+        print(f"⏳ Intento {intento}: base de datos no disponible; reintento en {espera:.1f}s")
+        await asyncio.sleep(espera)
+
+    print("✅ Base de datos conectada exitosamente")
+    return True
+
+
+async def inicializar(preparar: Callable[[], Awaitable[None]]):
+    """Esperar la base de datos, ejecutar la preparación y marcar la app como lista"""
+    try:
+        await esperar_base_de_datos()
+        await preparar()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        _estado.update(fase=ERROR, error=str(e))
+        print(f"❌ Error preparando la base de datos: {e}")
+        return
+    _estado.update(fase=LISTO, error=None)
+    print(f"✅ Aplicación lista en {time.monotonic() - _inicio:.2f}s")
+
+
+async def sondeo_periodico():
+    """Actualizar el sondeo en caché (se lanza como tarea al iniciar la app)"""
+    while True:
+        await asyncio.sleep(INTERVALO_SONDEO)
+        await sondear()
+
+
+def estado_pool() -> dict:
+    """Conexiones del pool (los pools de SQLite no exponen todos los contadores)"""
+    pool = engine.pool
+    datos = {"tipo": type(pool).__name__}
+    for nombre in ("size", "checkedin", "checkedout", "overflow"):
+        metodo = getattr(pool, nombre, None)
+        if callable(metodo):
+            datos[nombre] = metodo()
+    return datos
+
+
+def vivo() -> dict:
+    """Liveness: el proceso atiende peticiones (no depende de la base de datos)"""
+    return {"status": "alive", "uptime_s": round(time.monotonic() - _inicio, 1)}
+
+
+def listo() -> Tuple[bool, dict]:
+    """Readiness según la fase de arranque y el último sondeo en caché"""
+    fresco = (
+        _ultimo_sondeo is not None
+        and time.monotonic() - _ultimo_sondeo <= 2 * INTERVALO_SONDEO + TIMEOUT_SONDEO
+    )
+    ok = _estado["fase"] == LISTO and _sondeo["ok"] and fresco
+    return ok, {
+        "status": "ready" if ok else "not_ready",
+        "fase": _estado["fase"],
+        "error": _estado["error"],
+        "intentos_conexion": _estado["intentos"],
+        "uptime_s": round(time.monotonic() - _inicio, 1),
+        "database": {**_sondeo, "fresco": fresco},
+        "pool": estado_pool(),
+    }
@@ -0,0 +1,252 @@
+# utils/replicas.py
+"""
+Enrutamiento de lecturas a réplicas (REPLICA_URLS, separadas por comas).
+
+- Un sondeo periódico mide en cada réplica si responde y su retraso de
+  replicación; solo se usan las que responden con retraso <= REPLICA_MAX_LAG_SEGUNDOS.
+- asignar elige una réplica disponible (round-robin) para una sesión de lectura
+  y verifica la conexión al asignarla; si falla, la marca caída y prueba la
+  siguiente o vuelve al primario. Un error de desconexión durante una consulta
+  también la marca caída; el sondeo la recupera cuando vuelve a responder.
+- Lee-tus-escrituras: tras una escritura correcta de un cliente, sus lecturas van
+  al primario durante REPLICA_STICKY_SEGUNDOS (cookie, válida entre workers, y
+  registro en memoria por token para clientes sin cookies).
+- Endpoints con ETag: si alguno de sus recursos cambió hace menos que el retraso
+  tolerado, se leen del primario para no asociar datos viejos a la versión nueva.
+
+Sin réplicas configuradas todo va al primario y estas funciones no hacen nada.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import event, text
+
+from utils import metrics
+from utils.resource_versions import seconds_since_change
+
+MAX_LAG = float(os.getenv("REPLICA_MAX_LAG_SEGUNDOS", "5"))
+INTERVALO_SONDEO = float(os.getenv("REPLICA_SONDEO_SEGUNDOS", "2"))
+STICKY = float(os.getenv("REPLICA_STICKY_SEGUNDOS", "10"))
+COOKIE_PRIMARIO = "svt_leer_primario_hasta"
+
+_METODOS_LECTURA = {"GET", "HEAD", "OPTIONS"}
+
+# Retraso de reproducción; 0 si la réplica ya aplicó todo lo recibido
+_SQL_RETRASO = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class _Replica:
+    __slots__ = ("nombre", "engine", "sana", "retraso", "error", "ultimo_sondeo", "asignaciones")
+
+    def __init__(self, nombre: str, engine):
+        self.nombre = nombre
+        self.engine = engine
+        self.sana = False  # Hasta el primer sondeo correcto
+        self.retraso: Optional[float] = None
+        self.error: Optional[str] = None
+        self.ultimo_sondeo: Optional[float] = None
+        self.asignaciones = 0
+
+
+_replicas: List[_Replica] = []
+_turno = itertools.count()
+_escrituras: Dict[str, float] = {}  # clave de cliente -> leer del primario hasta (monotonic)
+_lock = threading.Lock()
+_fallos_asignacion = 0
+
+
+def configurar(engines: list):
+    """Registrar los engines de réplica (lo llama database.py al importarse)"""
+    for engine in engines:
+        replica = _Replica(engine.url.host or engine.url.database or str(engine.url), engine)
+        _replicas.append(replica)
+
+        @event.listens_for(engine, "handle_error")
+        def _error(contexto, replica=replica):
+            if contexto.is_disconnect:
+                marcar_caida(replica, str(contexto.original_exception))
+
+
+def hay_replicas() -> bool:
+    return bool(_replicas)
+
+
+def marcar_caida(replica: _Replica, error: str):
+    if replica.sana:
+        print(f"⚠️  Réplica {replica.nombre} fuera de servicio: {error}")
+    replica.sana = False
+    replica.error = error
+
+
+def _medir(replica: _Replica):
+    try:
+        with replica.engine.connect() as connection:
+            if replica.engine.dialect.name == "postgresql":
+                retraso = float(connection.execute(_SQL_RETRASO).scalar() or 0)
+            else:
+                connection.execute(text("SELECT 1"))
+                retraso = 0.0
+        if not replica.sana:
+            print(f"✅ Réplica {replica.nombre} disponible (retraso {retraso:.2f}s)")
+        replica.sana, replica.retraso, replica.error = True, retraso, None
+    except Exception as e:
+        marcar_caida(replica, str(e))
+        replica.retraso = None
+    replica.ultimo_sondeo = time.monotonic()
+
+
+def sondear():
+    """Medir disponibilidad y retraso de todas las réplicas"""
+    for replica in _replicas:
+        _medir(replica)
+
+
+async def sondeo_periodico():
+    """Mantener actualizado el estado de las réplicas (tarea de la app)"""
+    while True:
+        await asyncio.to_thread(sondear)
+        await asyncio.sleep(INTERVALO_SONDEO)
+
+
+def _disponible(replica: _Replica) -> bool:
+    return (
+        replica.sana
+        and replica.retraso is not None
+        and replica.retraso <= MAX_LAG
+        and replica.ultimo_sondeo is not None
+        and time.monotonic() - replica.ultimo_sondeo <= 3 * INTERVALO_SONDEO
+    )
+
+
+def _clave_cliente(request: Request) -> str:
+    credencial = request.headers.get("authorization") or (
+        request.client.host if request.client else ""
+    )
+    return hashlib.sha1(credencial.encode("utf-8")).hexdigest()[:16]
+
+
+def requiere_primario(request: Request) -> bool:
+    """Indicar si la petición debe leer del primario (escritura reciente o recurso recién cambiado)"""
+    try:
+        if float(request.cookies.get(COOKIE_PRIMARIO, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    if _escrituras.get(_clave_cliente(request), 0) > time.monotonic():
+        return True
+    recursos = getattr(request.state, "recursos_etag", ())
+    return bool(recursos) and seconds_since_change(*recursos) <= MAX_LAG + INTERVALO_SONDEO
+
+
+def asignar(db, request: Optional[Request] = None) -> Optional[str]:
+    """Asignar una réplica a la sesión de lectura; None si se usa el primario"""
+    global _fallos_asignacion
+    if not _replicas or (request is not None and requiere_primario(request)):
+        return None
+
+    candidatas = [replica for replica in _replicas if _disponible(replica)]
+    if not candidatas:
+        return None
+    inicio = next(_turno)
+    for i in range(len(candidatas)):
+        replica = candidatas[(inicio + i) % len(candidatas)]
+        try:
+            # Abre (y verifica con pre_ping) la conexión de la sesión en la réplica
+            db.connection(bind_arguments={"bind": replica.engine})
+        except Exception as e:
+            db.rollback()
+            _fallos_asignacion += 1
+            marcar_caida(replica, str(e))
+            continue
+        db.info["replica"] = replica.engine
+        replica.asignaciones += 1
+        return replica.nombre
+    return None
+
+
+def registrar_escritura(request: Request, response):
+    """Tras una escritura correcta, leer del primario durante STICKY segundos"""
+    with _lock:
+        ahora = time.monotonic()
+        _escrituras[_clave_cliente(request)] = ahora + STICKY
+        if len(_escrituras) > 10000:
+            for clave in [c for c, hasta in _escrituras.items() if hasta <= ahora]:
+                del _escrituras[clave]
+    response.set_cookie(
+        COOKIE_PRIMARIO,
+        f"{time.time() + STICKY:.3f}",
+        max_age=int(STICKY) + 1,
+        httponly=True,
+        samesite="lax",
+    )
+
+
+async def middleware(request: Request, call_next):
+    """Registrar las escrituras de cada cliente e indicar de dónde se leyó"""
+    response = await call_next(request)
+    if request.method not in _METODOS_LECTURA and response.status_code < 400:
+        registrar_escritura(request, response)
+    origen = getattr(request.state, "origen_lectura", None)
+    if origen:
+        response.headers["X-Read-Source"] = origen
+    return response
+
+
+def estado() -> List[dict]:
+    """Estado de cada réplica (para /health/ready)"""
+    return [
+        {
+            "nombre": replica.nombre,
+            "disponible": _disponible(replica),
+            "sana": replica.sana,
+            "retraso_s": replica.retraso,
+            "error": replica.error,
+            "asignaciones": replica.asignaciones,
+        }
+        for replica in _replicas
+    ]
+
+
+def _metricas_replicas():
+    if not _replicas:
+        return []
+    lineas = [
+        "# HELP svt_replica_available Réplica utilizable (responde y dentro del retraso tolerado)",
+        "# TYPE svt_replica_available gauge",
+    ]
+    for replica in _replicas:
+        lineas.append(f'svt_replica_available{{replica="{replica.nombre}"}} {int(_disponible(replica))}')
+    lineas += [
+        "# HELP svt_replica_lag_seconds Retraso de replicación medido en el último sondeo",
+        "# TYPE svt_replica_lag_seconds gauge",
+    ]
+    for replica in _replicas:
+        if replica.retraso is not None:
+            lineas.append(f'svt_replica_lag_seconds{{replica="{replica.nombre}"}} {replica.retraso:.3f}')
+    lineas += [
+        "# HELP svt_replica_reads_total Sesiones de lectura asignadas a cada réplica",
+        "# TYPE svt_replica_reads_total counter",
+    ]
+    for replica in _replicas:
+        lineas.append(f'svt_replica_reads_total{{replica="{replica.nombre}"}} {replica.asignaciones}')
+    lineas += [
+        "# HELP svt_replica_failovers_total Asignaciones que fallaron y pasaron a otra réplica o al primario",
+        "# TYPE svt_replica_failovers_total counter",
+        f"svt_replica_failovers_total {_fallos_asignacion}",
+    ]
+    return lineas
+
+
+metrics.add_collector(_metricas_replicas)
@@ -0,0 +1,124 @@
+# utils/resource_versions.py
+"""
+Versiones por recurso, compartidas por todos los workers.
+
+Los servicios llaman a bump_version(db, recurso) antes del commit de una
+escritura: la fila del recurso en versiones_recursos se incrementa en la misma
+transacción, así que no hay datos nuevos con la versión vieja ni al revés.
+Los lectores (ETags, caché de referencia) usan shared_versions, que lee esa
+tabla y guarda el resultado TTL segundos: un cambio hecho en otro worker se ve
+como mucho TTL segundos después (al instante con el canal de invalidación).
+Los cambios propios se ven en el acto.
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.orm import Session
+
+# Identificador de este proceso (para ignorar los avisos propios entre workers)
+EPOCH = uuid.uuid4().hex[:8]
+
+# Ventana durante la que se reutiliza la versión compartida leída (0 = leer siempre)
+TTL = float(os.getenv("VERSIONES_COMPARTIDAS_TTL_SEGUNDOS", "1"))
+
+_LEER_COMPARTIDAS = text(
+    "SELECT recurso, version FROM versiones_recursos WHERE recurso IN :recursos"
+).bindparams(bindparam("recursos", expanding=True))
+_INCREMENTAR_COMPARTIDA = text(
+    "INSERT INTO versiones_recursos (recurso, version) VALUES (:recurso, 1) "
+    "ON CONFLICT (recurso) DO UPDATE SET version = versiones_recursos.version + 1"
+)
+_PENDIENTES = "versiones_pendientes"  # Clave en Session.info
+
+_leidas: Dict[str, Tuple[int, float]] = {}  # Recurso -> (versión, momento de lectura)
+_changed_at: Dict[str, float] = {}  # Último cambio conocido de cada recurso (monotonic)
+_all_changed_at = 0.0
+_lock = threading.Lock()
+_listeners: List[Callable[[Iterable[str]], None]] = []
+
+
+def shared_versions(*resources: str, fresh: bool = False) -> tuple:
+    """Versiones de los recursos en la base de datos (fresh=True ignora la ventana TTL)"""
+    ahora = time.monotonic()
+    with _lock:
+        versiones = {
+            resource: _leidas[resource][0]
+            for resource in resources
+            if not fresh and resource in _leidas and ahora - _leidas[resource][1] < TTL
+        }
+    faltan = [resource for resource in resources if resource not in versiones]
+    if faltan:
+        from database import engine
+
+        with engine.connect() as conn:
+            filas = dict(conn.execute(_LEER_COMPARTIDAS, {"recursos": faltan}).all())
+        with _lock:
+            for resource in faltan:
+                versiones[resource] = filas.get(resource, 0)
+                _leidas[resource] = (versiones[resource], ahora)
+    return tuple(versiones[resource] for resource in resources)
+
+
+def bump_version(db: Session, *resources: str):
+    """Incrementar la versión de uno o más recursos al hacer commit de `db` (llamar antes del commit)"""
+    db.info.setdefault(_PENDIENTES, set()).update(resources)
+
+
+def mark_changed(*resources: str):
+    """Registrar un cambio hecho en otro worker (aviso del canal de invalidación)"""
+    with _lock:
+        ahora = time.monotonic()
+        for resource in resources:
+            _leidas.pop(resource, None)
+            _changed_at[resource] = ahora
+
+
+@event.listens_for(Session, "before_commit")
+def _incrementar_compartidas(session: Session):
+    recursos = session.info.get(_PENDIENTES)
+    if recursos:
+        # Primero los datos: la fila de versión se bloquea lo menos posible, y
+        # en orden para que dos escrituras concurrentes no se bloqueen mutuamente
+        session.flush()
+        session.execute(
+            _INCREMENTAR_COMPARTIDA, [{"recurso": resource} for resource in sorted(recursos)]
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_cambios(session: Session):
+    recursos = session.info.pop(_PENDIENTES, None)
+    if recursos:
+        recursos = sorted(recursos)
+        mark_changed(*recursos)
+        for listener in list(_listeners):
+            listener(recursos)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios(session: Session):
+    session.info.pop(_PENDIENTES, None)
+
+
+def bump_all():
+    """Volver a leer todas las versiones (p. ej. tras perder avisos de otros workers)"""
+    global _all_changed_at
+    with _lock:
+        _leidas.clear()
+        _all_changed_at = time.monotonic()
+
+
+def seconds_since_change(*resources: str) -> float:
+    """Segundos desde el último cambio conocido de alguno de los recursos"""
+    ultimo = max([_all_changed_at] + [_changed_at.get(resource, 0.0) for resource in resources])
+    return time.monotonic() - ultimo if ultimo else float("inf")
+
+
+def add_version_listener(listener: Callable[[Iterable[str]], None]):
+    """Registrar una función que se invoca con los recursos modificados"""
+    _listeners.append(listener)